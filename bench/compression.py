@@ -0,0 +1,66 @@
+"""
+Benchmark of the transfer compression, see common.compression -- when it pays off.
+
+For each kind of data and link throughput, measures the compression and decompression of the whole dataset in
+blocks with the codec chosen, and compares the pipelined transfer time, ie, the slowest of compression, sending
+and decompression, to sending uncompressed. The link is modeled rather than measured, the time to choose the
+codec is included. Just a report, there is no baseline to regress against.
+
+Usage: python bench/compression.py [--size-mb N]
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+from gnosch.common import compression
+
+block_size = 1 << 20
+links_mbps = [10.0, 100.0, 1000.0, 10000.0]
+
+
+def datasets(size: int) -> dict[str, bytes]:
+	rng = np.random.default_rng(0)
+	sparse = np.zeros(size // 8)
+	sparse[rng.integers(0, len(sparse), len(sparse) // 20)] = rng.random(len(sparse) // 20)
+	counts = rng.poisson(3, size // 4).astype(np.int32)
+	words = [b"alpha", b"beta", b"gamma", b"delta", b"request", b"worker", b"dataset", b"failed", b"ok"]
+	text = b" ".join(words[i] for i in rng.integers(0, len(words), size // 5))[:size]
+	return {"sparse_float64": sparse.tobytes(), "poisson_int32": counts.tobytes(), "text": text, "random": os.urandom(size)}
+
+
+def transfer_s(data: bytes, link_mbps: float) -> tuple[str, float, float]:
+	"""The codec chosen, the compression ratio, and the pipelined transfer time"""
+	view = memoryview(data)
+	start = time.perf_counter()
+	codec = compression.choose(view[: compression.sample_size], link_mbps, compression.codecs)
+	choose_s = time.perf_counter() - start
+	compress_s, decompress_s, sent = 0.0, 0.0, 0
+	for i in range(0, len(data), block_size):
+		start = time.perf_counter()
+		block = compression.compress(codec, view[i : i + block_size])
+		compressed_at = time.perf_counter()
+		compression.decompress(codec, bytes(block))
+		compress_s += compressed_at - start
+		decompress_s += time.perf_counter() - compressed_at
+		sent += len(block)
+	return codec, len(data) / sent, choose_s + max(compress_s, sent / 1e6 / link_mbps, decompress_s)
+
+
+def main() -> int:
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--size-mb", type=int, default=32)
+	args = parser.parse_args()
+
+	print(f"{'data':16} {'link_mbps':>9} {'codec':>6} {'ratio':>6} {'raw_s':>8} {'chosen_s':>8} {'speedup':>7}")
+	for name, data in datasets(args.size_mb << 20).items():
+		for link_mbps in links_mbps:
+			raw_s = len(data) / 1e6 / link_mbps
+			codec, ratio, chosen_s = transfer_s(data, link_mbps)
+			print(f"{name:16} {link_mbps:9.0f} {codec:>6} {ratio:6.1f} {raw_s:8.3f} {chosen_s:8.3f} {raw_s / chosen_s:7.2f}")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
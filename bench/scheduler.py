@@ -0,0 +1,116 @@
+"""
+Benchmarks of the scheduler and the simulator over synthetic workloads, see scheduler.generators.
+
+For each scenario, measures the time of schedule() and simulate(), and the makespan of the schedule -- also
+relative to a lower bound, the longer of the critical path and the total cpusecs spread over all the cpus.
+Compares against the stored baseline and exits with 1 on a regression, ie, a slowdown beyond the time
+tolerance or a longer makespan beyond the quality tolerance. Timings are machine specific, so refresh the
+baseline with --update on the machine used for comparisons.
+
+Usage: python bench/scheduler.py [--update] [--only SUBSTRING] [--repeat N]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+from gnosch.scheduler.api import schedule
+from gnosch.scheduler.generators import chains, fan_in, fork_join, heterogeneous_cluster, homogeneous_cluster, layered, map_reduce
+from gnosch.scheduler.graph import CompiledGraph
+from gnosch.scheduler.model import ClusterSpec, TaskGraph
+from gnosch.scheduler.simulator import simulate
+
+baseline_path = Path(__file__).parent / "scheduler_baseline.json"
+time_tolerance = 0.5
+quality_tolerance = 0.01
+
+Scenario = Callable[[random.Random], tuple[TaskGraph, ClusterSpec]]
+
+scenarios: dict[str, Scenario] = {
+	"map_reduce_200x50_homogeneous16": lambda rng: (map_reduce(rng, 200, 50), homogeneous_cluster(16)),
+	"fork_join_64x20_heterogeneous16": lambda rng: (fork_join(rng, 64, 20), heterogeneous_cluster(rng, 16)),
+	"layered_50x100_heterogeneous32": lambda rng: (layered(rng, 50, 100), heterogeneous_cluster(rng, 32)),
+	"layered_100x100_homogeneous100": lambda rng: (layered(rng, 100, 100), homogeneous_cluster(100)),
+	"chains_20x100_homogeneous8": lambda rng: (chains(rng, 20, 100), homogeneous_cluster(8)),
+	"fan_in_2000_homogeneous8": lambda rng: (fan_in(rng, 2000), homogeneous_cluster(8, memory_mb=131072)),
+}
+
+
+def lower_bound_s(task_graph: TaskGraph, cluster_spec: ClusterSpec) -> float:
+	"""A task alone at a node gets all of its cpus, so the longest path is bounded by cpusecs over the most cpus"""
+	graph = CompiledGraph(task_graph)
+	max_cpus = max(node.cpus for node in cluster_spec.nodes.values())
+	finish = [0.0] * len(graph)
+	for t in graph.order:
+		start = max((finish[graph.producer[d]] for d in graph.inputs(t)), default=0.0)
+		finish[t] = start + graph.cpusecs[t] / max_cpus
+	total_cpus = sum(node.cpus for node in cluster_spec.nodes.values())
+	return max(max(finish, default=0.0), sum(graph.cpusecs) / total_cpus)
+
+
+def run(name: str, scenario: Scenario, repeat: int) -> dict[str, float]:
+	task_graph, cluster_spec = scenario(random.Random(name))
+	schedule_s, simulate_s = float("inf"), float("inf")
+	for _ in range(repeat):
+		start = time.perf_counter()
+		plan = schedule(task_graph, cluster_spec)
+		schedule_s = min(schedule_s, time.perf_counter() - start)
+		start = time.perf_counter()
+		makespan = simulate(cluster_spec, task_graph, plan)
+		simulate_s = min(simulate_s, time.perf_counter() - start)
+	return {
+		"tasks": len(task_graph),
+		"schedule_s": schedule_s,
+		"simulate_s": simulate_s,
+		"makespan": makespan,
+		"quality": makespan / lower_bound_s(task_graph, cluster_spec),
+	}
+
+
+def regressions(name: str, result: dict[str, float], baseline: dict[str, float]) -> list[str]:
+	found = []
+	for key in ("schedule_s", "simulate_s"):
+		if result[key] > baseline[key] * (1 + time_tolerance):
+			found.append(f"{name}: {key} {result[key]:.3f} vs {baseline[key]:.3f}")
+	if result["makespan"] > baseline["makespan"] * (1 + quality_tolerance):
+		found.append(f"{name}: makespan {result['makespan']:.1f} vs {baseline['makespan']:.1f}")
+	return found
+
+
+def main() -> int:
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--update", action="store_true", help="store the results as the new baseline")
+	parser.add_argument("--only", default="", help="run only the scenarios containing this")
+	parser.add_argument("--repeat", type=int, default=3, help="timings are the best of this many runs")
+	args = parser.parse_args()
+
+	baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+	results = {}
+	found = []
+	print(f"{'scenario':40} {'tasks':>6} {'schedule_s':>10} {'tasks/s':>8} {'simulate_s':>10} {'makespan':>9} {'quality':>7}")
+	for name, scenario in scenarios.items():
+		if args.only not in name:
+			continue
+		result = run(name, scenario, args.repeat)
+		results[name] = result
+		print(
+			f"{name:40} {result['tasks']:6.0f} {result['schedule_s']:10.3f} {result['tasks'] / result['schedule_s']:8.0f}"
+			f" {result['simulate_s']:10.3f} {result['makespan']:9.1f} {result['quality']:7.3f}"
+		)
+		if name in baseline:
+			found.extend(regressions(name, result, baseline[name]))
+
+	if args.update:
+		baseline_path.write_text(json.dumps({**baseline, **results}, indent=2, sort_keys=True) + "\n")
+		print(f"baseline updated at {baseline_path}")
+		return 0
+	for regression in found:
+		print(f"REGRESSION {regression}")
+	return 1 if found else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
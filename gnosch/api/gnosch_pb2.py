@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: gnosch/api/gnosch.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'gnosch/api/gnosch.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x17gnosch/api/gnosch.proto\"\r\n\x0bPingRequest\"=\n\x0cPingResponse\x12\"\n\x06status\x18\x01 \x01(\x0e\x32\r.ServerStatusH\x00\x88\x01\x01\x42\t\n\x07_status\"\xad\x01\n\x0bJobResponse\x12\x13\n\x06job_id\x18\x01 \x01(\tH\x00\x88\x01\x01\x12#\n\njob_status\x18\x02 \x01(\x0e\x32\n.JobStatusH\x01\x88\x01\x01\x12\x16\n\tworker_id\x18\x03 \x01(\tH\x02\x88\x01\x01\x12\x16\n\texit_code\x18\x04 \x01(\x05H\x03\x88\x01\x01\x42\t\n\x07_job_idB\r\n\x0b_job_statusB\x0c\n\n_worker_idB\x0c\n\n_exit_code\"M\n\x07JobSpec\x12\x17\n\nentrypoint\x18\x01 \x01(\tH\x00\x88\x01\x01\x12\x11\n\x04\x61rgs\x18\x02 \x01(\x0cH\x01\x88\x01\x01\x42\r\n\x0b_entrypointB\x07\n\x05_args\"\xb2\x01\n\x10JobCreateRequest\x12\x17\n\ndefinition\x18\x01 \x01(\tH\x00\x88\x01\x01\x12\x1b\n\x04spec\x18\x02 \x01(\x0b\x32\x08.JobSpecH\x01\x88\x01\x01\x12\x16\n\tmemory_mb\x18\x03 \x01(\x03H\x02\x88\x01\x01\x12\x0e\n\x06inputs\x18\x04 \x03(\t\x12\x11\n\x04\x63pus\x18\x05 \x01(\x05H\x03\x88\x01\x01\x42\r\n\x0b_definitionB\x07\n\x05_specB\x0c\n\n_memory_mbB\x07\n\x05_cpus\"2\n\x10JobStatusRequest\x12\x13\n\x06job_id\x18\x01 \x01(\tH\x00\x88\x01\x01\x42\t\n\x07_job_id\"8\n\x15JobCreateBatchRequest\x12\x1f\n\x04jobs\x18\x01 \x03(\x0b\x32\x11.JobCreateRequest\"(\n\x15JobStatusBatchRequest\x12\x0f\n\x07job_ids\x18\x01 \x03(\t\".\n\x10JobBatchResponse\x12\x1a\n\x04jobs\x18\x01 \x03(\x0b\x32\x0c.JobResponse\"#\n\x10WatchJobsRequest\x12\x0f\n\x07job_ids\x18\x01 \x03(\t\"\xba\x02\n\tGraphTask\x12\x0e\n\x06inputs\x18\x01 \x03(\t\x12-\n\noutputs_mb\x18\x02 \x03(\x0b\x32\x19.GraphTask.OutputsMbEntry\x12\x16\n\tmemory_mb\x18\x03 \x01(\x03H\x00\x88\x01\x01\x12\x11\n\x04\x63pus\x18\x04 \x01(\x05H\x01\x88\x01\x01\x12\x1a\n\rruntime_est_s\x18\x05 \x01(\x03H\x02\x88\x01\x01\x12\x17\n\ndefinition\x18\x06 \x01(\tH\x03\x88\x01\x01\x12\x1b\n\x04spec\x18\x07 \x01(\x0b\x32\x08.JobSpecH\x04\x88\x01\x01\x1a\x30\n\x0eOutputsMbEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x03:\x02\x38\x01\x42\x0c\n\n_memory_mbB\x07\n\x05_cpusB\x10\n\x0e_runtime_est_sB\r\n\x0b_definitionB\x07\n\x05_spec\"}\n\x12SubmitGraphRequest\x12-\n\x05tasks\x18\x01 \x03(\x0b\x32\x1e.SubmitGraphRequest.TasksEntry\x1a\x38\n\nTasksEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x19\n\x05value\x18\x02 \x01(\x0b\x32\n.GraphTask:\x02\x38\x01\"[\n\x0fGraphTaskStatus\x12\x14\n\x07task_id\x18\x01 \x01(\tH\x00\x88\x01\x01\x12\x1e\n\x03job\x18\x02 \x01(\x0b\x32\x0c.JobResponseH\x01\x88\x01\x01\x42\n\n\x08_task_idB\x06\n\x04_job\"U\n\x11UpdateJobsRequest\x12\x16\n\tworker_id\x18\x01 \x01(\tH\x00\x88\x01\x01\x12\x1a\n\x04jobs\x18\x02 \x03(\x0b\x32\x0c.JobResponseB\x0c\n\n_worker_id\"\xa7\x02\n\x15\x44\x61tasetCommandRequest\x12\x17\n\ndataset_id\x18\x01 \x01(\tH\x00\x88\x01\x01\x12\x15\n\x08retrieve\x18\x02 \x01(\x08H\x01\x88\x01\x01\x12\x11\n\x04\x64rop\x18\x03 \x01(\x08H\x02\x88\x01\x01\x12\x1c\n\x0f\x62lock_size_hint\x18\x04 \x01(\x05H\x03\x88\x01\x01\x12\x13\n\x06offset\x18\x05 \x01(\x03H\x04\x88\x01\x01\x12\x13\n\x06length\x18\x06 \x01(\x03H\x05\x88\x01\x01\x12\x0e\n\x06\x63odecs\x18\x07 \x03(\t\x12\x16\n\tlink_mbps\x18\x08 \x01(\x01H\x06\x88\x01\x01\x42\r\n\x0b_dataset_idB\x0b\n\t_retrieveB\x07\n\x05_dropB\x12\n\x10_block_size_hintB\t\n\x07_offsetB\t\n\x07_lengthB\x0c\n\n_link_mbps\"F\n\x13\x44\x61tasetBatchRequest\x12\x13\n\x0b\x64\x61taset_ids\x18\x01 \x03(\t\x12\x11\n\x04\x64rop\x18\x02 \x01(\x08H\x00\x88\x01\x01\x42\x07\n\x05_drop\"\xc1\x02\n\x16\x44\x61tasetCommandResponse\x12*\n\x06status\x18\x01 \x01(\x0e\x32\x15.DatasetCommandResultH\x00\x88\x01\x01\x12\x17\n\ndataset_id\x18\x02 \x01(\tH\x01\x88\x01\x01\x12\x16\n\tworker_id\x18\x03 \x01(\tH\x02\x88\x01\x01\x12\x11\n\x04\x64\x61ta\x18\x04 \x01(\x0cH\x03\x88\x01\x01\x12\x17\n\nsize_bytes\x18\x05 \x01(\x03H\x04\x88\x01\x01\x12\x13\n\x06offset\x18\x06 \x01(\x03H\x05\x88\x01\x01\x12\x12\n\x05\x63odec\x18\x07 \x01(\tH\x06\x88\x01\x01\x12\x14\n\x07\x63odec_s\x18\x08 \x01(\x01H\x07\x88\x01\x01\x42\t\n\x07_statusB\r\n\x0b_dataset_idB\x0c\n\n_worker_idB\x07\n\x05_dataB\r\n\x0b_size_bytesB\t\n\x07_offsetB\x08\n\x06_codecB\n\n\x08_codec_s\"\xbd\x01\n\x13\x46\x65tchDatasetRequest\x12\x17\n\ndataset_id\x18\x01 \x01(\tH\x00\x88\x01\x01\x12\x17\n\nsource_url\x18\x02 \x01(\tH\x01\x88\x01\x01\x12\x1c\n\x0f\x62lock_size_hint\x18\x03 \x01(\x05H\x02\x88\x01\x01\x12\x16\n\tlink_mbps\x18\x04 \x01(\x01H\x03\x88\x01\x01\x42\r\n\x0b_dataset_idB\r\n\x0b_source_urlB\x12\n\x10_block_size_hintB\x0c\n\n_link_mbps\"\x9a\x01\n\x0c\x44\x61tasetBlock\x12\x17\n\ndataset_id\x18\x01 \x01(\tH\x00\x88\x01\x01\x12\x17\n\nsize_bytes\x18\x02 \x01(\x03H\x01\x88\x01\x01\x12\x13\n\x06offset\x18\x03 \x01(\x03H\x02\x88\x01\x01\x12\x11\n\x04\x64\x61ta\x18\x04 \x01(\x0cH\x03\x88\x01\x01\x42\r\n\x0b_dataset_idB\r\n\x0b_size_bytesB\t\n\x07_offsetB\x07\n\x05_data\"\xcc\x01\n\x15IngestDatasetResponse\x12*\n\x06status\x18\x01 \x01(\x0e\x32\x15.DatasetCommandResultH\x00\x88\x01\x01\x12\x17\n\ndataset_id\x18\x02 \x01(\tH\x01\x88\x01\x01\x12\x16\n\tworker_id\x18\x03 \x01(\tH\x02\x88\x01\x01\x12\x1b\n\x0ereceived_bytes\x18\x04 \x01(\x03H\x03\x88\x01\x01\x42\t\n\x07_statusB\r\n\x0b_dataset_idB\x0c\n\n_worker_idB\x11\n\x0f_received_bytes\"e\n\x13PlaceDatasetRequest\x12\x17\n\ndataset_id\x18\x01 \x01(\tH\x00\x88\x01\x01\x12\x17\n\nsize_bytes\x18\x02 \x01(\x03H\x01\x88\x01\x01\x42\r\n\x0b_dataset_idB\r\n\x0b_size_bytes\"A\n\x14\x44\x61tasetBatchResponse\x12)\n\x08\x64\x61tasets\x18\x01 \x03(\x0b\x32\x17.DatasetCommandResponse\"V\n\x14PlaceDatasetResponse\x12\x16\n\tworker_id\x18\x01 \x01(\tH\x00\x88\x01\x01\x12\x10\n\x03url\x18\x02 \x01(\tH\x01\x88\x01\x01\x42\x0c\n\n_worker_idB\x06\n\x04_url\"\x85\x02\n\x0fWorkerResources\x12\x11\n\x04\x63pus\x18\x01 \x01(\x05H\x00\x88\x01\x01\x12\x16\n\tmemory_mb\x18\x02 \x01(\x01H\x01\x88\x01\x01\x12 \n\x13\x61vailable_memory_mb\x18\x03 \x01(\x01H\x02\x88\x01\x01\x12\x13\n\x06shm_mb\x18\x04 \x01(\x01H\x03\x88\x01\x01\x12\x1d\n\x10\x61vailable_shm_mb\x18\x05 \x01(\x01H\x04\x88\x01\x01\x12\x15\n\x08\x63pu_load\x18\x06 \x01(\x01H\x05\x88\x01\x01\x42\x07\n\x05_cpusB\x0c\n\n_memory_mbB\x16\n\x14_available_memory_mbB\t\n\x07_shm_mbB\x13\n\x11_available_shm_mbB\x0b\n\t_cpu_load\"i\n\x15RegisterWorkerRequest\x12\x10\n\x03url\x18\x01 \x01(\tH\x00\x88\x01\x01\x12(\n\tresources\x18\x02 \x01(\x0b\x32\x10.WorkerResourcesH\x01\x88\x01\x01\x42\x06\n\x04_urlB\x0c\n\n_resources\"\xdc\x01\n\x13UpdateWorkerRequest\x12\x16\n\tworker_id\x18\x01 \x01(\tH\x00\x88\x01\x01\x12(\n\tresources\x18\x02 \x01(\x0b\x32\x10.WorkerResourcesH\x01\x88\x01\x01\x12\x14\n\x0crunning_jobs\x18\x03 \x03(\t\x12)\n\x08\x64\x61tasets\x18\x04 \x03(\x0b\x32\x17.DatasetCommandResponse\x12\x17\n\ninterval_s\x18\x05 \x01(\x01H\x02\x88\x01\x01\x42\x0c\n\n_worker_idB\x0c\n\n_resourcesB\r\n\x0b_interval_s\">\n\x16RegisterWorkerResponse\x12\x16\n\tworker_id\x18\x01 \x01(\tH\x00\x88\x01\x01\x42\x0c\n\n_worker_id*1\n\x0cServerStatus\x12\x19\n\x15UNKNOWN_SERVER_STATUS\x10\x00\x12\x06\n\x02OK\x10\x01*\xb8\x01\n\tJobStatus\x12\x16\n\x12UNKNOWN_JOB_STATUS\x10\x00\x12\x18\n\x14\x43OORDINATOR_ACCEPTED\x10\x01\x12\x19\n\x15\x43OORDINATOR_SCHEDULED\x10\x02\x12\x15\n\x11\x43OORDINATOR_ERROR\x10\x03\x12\x13\n\x0fWORKER_ACCEPTED\x10\n\x12\x12\n\x0eWORKER_RUNNING\x10\x0b\x12\x10\n\x0cWORKER_ERROR\x10\x0c\x12\x0c\n\x08\x46INISHED\x10\x14*\xa1\x01\n\x14\x44\x61tasetCommandResult\x12\x1a\n\x16UNKNOWN_DATASET_STATUS\x10\x00\x12\x15\n\x11\x44\x41TASET_NOT_FOUND\x10\x01\x12\x15\n\x11\x44\x41TASET_NOT_READY\x10\x02\x12\x15\n\x11\x44\x41TASET_AVAILABLE\x10\x03\x12\x13\n\x0f\x44\x41TASET_DROPPED\x10\x04\x12\x13\n\x0f\x44\x41TASET_INVALID\x10\x05\x32\xbf\x05\n\nGnoschBase\x12%\n\x04Ping\x12\x0c.PingRequest\x1a\r.PingResponse\"\x00\x12\x45\n\x0e\x44\x61tasetCommand\x12\x16.DatasetCommandRequest\x1a\x17.DatasetCommandResponse\"\x00\x30\x01\x12.\n\tJobCreate\x12\x11.JobCreateRequest\x1a\x0c.JobResponse\"\x00\x12.\n\tJobStatus\x12\x11.JobStatusRequest\x1a\x0c.JobResponse\"\x00\x12=\n\x0eJobCreateBatch\x12\x16.JobCreateBatchRequest\x1a\x11.JobBatchResponse\"\x00\x12=\n\x0eJobStatusBatch\x12\x16.JobStatusBatchRequest\x1a\x11.JobBatchResponse\"\x00\x12=\n\x0c\x44\x61tasetBatch\x12\x14.DatasetBatchRequest\x1a\x15.DatasetBatchResponse\"\x00\x12\x30\n\tWatchJobs\x12\x11.WatchJobsRequest\x1a\x0c.JobResponse\"\x00\x30\x01\x12\x38\n\x0bSubmitGraph\x12\x13.SubmitGraphRequest\x1a\x10.GraphTaskStatus\"\x00\x30\x01\x12?\n\x0c\x46\x65tchDataset\x12\x14.FetchDatasetRequest\x1a\x17.DatasetCommandResponse\"\x00\x12:\n\rIngestDataset\x12\r.DatasetBlock\x1a\x16.IngestDatasetResponse\"\x00(\x01\x12=\n\x0cPlaceDataset\x12\x14.PlaceDatasetRequest\x1a\x15.PlaceDatasetResponse\"\x00\x32\xfe\x01\n\x10GnoschController\x12\x43\n\x0eRegisterWorker\x12\x16.RegisterWorkerRequest\x1a\x17.RegisterWorkerResponse\"\x00\x12;\n\x0fRegisterDataset\x12\x17.DatasetCommandResponse\x1a\r.PingResponse\"\x00\x12\x35\n\x0cUpdateWorker\x12\x14.UpdateWorkerRequest\x1a\r.PingResponse\"\x00\x12\x31\n\nUpdateJobs\x12\x12.UpdateJobsRequest\x1a\r.PingResponse\"\x00\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'gnosch.api.gnosch_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_GRAPHTASK_OUTPUTSMBENTRY']._loaded_options = None
+  _globals['_GRAPHTASK_OUTPUTSMBENTRY']._serialized_options = b'8\001'
+  _globals['_SUBMITGRAPHREQUEST_TASKSENTRY']._loaded_options = None
+  _globals['_SUBMITGRAPHREQUEST_TASKSENTRY']._serialized_options = b'8\001'
+  _globals['_SERVERSTATUS']._serialized_start=3568
+  _globals['_SERVERSTATUS']._serialized_end=3617
+  _globals['_JOBSTATUS']._serialized_start=3620
+  _globals['_JOBSTATUS']._serialized_end=3804
+  _globals['_DATASETCOMMANDRESULT']._serialized_start=3807
+  _globals['_DATASETCOMMANDRESULT']._serialized_end=3968
+  _globals['_PINGREQUEST']._serialized_start=27
+  _globals['_PINGREQUEST']._serialized_end=40
+  _globals['_PINGRESPONSE']._serialized_start=42
+  _globals['_PINGRESPONSE']._serialized_end=103
+  _globals['_JOBRESPONSE']._serialized_start=106
+  _globals['_JOBRESPONSE']._serialized_end=279
+  _globals['_JOBSPEC']._serialized_start=281
+  _globals['_JOBSPEC']._serialized_end=358
+  _globals['_JOBCREATEREQUEST']._serialized_start=361
+  _globals['_JOBCREATEREQUEST']._serialized_end=539
+  _globals['_JOBSTATUSREQUEST']._serialized_start=541
+  _globals['_JOBSTATUSREQUEST']._serialized_end=591
+  _globals['_JOBCREATEBATCHREQUEST']._serialized_start=593
+  _globals['_JOBCREATEBATCHREQUEST']._serialized_end=649
+  _globals['_JOBSTATUSBATCHREQUEST']._serialized_start=651
+  _globals['_JOBSTATUSBATCHREQUEST']._serialized_end=691
+  _globals['_JOBBATCHRESPONSE']._serialized_start=693
+  _globals['_JOBBATCHRESPONSE']._serialized_end=739
+  _globals['_WATCHJOBSREQUEST']._serialized_start=741
+  _globals['_WATCHJOBSREQUEST']._serialized_end=776
+  _globals['_GRAPHTASK']._serialized_start=779
+  _globals['_GRAPHTASK']._serialized_end=1093
+  _globals['_GRAPHTASK_OUTPUTSMBENTRY']._serialized_start=980
+  _globals['_GRAPHTASK_OUTPUTSMBENTRY']._serialized_end=1028
+  _globals['_SUBMITGRAPHREQUEST']._serialized_start=1095
+  _globals['_SUBMITGRAPHREQUEST']._serialized_end=1220
+  _globals['_SUBMITGRAPHREQUEST_TASKSENTRY']._serialized_start=1164
+  _globals['_SUBMITGRAPHREQUEST_TASKSENTRY']._serialized_end=1220
+  _globals['_GRAPHTASKSTATUS']._serialized_start=1222
+  _globals['_GRAPHTASKSTATUS']._serialized_end=1313
+  _globals['_UPDATEJOBSREQUEST']._serialized_start=1315
+  _globals['_UPDATEJOBSREQUEST']._serialized_end=1400
+  _globals['_DATASETCOMMANDREQUEST']._serialized_start=1403
+  _globals['_DATASETCOMMANDREQUEST']._serialized_end=1698
+  _globals['_DATASETBATCHREQUEST']._serialized_start=1700
+  _globals['_DATASETBATCHREQUEST']._serialized_end=1770
+  _globals['_DATASETCOMMANDRESPONSE']._serialized_start=1773
+  _globals['_DATASETCOMMANDRESPONSE']._serialized_end=2094
+  _globals['_FETCHDATASETREQUEST']._serialized_start=2097
+  _globals['_FETCHDATASETREQUEST']._serialized_end=2286
+  _globals['_DATASETBLOCK']._serialized_start=2289
+  _globals['_DATASETBLOCK']._serialized_end=2443
+  _globals['_INGESTDATASETRESPONSE']._serialized_start=2446
+  _globals['_INGESTDATASETRESPONSE']._serialized_end=2650
+  _globals['_PLACEDATASETREQUEST']._serialized_start=2652
+  _globals['_PLACEDATASETREQUEST']._serialized_end=2753
+  _globals['_DATASETBATCHRESPONSE']._serialized_start=2755
+  _globals['_DATASETBATCHRESPONSE']._serialized_end=2820
+  _globals['_PLACEDATASETRESPONSE']._serialized_start=2822
+  _globals['_PLACEDATASETRESPONSE']._serialized_end=2908
+  _globals['_WORKERRESOURCES']._serialized_start=2911
+  _globals['_WORKERRESOURCES']._serialized_end=3172
+  _globals['_REGISTERWORKERREQUEST']._serialized_start=3174
+  _globals['_REGISTERWORKERREQUEST']._serialized_end=3279
+  _globals['_UPDATEWORKERREQUEST']._serialized_start=3282
+  _globals['_UPDATEWORKERREQUEST']._serialized_end=3502
+  _globals['_REGISTERWORKERRESPONSE']._serialized_start=3504
+  _globals['_REGISTERWORKERRESPONSE']._serialized_end=3566
+  _globals['_GNOSCHBASE']._serialized_start=3971
+  _globals['_GNOSCHBASE']._serialized_end=4674
+  _globals['_GNOSCHCONTROLLER']._serialized_start=4677
+  _globals['_GNOSCHCONTROLLER']._serialized_end=4931
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,327 @@
+from google.protobuf.internal import containers as _containers
+from google.protobuf.internal import enum_type_wrapper as _enum_type_wrapper
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import message as _message
+from collections.abc import Iterable as _Iterable, Mapping as _Mapping
+from typing import ClassVar as _ClassVar, Optional as _Optional, Union as _Union
+
+DESCRIPTOR: _descriptor.FileDescriptor
+
+class ServerStatus(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+    __slots__ = ()
+    UNKNOWN_SERVER_STATUS: _ClassVar[ServerStatus]
+    OK: _ClassVar[ServerStatus]
+
+class JobStatus(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+    __slots__ = ()
+    UNKNOWN_JOB_STATUS: _ClassVar[JobStatus]
+    COORDINATOR_ACCEPTED: _ClassVar[JobStatus]
+    COORDINATOR_SCHEDULED: _ClassVar[JobStatus]
+    COORDINATOR_ERROR: _ClassVar[JobStatus]
+    WORKER_ACCEPTED: _ClassVar[JobStatus]
+    WORKER_RUNNING: _ClassVar[JobStatus]
+    WORKER_ERROR: _ClassVar[JobStatus]
+    FINISHED: _ClassVar[JobStatus]
+
+class DatasetCommandResult(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+    __slots__ = ()
+    UNKNOWN_DATASET_STATUS: _ClassVar[DatasetCommandResult]
+    DATASET_NOT_FOUND: _ClassVar[DatasetCommandResult]
+    DATASET_NOT_READY: _ClassVar[DatasetCommandResult]
+    DATASET_AVAILABLE: _ClassVar[DatasetCommandResult]
+    DATASET_DROPPED: _ClassVar[DatasetCommandResult]
+    DATASET_INVALID: _ClassVar[DatasetCommandResult]
+UNKNOWN_SERVER_STATUS: ServerStatus
+OK: ServerStatus
+UNKNOWN_JOB_STATUS: JobStatus
+COORDINATOR_ACCEPTED: JobStatus
+COORDINATOR_SCHEDULED: JobStatus
+COORDINATOR_ERROR: JobStatus
+WORKER_ACCEPTED: JobStatus
+WORKER_RUNNING: JobStatus
+WORKER_ERROR: JobStatus
+FINISHED: JobStatus
+UNKNOWN_DATASET_STATUS: DatasetCommandResult
+DATASET_NOT_FOUND: DatasetCommandResult
+DATASET_NOT_READY: DatasetCommandResult
+DATASET_AVAILABLE: DatasetCommandResult
+DATASET_DROPPED: DatasetCommandResult
+DATASET_INVALID: DatasetCommandResult
+
+class PingRequest(_message.Message):
+    __slots__ = ()
+    def __init__(self) -> None: ...
+
+class PingResponse(_message.Message):
+    __slots__ = ("status",)
+    STATUS_FIELD_NUMBER: _ClassVar[int]
+    status: ServerStatus
+    def __init__(self, status: _Optional[_Union[ServerStatus, str]] = ...) -> None: ...
+
+class JobResponse(_message.Message):
+    __slots__ = ("job_id", "job_status", "worker_id", "exit_code")
+    JOB_ID_FIELD_NUMBER: _ClassVar[int]
+    JOB_STATUS_FIELD_NUMBER: _ClassVar[int]
+    WORKER_ID_FIELD_NUMBER: _ClassVar[int]
+    EXIT_CODE_FIELD_NUMBER: _ClassVar[int]
+    job_id: str
+    job_status: JobStatus
+    worker_id: str
+    exit_code: int
+    def __init__(self, job_id: _Optional[str] = ..., job_status: _Optional[_Union[JobStatus, str]] = ..., worker_id: _Optional[str] = ..., exit_code: _Optional[int] = ...) -> None: ...
+
+class JobSpec(_message.Message):
+    __slots__ = ("entrypoint", "args")
+    ENTRYPOINT_FIELD_NUMBER: _ClassVar[int]
+    ARGS_FIELD_NUMBER: _ClassVar[int]
+    entrypoint: str
+    args: bytes
+    def __init__(self, entrypoint: _Optional[str] = ..., args: _Optional[bytes] = ...) -> None: ...
+
+class JobCreateRequest(_message.Message):
+    __slots__ = ("definition", "spec", "memory_mb", "inputs", "cpus")
+    DEFINITION_FIELD_NUMBER: _ClassVar[int]
+    SPEC_FIELD_NUMBER: _ClassVar[int]
+    MEMORY_MB_FIELD_NUMBER: _ClassVar[int]
+    INPUTS_FIELD_NUMBER: _ClassVar[int]
+    CPUS_FIELD_NUMBER: _ClassVar[int]
+    definition: str
+    spec: JobSpec
+    memory_mb: int
+    inputs: _containers.RepeatedScalarFieldContainer[str]
+    cpus: int
+    def __init__(self, definition: _Optional[str] = ..., spec: _Optional[_Union[JobSpec, _Mapping]] = ..., memory_mb: _Optional[int] = ..., inputs: _Optional[_Iterable[str]] = ..., cpus: _Optional[int] = ...) -> None: ...
+
+class JobStatusRequest(_message.Message):
+    __slots__ = ("job_id",)
+    JOB_ID_FIELD_NUMBER: _ClassVar[int]
+    job_id: str
+    def __init__(self, job_id: _Optional[str] = ...) -> None: ...
+
+class JobCreateBatchRequest(_message.Message):
+    __slots__ = ("jobs",)
+    JOBS_FIELD_NUMBER: _ClassVar[int]
+    jobs: _containers.RepeatedCompositeFieldContainer[JobCreateRequest]
+    def __init__(self, jobs: _Optional[_Iterable[_Union[JobCreateRequest, _Mapping]]] = ...) -> None: ...
+
+class JobStatusBatchRequest(_message.Message):
+    __slots__ = ("job_ids",)
+    JOB_IDS_FIELD_NUMBER: _ClassVar[int]
+    job_ids: _containers.RepeatedScalarFieldContainer[str]
+    def __init__(self, job_ids: _Optional[_Iterable[str]] = ...) -> None: ...
+
+class JobBatchResponse(_message.Message):
+    __slots__ = ("jobs",)
+    JOBS_FIELD_NUMBER: _ClassVar[int]
+    jobs: _containers.RepeatedCompositeFieldContainer[JobResponse]
+    def __init__(self, jobs: _Optional[_Iterable[_Union[JobResponse, _Mapping]]] = ...) -> None: ...
+
+class WatchJobsRequest(_message.Message):
+    __slots__ = ("job_ids",)
+    JOB_IDS_FIELD_NUMBER: _ClassVar[int]
+    job_ids: _containers.RepeatedScalarFieldContainer[str]
+    def __init__(self, job_ids: _Optional[_Iterable[str]] = ...) -> None: ...
+
+class GraphTask(_message.Message):
+    __slots__ = ("inputs", "outputs_mb", "memory_mb", "cpus", "runtime_est_s", "definition", "spec")
+    class OutputsMbEntry(_message.Message):
+        __slots__ = ("key", "value")
+        KEY_FIELD_NUMBER: _ClassVar[int]
+        VALUE_FIELD_NUMBER: _ClassVar[int]
+        key: str
+        value: int
+        def __init__(self, key: _Optional[str] = ..., value: _Optional[int] = ...) -> None: ...
+    INPUTS_FIELD_NUMBER: _ClassVar[int]
+    OUTPUTS_MB_FIELD_NUMBER: _ClassVar[int]
+    MEMORY_MB_FIELD_NUMBER: _ClassVar[int]
+    CPUS_FIELD_NUMBER: _ClassVar[int]
+    RUNTIME_EST_S_FIELD_NUMBER: _ClassVar[int]
+    DEFINITION_FIELD_NUMBER: _ClassVar[int]
+    SPEC_FIELD_NUMBER: _ClassVar[int]
+    inputs: _containers.RepeatedScalarFieldContainer[str]
+    outputs_mb: _containers.ScalarMap[str, int]
+    memory_mb: int
+    cpus: int
+    runtime_est_s: int
+    definition: str
+    spec: JobSpec
+    def __init__(self, inputs: _Optional[_Iterable[str]] = ..., outputs_mb: _Optional[_Mapping[str, int]] = ..., memory_mb: _Optional[int] = ..., cpus: _Optional[int] = ..., runtime_est_s: _Optional[int] = ..., definition: _Optional[str] = ..., spec: _Optional[_Union[JobSpec, _Mapping]] = ...) -> None: ...
+
+class SubmitGraphRequest(_message.Message):
+    __slots__ = ("tasks",)
+    class TasksEntry(_message.Message):
+        __slots__ = ("key", "value")
+        KEY_FIELD_NUMBER: _ClassVar[int]
+        VALUE_FIELD_NUMBER: _ClassVar[int]
+        key: str
+        value: GraphTask
+        def __init__(self, key: _Optional[str] = ..., value: _Optional[_Union[GraphTask, _Mapping]] = ...) -> None: ...
+    TASKS_FIELD_NUMBER: _ClassVar[int]
+    tasks: _containers.MessageMap[str, GraphTask]
+    def __init__(self, tasks: _Optional[_Mapping[str, GraphTask]] = ...) -> None: ...
+
+class GraphTaskStatus(_message.Message):
+    __slots__ = ("task_id", "job")
+    TASK_ID_FIELD_NUMBER: _ClassVar[int]
+    JOB_FIELD_NUMBER: _ClassVar[int]
+    task_id: str
+    job: JobResponse
+    def __init__(self, task_id: _Optional[str] = ..., job: _Optional[_Union[JobResponse, _Mapping]] = ...) -> None: ...
+
+class UpdateJobsRequest(_message.Message):
+    __slots__ = ("worker_id", "jobs")
+    WORKER_ID_FIELD_NUMBER: _ClassVar[int]
+    JOBS_FIELD_NUMBER: _ClassVar[int]
+    worker_id: str
+    jobs: _containers.RepeatedCompositeFieldContainer[JobResponse]
+    def __init__(self, worker_id: _Optional[str] = ..., jobs: _Optional[_Iterable[_Union[JobResponse, _Mapping]]] = ...) -> None: ...
+
+class DatasetCommandRequest(_message.Message):
+    __slots__ = ("dataset_id", "retrieve", "drop", "block_size_hint", "offset", "length", "codecs", "link_mbps")
+    DATASET_ID_FIELD_NUMBER: _ClassVar[int]
+    RETRIEVE_FIELD_NUMBER: _ClassVar[int]
+    DROP_FIELD_NUMBER: _ClassVar[int]
+    BLOCK_SIZE_HINT_FIELD_NUMBER: _ClassVar[int]
+    OFFSET_FIELD_NUMBER: _ClassVar[int]
+    LENGTH_FIELD_NUMBER: _ClassVar[int]
+    CODECS_FIELD_NUMBER: _ClassVar[int]
+    LINK_MBPS_FIELD_NUMBER: _ClassVar[int]
+    dataset_id: str
+    retrieve: bool
+    drop: bool
+    block_size_hint: int
+    offset: int
+    length: int
+    codecs: _containers.RepeatedScalarFieldContainer[str]
+    link_mbps: float
+    def __init__(self, dataset_id: _Optional[str] = ..., retrieve: _Optional[bool] = ..., drop: _Optional[bool] = ..., block_size_hint: _Optional[int] = ..., offset: _Optional[int] = ..., length: _Optional[int] = ..., codecs: _Optional[_Iterable[str]] = ..., link_mbps: _Optional[float] = ...) -> None: ...
+
+class DatasetBatchRequest(_message.Message):
+    __slots__ = ("dataset_ids", "drop")
+    DATASET_IDS_FIELD_NUMBER: _ClassVar[int]
+    DROP_FIELD_NUMBER: _ClassVar[int]
+    dataset_ids: _containers.RepeatedScalarFieldContainer[str]
+    drop: bool
+    def __init__(self, dataset_ids: _Optional[_Iterable[str]] = ..., drop: _Optional[bool] = ...) -> None: ...
+
+class DatasetCommandResponse(_message.Message):
+    __slots__ = ("status", "dataset_id", "worker_id", "data", "size_bytes", "offset", "codec", "codec_s")
+    STATUS_FIELD_NUMBER: _ClassVar[int]
+    DATASET_ID_FIELD_NUMBER: _ClassVar[int]
+    WORKER_ID_FIELD_NUMBER: _ClassVar[int]
+    DATA_FIELD_NUMBER: _ClassVar[int]
+    SIZE_BYTES_FIELD_NUMBER: _ClassVar[int]
+    OFFSET_FIELD_NUMBER: _ClassVar[int]
+    CODEC_FIELD_NUMBER: _ClassVar[int]
+    CODEC_S_FIELD_NUMBER: _ClassVar[int]
+    status: DatasetCommandResult
+    dataset_id: str
+    worker_id: str
+    data: bytes
+    size_bytes: int
+    offset: int
+    codec: str
+    codec_s: float
+    def __init__(self, status: _Optional[_Union[DatasetCommandResult, str]] = ..., dataset_id: _Optional[str] = ..., worker_id: _Optional[str] = ..., data: _Optional[bytes] = ..., size_bytes: _Optional[int] = ..., offset: _Optional[int] = ..., codec: _Optional[str] = ..., codec_s: _Optional[float] = ...) -> None: ...
+
+class FetchDatasetRequest(_message.Message):
+    __slots__ = ("dataset_id", "source_url", "block_size_hint", "link_mbps")
+    DATASET_ID_FIELD_NUMBER: _ClassVar[int]
+    SOURCE_URL_FIELD_NUMBER: _ClassVar[int]
+    BLOCK_SIZE_HINT_FIELD_NUMBER: _ClassVar[int]
+    LINK_MBPS_FIELD_NUMBER: _ClassVar[int]
+    dataset_id: str
+    source_url: str
+    block_size_hint: int
+    link_mbps: float
+    def __init__(self, dataset_id: _Optional[str] = ..., source_url: _Optional[str] = ..., block_size_hint: _Optional[int] = ..., link_mbps: _Optional[float] = ...) -> None: ...
+
+class DatasetBlock(_message.Message):
+    __slots__ = ("dataset_id", "size_bytes", "offset", "data")
+    DATASET_ID_FIELD_NUMBER: _ClassVar[int]
+    SIZE_BYTES_FIELD_NUMBER: _ClassVar[int]
+    OFFSET_FIELD_NUMBER: _ClassVar[int]
+    DATA_FIELD_NUMBER: _ClassVar[int]
+    dataset_id: str
+    size_bytes: int
+    offset: int
+    data: bytes
+    def __init__(self, dataset_id: _Optional[str] = ..., size_bytes: _Optional[int] = ..., offset: _Optional[int] = ..., data: _Optional[bytes] = ...) -> None: ...
+
+class IngestDatasetResponse(_message.Message):
+    __slots__ = ("status", "dataset_id", "worker_id", "received_bytes")
+    STATUS_FIELD_NUMBER: _ClassVar[int]
+    DATASET_ID_FIELD_NUMBER: _ClassVar[int]
+    WORKER_ID_FIELD_NUMBER: _ClassVar[int]
+    RECEIVED_BYTES_FIELD_NUMBER: _ClassVar[int]
+    status: DatasetCommandResult
+    dataset_id: str
+    worker_id: str
+    received_bytes: int
+    def __init__(self, status: _Optional[_Union[DatasetCommandResult, str]] = ..., dataset_id: _Optional[str] = ..., worker_id: _Optional[str] = ..., received_bytes: _Optional[int] = ...) -> None: ...
+
+class PlaceDatasetRequest(_message.Message):
+    __slots__ = ("dataset_id", "size_bytes")
+    DATASET_ID_FIELD_NUMBER: _ClassVar[int]
+    SIZE_BYTES_FIELD_NUMBER: _ClassVar[int]
+    dataset_id: str
+    size_bytes: int
+    def __init__(self, dataset_id: _Optional[str] = ..., size_bytes: _Optional[int] = ...) -> None: ...
+
+class DatasetBatchResponse(_message.Message):
+    __slots__ = ("datasets",)
+    DATASETS_FIELD_NUMBER: _ClassVar[int]
+    datasets: _containers.RepeatedCompositeFieldContainer[DatasetCommandResponse]
+    def __init__(self, datasets: _Optional[_Iterable[_Union[DatasetCommandResponse, _Mapping]]] = ...) -> None: ...
+
+class PlaceDatasetResponse(_message.Message):
+    __slots__ = ("worker_id", "url")
+    WORKER_ID_FIELD_NUMBER: _ClassVar[int]
+    URL_FIELD_NUMBER: _ClassVar[int]
+    worker_id: str
+    url: str
+    def __init__(self, worker_id: _Optional[str] = ..., url: _Optional[str] = ...) -> None: ...
+
+class WorkerResources(_message.Message):
+    __slots__ = ("cpus", "memory_mb", "available_memory_mb", "shm_mb", "available_shm_mb", "cpu_load")
+    CPUS_FIELD_NUMBER: _ClassVar[int]
+    MEMORY_MB_FIELD_NUMBER: _ClassVar[int]
+    AVAILABLE_MEMORY_MB_FIELD_NUMBER: _ClassVar[int]
+    SHM_MB_FIELD_NUMBER: _ClassVar[int]
+    AVAILABLE_SHM_MB_FIELD_NUMBER: _ClassVar[int]
+    CPU_LOAD_FIELD_NUMBER: _ClassVar[int]
+    cpus: int
+    memory_mb: float
+    available_memory_mb: float
+    shm_mb: float
+    available_shm_mb: float
+    cpu_load: float
+    def __init__(self, cpus: _Optional[int] = ..., memory_mb: _Optional[float] = ..., available_memory_mb: _Optional[float] = ..., shm_mb: _Optional[float] = ..., available_shm_mb: _Optional[float] = ..., cpu_load: _Optional[float] = ...) -> None: ...
+
+class RegisterWorkerRequest(_message.Message):
+    __slots__ = ("url", "resources")
+    URL_FIELD_NUMBER: _ClassVar[int]
+    RESOURCES_FIELD_NUMBER: _ClassVar[int]
+    url: str
+    resources: WorkerResources
+    def __init__(self, url: _Optional[str] = ..., resources: _Optional[_Union[WorkerResources, _Mapping]] = ...) -> None: ...
+
+class UpdateWorkerRequest(_message.Message):
+    __slots__ = ("worker_id", "resources", "running_jobs", "datasets", "interval_s")
+    WORKER_ID_FIELD_NUMBER: _ClassVar[int]
+    RESOURCES_FIELD_NUMBER: _ClassVar[int]
+    RUNNING_JOBS_FIELD_NUMBER: _ClassVar[int]
+    DATASETS_FIELD_NUMBER: _ClassVar[int]
+    INTERVAL_S_FIELD_NUMBER: _ClassVar[int]
+    worker_id: str
+    resources: WorkerResources
+    running_jobs: _containers.RepeatedScalarFieldContainer[str]
+    datasets: _containers.RepeatedCompositeFieldContainer[DatasetCommandResponse]
+    interval_s: float
+    def __init__(self, worker_id: _Optional[str] = ..., resources: _Optional[_Union[WorkerResources, _Mapping]] = ..., running_jobs: _Optional[_Iterable[str]] = ..., datasets: _Optional[_Iterable[_Union[DatasetCommandResponse, _Mapping]]] = ..., interval_s: _Optional[float] = ...) -> None: ...
+
+class RegisterWorkerResponse(_message.Message):
+    __slots__ = ("worker_id",)
+    WORKER_ID_FIELD_NUMBER: _ClassVar[int]
+    worker_id: str
+    def __init__(self, worker_id: _Optional[str] = ...) -> None: ...
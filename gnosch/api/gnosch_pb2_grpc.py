@@ -0,0 +1,778 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+from gnosch.api import gnosch_pb2 as gnosch_dot_api_dot_gnosch__pb2
+
+GRPC_GENERATED_VERSION = '1.84.0'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + ' but the generated code in gnosch/api/gnosch_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class GnoschBaseStub:
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.Ping = channel.unary_unary(
+                '/GnoschBase/Ping',
+                request_serializer=gnosch_dot_api_dot_gnosch__pb2.PingRequest.SerializeToString,
+                response_deserializer=gnosch_dot_api_dot_gnosch__pb2.PingResponse.FromString,
+                _registered_method=True)
+        self.DatasetCommand = channel.unary_stream(
+                '/GnoschBase/DatasetCommand',
+                request_serializer=gnosch_dot_api_dot_gnosch__pb2.DatasetCommandRequest.SerializeToString,
+                response_deserializer=gnosch_dot_api_dot_gnosch__pb2.DatasetCommandResponse.FromString,
+                _registered_method=True)
+        self.JobCreate = channel.unary_unary(
+                '/GnoschBase/JobCreate',
+                request_serializer=gnosch_dot_api_dot_gnosch__pb2.JobCreateRequest.SerializeToString,
+                response_deserializer=gnosch_dot_api_dot_gnosch__pb2.JobResponse.FromString,
+                _registered_method=True)
+        self.JobStatus = channel.unary_unary(
+                '/GnoschBase/JobStatus',
+                request_serializer=gnosch_dot_api_dot_gnosch__pb2.JobStatusRequest.SerializeToString,
+                response_deserializer=gnosch_dot_api_dot_gnosch__pb2.JobResponse.FromString,
+                _registered_method=True)
+        self.JobCreateBatch = channel.unary_unary(
+                '/GnoschBase/JobCreateBatch',
+                request_serializer=gnosch_dot_api_dot_gnosch__pb2.JobCreateBatchRequest.SerializeToString,
+                response_deserializer=gnosch_dot_api_dot_gnosch__pb2.JobBatchResponse.FromString,
+                _registered_method=True)
+        self.JobStatusBatch = channel.unary_unary(
+                '/GnoschBase/JobStatusBatch',
+                request_serializer=gnosch_dot_api_dot_gnosch__pb2.JobStatusBatchRequest.SerializeToString,
+                response_deserializer=gnosch_dot_api_dot_gnosch__pb2.JobBatchResponse.FromString,
+                _registered_method=True)
+        self.DatasetBatch = channel.unary_unary(
+                '/GnoschBase/DatasetBatch',
+                request_serializer=gnosch_dot_api_dot_gnosch__pb2.DatasetBatchRequest.SerializeToString,
+                response_deserializer=gnosch_dot_api_dot_gnosch__pb2.DatasetBatchResponse.FromString,
+                _registered_method=True)
+        self.WatchJobs = channel.unary_stream(
+                '/GnoschBase/WatchJobs',
+                request_serializer=gnosch_dot_api_dot_gnosch__pb2.WatchJobsRequest.SerializeToString,
+                response_deserializer=gnosch_dot_api_dot_gnosch__pb2.JobResponse.FromString,
+                _registered_method=True)
+        self.SubmitGraph = channel.unary_stream(
+                '/GnoschBase/SubmitGraph',
+                request_serializer=gnosch_dot_api_dot_gnosch__pb2.SubmitGraphRequest.SerializeToString,
+                response_deserializer=gnosch_dot_api_dot_gnosch__pb2.GraphTaskStatus.FromString,
+                _registered_method=True)
+        self.FetchDataset = channel.unary_unary(
+                '/GnoschBase/FetchDataset',
+                request_serializer=gnosch_dot_api_dot_gnosch__pb2.FetchDatasetRequest.SerializeToString,
+                response_deserializer=gnosch_dot_api_dot_gnosch__pb2.DatasetCommandResponse.FromString,
+                _registered_method=True)
+        self.IngestDataset = channel.stream_unary(
+                '/GnoschBase/IngestDataset',
+                request_serializer=gnosch_dot_api_dot_gnosch__pb2.DatasetBlock.SerializeToString,
+                response_deserializer=gnosch_dot_api_dot_gnosch__pb2.IngestDatasetResponse.FromString,
+                _registered_method=True)
+        self.PlaceDataset = channel.unary_unary(
+                '/GnoschBase/PlaceDataset',
+                request_serializer=gnosch_dot_api_dot_gnosch__pb2.PlaceDatasetRequest.SerializeToString,
+                response_deserializer=gnosch_dot_api_dot_gnosch__pb2.PlaceDatasetResponse.FromString,
+                _registered_method=True)
+
+
+class GnoschBaseServicer:
+    """Missing associated documentation comment in .proto file."""
+
+    def Ping(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def DatasetCommand(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def JobCreate(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def JobStatus(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def JobCreateBatch(self, request, context):
+        """the batched variants, each a single call for the many jobs or datasets
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def JobStatusBatch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def DatasetBatch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchJobs(self, request, context):
+        """served by the controller
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SubmitGraph(self, request, context):
+        """served by the controller, which schedules the graph and runs it, streaming the transitions of the tasks until all
+        are finished. Fails with ABORTED once a task fails or the schedule can't proceed
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def FetchDataset(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def IngestDataset(self, request_iterator, context):
+        """served by the workers, which the controller's PlaceDataset chooses
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def PlaceDataset(self, request, context):
+        """served by the controller
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_GnoschBaseServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'Ping': grpc.unary_unary_rpc_method_handler(
+                    servicer.Ping,
+                    request_deserializer=gnosch_dot_api_dot_gnosch__pb2.PingRequest.FromString,
+                    response_serializer=gnosch_dot_api_dot_gnosch__pb2.PingResponse.SerializeToString,
+            ),
+            'DatasetCommand': grpc.unary_stream_rpc_method_handler(
+                    servicer.DatasetCommand,
+                    request_deserializer=gnosch_dot_api_dot_gnosch__pb2.DatasetCommandRequest.FromString,
+                    response_serializer=gnosch_dot_api_dot_gnosch__pb2.DatasetCommandResponse.SerializeToString,
+            ),
+            'JobCreate': grpc.unary_unary_rpc_method_handler(
+                    servicer.JobCreate,
+                    request_deserializer=gnosch_dot_api_dot_gnosch__pb2.JobCreateRequest.FromString,
+                    response_serializer=gnosch_dot_api_dot_gnosch__pb2.JobResponse.SerializeToString,
+            ),
+            'JobStatus': grpc.unary_unary_rpc_method_handler(
+                    servicer.JobStatus,
+                    request_deserializer=gnosch_dot_api_dot_gnosch__pb2.JobStatusRequest.FromString,
+                    response_serializer=gnosch_dot_api_dot_gnosch__pb2.JobResponse.SerializeToString,
+            ),
+            'JobCreateBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.JobCreateBatch,
+                    request_deserializer=gnosch_dot_api_dot_gnosch__pb2.JobCreateBatchRequest.FromString,
+                    response_serializer=gnosch_dot_api_dot_gnosch__pb2.JobBatchResponse.SerializeToString,
+            ),
+            'JobStatusBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.JobStatusBatch,
+                    request_deserializer=gnosch_dot_api_dot_gnosch__pb2.JobStatusBatchRequest.FromString,
+                    response_serializer=gnosch_dot_api_dot_gnosch__pb2.JobBatchResponse.SerializeToString,
+            ),
+            'DatasetBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.DatasetBatch,
+                    request_deserializer=gnosch_dot_api_dot_gnosch__pb2.DatasetBatchRequest.FromString,
+                    response_serializer=gnosch_dot_api_dot_gnosch__pb2.DatasetBatchResponse.SerializeToString,
+            ),
+            'WatchJobs': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchJobs,
+                    request_deserializer=gnosch_dot_api_dot_gnosch__pb2.WatchJobsRequest.FromString,
+                    response_serializer=gnosch_dot_api_dot_gnosch__pb2.JobResponse.SerializeToString,
+            ),
+            'SubmitGraph': grpc.unary_stream_rpc_method_handler(
+                    servicer.SubmitGraph,
+                    request_deserializer=gnosch_dot_api_dot_gnosch__pb2.SubmitGraphRequest.FromString,
+                    response_serializer=gnosch_dot_api_dot_gnosch__pb2.GraphTaskStatus.SerializeToString,
+            ),
+            'FetchDataset': grpc.unary_unary_rpc_method_handler(
+                    servicer.FetchDataset,
+                    request_deserializer=gnosch_dot_api_dot_gnosch__pb2.FetchDatasetRequest.FromString,
+                    response_serializer=gnosch_dot_api_dot_gnosch__pb2.DatasetCommandResponse.SerializeToString,
+            ),
+            'IngestDataset': grpc.stream_unary_rpc_method_handler(
+                    servicer.IngestDataset,
+                    request_deserializer=gnosch_dot_api_dot_gnosch__pb2.DatasetBlock.FromString,
+                    response_serializer=gnosch_dot_api_dot_gnosch__pb2.IngestDatasetResponse.SerializeToString,
+            ),
+            'PlaceDataset': grpc.unary_unary_rpc_method_handler(
+                    servicer.PlaceDataset,
+                    request_deserializer=gnosch_dot_api_dot_gnosch__pb2.PlaceDatasetRequest.FromString,
+                    response_serializer=gnosch_dot_api_dot_gnosch__pb2.PlaceDatasetResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'GnoschBase', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('GnoschBase', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class GnoschBase:
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def Ping(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/GnoschBase/Ping',
+            gnosch_dot_api_dot_gnosch__pb2.PingRequest.SerializeToString,
+            gnosch_dot_api_dot_gnosch__pb2.PingResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def DatasetCommand(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/GnoschBase/DatasetCommand',
+            gnosch_dot_api_dot_gnosch__pb2.DatasetCommandRequest.SerializeToString,
+            gnosch_dot_api_dot_gnosch__pb2.DatasetCommandResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def JobCreate(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/GnoschBase/JobCreate',
+            gnosch_dot_api_dot_gnosch__pb2.JobCreateRequest.SerializeToString,
+            gnosch_dot_api_dot_gnosch__pb2.JobResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def JobStatus(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/GnoschBase/JobStatus',
+            gnosch_dot_api_dot_gnosch__pb2.JobStatusRequest.SerializeToString,
+            gnosch_dot_api_dot_gnosch__pb2.JobResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def JobCreateBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/GnoschBase/JobCreateBatch',
+            gnosch_dot_api_dot_gnosch__pb2.JobCreateBatchRequest.SerializeToString,
+            gnosch_dot_api_dot_gnosch__pb2.JobBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def JobStatusBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/GnoschBase/JobStatusBatch',
+            gnosch_dot_api_dot_gnosch__pb2.JobStatusBatchRequest.SerializeToString,
+            gnosch_dot_api_dot_gnosch__pb2.JobBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def DatasetBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/GnoschBase/DatasetBatch',
+            gnosch_dot_api_dot_gnosch__pb2.DatasetBatchRequest.SerializeToString,
+            gnosch_dot_api_dot_gnosch__pb2.DatasetBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def WatchJobs(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/GnoschBase/WatchJobs',
+            gnosch_dot_api_dot_gnosch__pb2.WatchJobsRequest.SerializeToString,
+            gnosch_dot_api_dot_gnosch__pb2.JobResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SubmitGraph(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/GnoschBase/SubmitGraph',
+            gnosch_dot_api_dot_gnosch__pb2.SubmitGraphRequest.SerializeToString,
+            gnosch_dot_api_dot_gnosch__pb2.GraphTaskStatus.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def FetchDataset(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/GnoschBase/FetchDataset',
+            gnosch_dot_api_dot_gnosch__pb2.FetchDatasetRequest.SerializeToString,
+            gnosch_dot_api_dot_gnosch__pb2.DatasetCommandResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def IngestDataset(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/GnoschBase/IngestDataset',
+            gnosch_dot_api_dot_gnosch__pb2.DatasetBlock.SerializeToString,
+            gnosch_dot_api_dot_gnosch__pb2.IngestDatasetResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def PlaceDataset(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/GnoschBase/PlaceDataset',
+            gnosch_dot_api_dot_gnosch__pb2.PlaceDatasetRequest.SerializeToString,
+            gnosch_dot_api_dot_gnosch__pb2.PlaceDatasetResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+
+class GnoschControllerStub:
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.RegisterWorker = channel.unary_unary(
+                '/GnoschController/RegisterWorker',
+                request_serializer=gnosch_dot_api_dot_gnosch__pb2.RegisterWorkerRequest.SerializeToString,
+                response_deserializer=gnosch_dot_api_dot_gnosch__pb2.RegisterWorkerResponse.FromString,
+                _registered_method=True)
+        self.RegisterDataset = channel.unary_unary(
+                '/GnoschController/RegisterDataset',
+                request_serializer=gnosch_dot_api_dot_gnosch__pb2.DatasetCommandResponse.SerializeToString,
+                response_deserializer=gnosch_dot_api_dot_gnosch__pb2.PingResponse.FromString,
+                _registered_method=True)
+        self.UpdateWorker = channel.unary_unary(
+                '/GnoschController/UpdateWorker',
+                request_serializer=gnosch_dot_api_dot_gnosch__pb2.UpdateWorkerRequest.SerializeToString,
+                response_deserializer=gnosch_dot_api_dot_gnosch__pb2.PingResponse.FromString,
+                _registered_method=True)
+        self.UpdateJobs = channel.unary_unary(
+                '/GnoschController/UpdateJobs',
+                request_serializer=gnosch_dot_api_dot_gnosch__pb2.UpdateJobsRequest.SerializeToString,
+                response_deserializer=gnosch_dot_api_dot_gnosch__pb2.PingResponse.FromString,
+                _registered_method=True)
+
+
+class GnoschControllerServicer:
+    """Missing associated documentation comment in .proto file."""
+
+    def RegisterWorker(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def RegisterDataset(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def UpdateWorker(self, request, context):
+        """the heartbeat of a registered worker, with its current state
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def UpdateJobs(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_GnoschControllerServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'RegisterWorker': grpc.unary_unary_rpc_method_handler(
+                    servicer.RegisterWorker,
+                    request_deserializer=gnosch_dot_api_dot_gnosch__pb2.RegisterWorkerRequest.FromString,
+                    response_serializer=gnosch_dot_api_dot_gnosch__pb2.RegisterWorkerResponse.SerializeToString,
+            ),
+            'RegisterDataset': grpc.unary_unary_rpc_method_handler(
+                    servicer.RegisterDataset,
+                    request_deserializer=gnosch_dot_api_dot_gnosch__pb2.DatasetCommandResponse.FromString,
+                    response_serializer=gnosch_dot_api_dot_gnosch__pb2.PingResponse.SerializeToString,
+            ),
+            'UpdateWorker': grpc.unary_unary_rpc_method_handler(
+                    servicer.UpdateWorker,
+                    request_deserializer=gnosch_dot_api_dot_gnosch__pb2.UpdateWorkerRequest.FromString,
+                    response_serializer=gnosch_dot_api_dot_gnosch__pb2.PingResponse.SerializeToString,
+            ),
+            'UpdateJobs': grpc.unary_unary_rpc_method_handler(
+                    servicer.UpdateJobs,
+                    request_deserializer=gnosch_dot_api_dot_gnosch__pb2.UpdateJobsRequest.FromString,
+                    response_serializer=gnosch_dot_api_dot_gnosch__pb2.PingResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'GnoschController', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('GnoschController', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class GnoschController:
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def RegisterWorker(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/GnoschController/RegisterWorker',
+            gnosch_dot_api_dot_gnosch__pb2.RegisterWorkerRequest.SerializeToString,
+            gnosch_dot_api_dot_gnosch__pb2.RegisterWorkerResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def RegisterDataset(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/GnoschController/RegisterDataset',
+            gnosch_dot_api_dot_gnosch__pb2.DatasetCommandResponse.SerializeToString,
+            gnosch_dot_api_dot_gnosch__pb2.PingResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def UpdateWorker(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/GnoschController/UpdateWorker',
+            gnosch_dot_api_dot_gnosch__pb2.UpdateWorkerRequest.SerializeToString,
+            gnosch_dot_api_dot_gnosch__pb2.PingResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def UpdateJobs(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/GnoschController/UpdateJobs',
+            gnosch_dot_api_dot_gnosch__pb2.UpdateJobsRequest.SerializeToString,
+            gnosch_dot_api_dot_gnosch__pb2.PingResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,51 @@
+"""
+Uploading of external data into the cluster -- the controller chooses the worker, which the data then
+streams to directly. Independent datasets can be ingested in parallel, eg, from a thread pool.
+"""
+
+import grpc
+import logging
+from typing import Any, Iterator, Union
+import gnosch.api.gnosch_pb2_grpc as services
+import gnosch.api.gnosch_pb2 as protos
+
+logger = logging.getLogger(__name__)
+
+# NOTE grpc limits the messages to 4MB by default
+default_block_size = 1 << 20
+
+
+def _blocks(dataset_id: str, data: memoryview, offset: int, block_size: int) -> Iterator[protos.DatasetBlock]:
+	yield protos.DatasetBlock(dataset_id=dataset_id, size_bytes=len(data), offset=offset, data=bytes(data[offset : offset + block_size]))
+	for i in range(offset + block_size, len(data), block_size):
+		yield protos.DatasetBlock(offset=i, data=bytes(data[i : i + block_size]))
+
+
+def ingest(controller: Any, dataset_id: str, data: Union[bytes, memoryview], block_size: int = default_block_size, retries: int = 3) -> str:
+	"""Uploads the data as the dataset, at the worker the controller (a GnoschBase stub) chooses. An interrupted
+	upload gets resumed from what the worker has received. Returns the worker id"""
+	data = memoryview(data).cast("B")
+	if not len(data):
+		raise ValueError(f"dataset {dataset_id} is empty")
+	target = controller.PlaceDataset(protos.PlaceDatasetRequest(dataset_id=dataset_id, size_bytes=len(data)))
+	with grpc.insecure_channel(target.url) as channel:
+		worker = services.GnoschBaseStub(channel)
+		offset, interrupted = 0, False
+		for attempt in range(retries + 1):
+			try:
+				if interrupted:
+					# an empty block just asks for what has been received
+					inquiry = protos.DatasetBlock(dataset_id=dataset_id, size_bytes=len(data), offset=0)
+					offset = worker.IngestDataset(iter([inquiry])).received_bytes
+				response = worker.IngestDataset(_blocks(dataset_id, data, offset, block_size))
+			except grpc.RpcError as e:
+				if attempt == retries:
+					raise
+				logger.warning(f"ingest of {dataset_id} to {target.url} interrupted: {e}")
+				interrupted = True
+				continue
+			interrupted = False
+			if response.status == protos.DatasetCommandResult.DATASET_AVAILABLE:
+				return response.worker_id
+			offset = response.received_bytes
+		raise ValueError(f"ingest of {dataset_id} to {target.url} incomplete after {retries} retries, at {offset} of {len(data)} bytes")
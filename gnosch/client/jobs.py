@@ -0,0 +1,19 @@
+"""
+Job specs, for JobCreateRequest.spec -- a call of a function instead of a python definition to exec.
+"""
+
+import pickle
+from typing import Any, Callable, Union
+import gnosch.api.gnosch_pb2 as protos
+
+
+def job_spec(entrypoint: Union[str, Callable], *args: Any, **kwargs: Any) -> protos.JobSpec:
+	"""The call of the entrypoint, "module:function" or a function importable at the workers by its module and
+	qualified name, with the arguments pickled"""
+	if not isinstance(entrypoint, str):
+		if "<" in entrypoint.__qualname__:
+			raise ValueError(f"{entrypoint.__qualname__} is not importable by its name")
+		entrypoint = f"{entrypoint.__module__}:{entrypoint.__qualname__}"
+	if ":" not in entrypoint:
+		raise ValueError(f"entrypoint not of the module:function form: {entrypoint}")
+	return protos.JobSpec(entrypoint=entrypoint, args=pickle.dumps((args, kwargs)) if args or kwargs else b"")
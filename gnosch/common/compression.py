@@ -0,0 +1,80 @@
+"""
+Compression of dataset blocks in transfer, with the codec chosen per transfer: by the throughput of the link, in
+MB/s as in ClusterSpec.comm_mbps, and by how well and fast a sample of the dataset compresses. Compression and
+decompression run pipelined with the transfer, so a transfer takes as long as the slowest of the three -- making
+compression pointless on fast links and the stronger codecs worth it on slow ones.
+"""
+
+import bz2
+import lzma
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Callable, Iterable, Union
+
+Buffer = Union[bytes, memoryview]
+
+none = "none"
+# NOTE [perf] consider lz4/zstd when available, these are just the stdlib ones
+codecs: dict[str, tuple[Callable[[Buffer], bytes], Callable[[bytes], bytes]]] = {
+	"zlib1": (lambda data: zlib.compress(data, 1), zlib.decompress),
+	"zlib6": (lambda data: zlib.compress(data, 6), zlib.decompress),
+	"bz2": (lambda data: bz2.compress(data, 9), bz2.decompress),
+	"lzma": (lambda data: lzma.compress(data, preset=1), lzma.decompress),
+}
+sample_size = 1 << 16
+# assumed when the requester doesn't know the link, about a 1Gbit ethernet
+default_link_mbps = 100.0
+# the fastest measured compression speeds -- a codec slower than the link can't pay off, no matter the ratio
+_compress_mbps: dict[str, float] = {}
+
+
+@dataclass
+class CodecEstimate:
+	codec: str
+	ratio: float
+	compress_mbps: float
+	decompress_mbps: float
+
+	def transfer_s(self, size_mb: float, link_mbps: float) -> float:
+		"""Of the pipelined compression, transfer and decompression"""
+		return size_mb * max(1 / self.compress_mbps, 1 / (self.ratio * link_mbps), 1 / self.decompress_mbps)
+
+
+def estimate(sample: Buffer, codec: str) -> CodecEstimate:
+	if codec == none:
+		return CodecEstimate(codec=none, ratio=1.0, compress_mbps=float("inf"), decompress_mbps=float("inf"))
+	compress, decompress = codecs[codec]
+	size_mb = max(len(sample), 1) / 1e6
+	start = time.perf_counter()
+	compressed = compress(sample)
+	compressed_at = time.perf_counter()
+	decompress(compressed)
+	end = time.perf_counter()
+	compress_mbps = size_mb / max(compressed_at - start, 1e-9)
+	_compress_mbps[codec] = max(compress_mbps, _compress_mbps.get(codec, 0.0))
+	return CodecEstimate(
+		codec=codec,
+		ratio=max(len(sample), 1) / max(len(compressed), 1),
+		compress_mbps=compress_mbps,
+		decompress_mbps=size_mb / max(end - compressed_at, 1e-9),
+	)
+
+
+def choose(sample: Buffer, link_mbps: float, accepted: Iterable[str]) -> str:
+	"""The accepted codec transferring the fastest, as estimated on the sample. Links faster than any codec
+	are decided without compressing anything"""
+	candidates = [codec for codec in accepted if codec in codecs and _compress_mbps.get(codec, float("inf")) > link_mbps]
+	if not candidates or len(sample) < 1024:
+		return none
+	estimates = [estimate(sample, codec) for codec in candidates]
+	best = min(estimates, key=lambda e: e.transfer_s(1.0, link_mbps))
+	return best.codec if best.transfer_s(1.0, link_mbps) < 1 / link_mbps else none
+
+
+def compress(codec: str, data: Buffer) -> Buffer:
+	return data if codec == none else codecs[codec][0](data)
+
+
+def decompress(codec: str, data: bytes) -> bytes:
+	return data if codec == none else codecs[codec][1](data)
@@ -0,0 +1,103 @@
+"""
+Configuration of the grpc servers of the controller and the workers, and of the worker process, by environment variables
+named after the fields, eg GNOSCH_CONTROLLER_PORT=50051 or GNOSCH_WORKER_MODE=aio. The others reach the controller by its
+host and port too.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+modes = ("threads", "aio")
+
+
+@dataclass
+class ServerConfig:
+	port: int
+	# at which the others reach this one
+	host: str = "localhost"
+	# threads serves each call on a thread of the pool. With aio, the coroutine handlers run on the event loop, not
+	# holding a thread while streaming or awaiting other servers, and the rest on the pool
+	mode: str = "threads"
+	max_workers: int = 16
+	# beyond which the calls get rejected with RESOURCE_EXHAUSTED, None for no limit
+	max_concurrent_rpcs: Optional[int] = None
+	# of the messages sent and received, also by the channels to the others
+	max_message_mb: int = 64
+
+	def __post_init__(self):
+		if self.mode not in modes:
+			raise ValueError(f"unknown server mode {self.mode}, expected one of {modes}")
+
+	@property
+	def url(self) -> str:
+		return f"{self.host}:{self.port}"
+
+	def options(self) -> list[tuple[str, int]]:
+		size = self.max_message_mb << 20
+		return [("grpc.max_send_message_length", size), ("grpc.max_receive_message_length", size)]
+
+	@classmethod
+	def from_env(cls, role: str, port: int) -> "ServerConfig":
+		parsers: dict[str, Callable[[str], object]] = {
+			"port": int,
+			"host": str,
+			"mode": str,
+			"max_workers": int,
+			"max_concurrent_rpcs": int,
+			"max_message_mb": int,
+		}
+		return cls(**{"port": port, **_from_env(role, parsers)})
+
+
+@dataclass
+class WorkerConfig:
+	"""Of the worker process itself, beyond its server -- by the GNOSCH_WORKER_ variables too"""
+
+	# of the heartbeats to the controller
+	heartbeat_s: float = 2.0
+	# of the datasets held in memory, beyond which they get spilled to disk, at the dir. None for no limit
+	datasets_budget_mb: Optional[float] = None
+	spill_dir: Optional[str] = None
+	# of the pre-forked job runners -- how many kept idle, the modules they import upfront (None for
+	# worker.jobs.default_preload), and after how many jobs or how much growth of their rss they get recycled
+	runner_pool_size: int = 4
+	preload: Optional[list[str]] = None
+	max_jobs_per_runner: int = 100
+	max_rss_growth_mb: float = 1024.0
+
+	@classmethod
+	def from_env(cls) -> "WorkerConfig":
+		parsers: dict[str, Callable[[str], object]] = {
+			"heartbeat_s": float,
+			"datasets_budget_mb": float,
+			"spill_dir": str,
+			"runner_pool_size": int,
+			# comma separated, eg GNOSCH_WORKER_PRELOAD=numpy,pandas. Just a comma for none
+			"preload": lambda value: [module for module in value.split(",") if module],
+			"max_jobs_per_runner": int,
+			"max_rss_growth_mb": float,
+		}
+		return cls(**_from_env("worker", parsers))
+
+
+def _from_env(role: str, parsers: dict[str, Callable[[str], object]]) -> dict:
+	"""The fields set by the environment, parsed"""
+	fields = {}
+	for name, parse in parsers.items():
+		value = os.environ.get(f"GNOSCH_{role.upper()}_{name.upper()}")
+		if value:
+			fields[name] = parse(value)
+	return fields
+
+
+def controller() -> ServerConfig:
+	return ServerConfig.from_env("controller", 50051)
+
+
+def worker() -> ServerConfig:
+	return ServerConfig.from_env("worker", 50052)
+
+
+def worker_process() -> WorkerConfig:
+	return WorkerConfig.from_env()
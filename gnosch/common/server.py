@@ -0,0 +1,49 @@
+"""
+Running of the grpc servers of the controller and the workers, in either mode of common.config.ServerConfig.
+"""
+
+import asyncio
+import logging
+from concurrent import futures
+from typing import Any, Callable
+import grpc
+from gnosch.common.config import ServerConfig
+
+logger = logging.getLogger(__name__)
+
+
+def serve(config: ServerConfig, register: Callable[[Any], None]) -> None:
+	"""Blocks until terminated. The register adds the servicers to the server"""
+	pool = futures.ThreadPoolExecutor(max_workers=config.max_workers)
+	logger.info(f"serving at port {config.port} with {config}")
+	if config.mode == "aio":
+		asyncio.run(_serve_aio(config, register, pool))
+		return
+	server = grpc.server(pool, options=config.options(), maximum_concurrent_rpcs=config.max_concurrent_rpcs)
+	register(server)
+	server.add_insecure_port(f"[::]:{config.port}")
+	server.start()
+	server.wait_for_termination()
+
+
+async def _serve_aio(config: ServerConfig, register: Callable[[Any], None], pool: futures.ThreadPoolExecutor) -> None:
+	server = grpc.aio.server(migration_thread_pool=pool, options=config.options(), maximum_concurrent_rpcs=config.max_concurrent_rpcs)
+	register(server)
+	server.add_insecure_port(f"[::]:{config.port}")
+	await server.start()
+	await server.wait_for_termination()
+
+
+class LoopQueue:
+	"""An asyncio.Queue of the running loop, put to from any thread as a queue.Queue -- for the coroutine handlers to
+	await what the threads produce, without holding a thread themselves"""
+
+	def __init__(self):
+		self.loop = asyncio.get_running_loop()
+		self.queue: asyncio.Queue = asyncio.Queue()
+
+	def put(self, item: Any) -> None:
+		self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
+
+	async def get(self) -> Any:
+		return await self.queue.get()
@@ -4,115 +4,587 @@ for receiving requests by the client or events from workers. Mostly just updates
 internal state, invokes scheduler, and issues further requests to workers
 """
 
+import asyncio
 import atexit
-from dataclasses import dataclass
-from typing import Any, Iterator
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterator, Optional
 from concurrent import futures
 import uuid
 import logging
+import queue
+import threading
+import time
 from gnosch.common.bootstrap import new_process
+from gnosch.common.server import LoopQueue, serve
+import gnosch.common.config as config
 import gnosch.api.gnosch_pb2_grpc as services
 import gnosch.api.gnosch_pb2 as protos
 import grpc
-from gnosch.controller.types import WorkerId
+from gnosch.controller.types import WorkerId, DatasetId
 from gnosch.controller.datasets import DatasetManager
+from gnosch.controller.placement import WorkerLoad, place
+from gnosch.controller.jobs import JobRegistry, is_finished
+from gnosch.controller.executor import GraphExecution, cluster_spec_of, task_graph_of
+import gnosch.scheduler.api as scheduler
+from gnosch.scheduler.graph import CompiledGraph
 
 logger = logging.getLogger(__name__)
 
+
 @dataclass
 class Worker:
 	url: str
 	channel: Any
 	client: Any
-	# resources, status, ...
+	# as last reported, None if never
+	resources: Optional[protos.WorkerResources] = None
+	# by the jobs placed there and not known finished
+	cpus_used: int = 0
+	memory_used_mb: int = 0
+	# as of the last heartbeat, by time.monotonic
+	last_beat: float = field(default_factory=time.monotonic)
+	beat_interval_s: float = 2.0
+	running_jobs: list[str] = field(default_factory=list)
+	# once it missed the heartbeats, until the next one
+	alive: bool = True
 
 	def quit(self):
 		self.channel.close()
 
-class ControllerImpl(services.GnoschBase, services.GnoschController):
 
+@dataclass
+class PlacedJob:
+	"""The capacity a job takes at its worker, until finished"""
+
+	worker_id: WorkerId
+	cpus: int
+	memory_mb: int
+
+
+# after which many missed heartbeats the worker is considered dead
+missed_beats = 3
+_monitor_interval_s = 1.0
+
+# NOTE [perf] bounds the memory of the striped retrievals, per replica
+_stripe_queue_blocks = 8
+_default_block_size = 1 << 20
+
+
+def _stripes(request: protos.DatasetCommandRequest, count: int, size: int) -> list[tuple[int, int]]:
+	"""Of the requested range, as (offset, length), contiguous whole blocks for each of the count clients"""
+	start = min(request.offset, size)
+	end = min(size, start + request.length) if request.length else size
+	block_size = request.block_size_hint or _default_block_size
+	blocks = -(-(end - start) // block_size)
+	per_stripe = max(-(-blocks // count), 1) * block_size
+	return [(offset, min(per_stripe, end - offset)) for offset in range(start, end, per_stripe)]
+
+
+def _stripe_request(request: protos.DatasetCommandRequest, offset: int, length: int) -> protos.DatasetCommandRequest:
+	subreq = protos.DatasetCommandRequest()
+	subreq.CopyFrom(request)
+	subreq.block_size_hint, subreq.offset, subreq.length = request.block_size_hint or _default_block_size, offset, length
+	return subreq
+
+
+def striped(request: protos.DatasetCommandRequest, clients: list[Any], size: int) -> Iterator[protos.DatasetCommandResponse]:
+	"""Retrieves the requested range in contiguous stripes, one from each of the clients in parallel. The blocks
+	thus come out of order, each placed by its offset. With an unknown size, just streams from the first client"""
+	if size < 0 or len(clients) < 2:
+		yield from clients[0].DatasetCommand(request)
+		return
+	stripes = _stripes(request, len(clients), size)
+	if not stripes:
+		return
+
+	responses: queue.Queue = queue.Queue(maxsize=_stripe_queue_blocks * len(stripes))
+	cancelled = threading.Event()
+
+	def offer(item: Any) -> bool:
+		"""False once the consumer is gone"""
+		while not cancelled.is_set():
+			try:
+				responses.put(item, timeout=1)
+				return True
+			except queue.Full:
+				pass
+		return False
+
+	def retrieve(client: Any, offset: int, length: int) -> None:
+		stream = client.DatasetCommand(_stripe_request(request, offset, length))
+		try:
+			for response in stream:
+				if not offer(response):
+					stream.cancel()
+					return
+		except Exception as e:
+			offer(e)
+		offer(None)
+
+	threads = [threading.Thread(target=retrieve, args=(client, *stripe), daemon=True) for client, stripe in zip(clients, stripes)]
+	for thread in threads:
+		thread.start()
+	try:
+		pending = len(threads)
+		while pending:
+			response = responses.get()
+			if response is None:
+				pending -= 1
+			elif isinstance(response, Exception):
+				raise response
+			else:
+				yield response
+	finally:
+		cancelled.set()
+
+
+async def striped_async(
+	request: protos.DatasetCommandRequest, clients: list[Any], size: int
+) -> AsyncIterator[protos.DatasetCommandResponse]:
+	"""As striped, but of aio clients, each stripe a task rather than a thread"""
+	if size < 0 or len(clients) < 2:
+		async for response in clients[0].DatasetCommand(request):
+			yield response
+		return
+	stripes = _stripes(request, len(clients), size)
+	responses: asyncio.Queue = asyncio.Queue(maxsize=_stripe_queue_blocks * len(stripes))
+
+	async def retrieve(client: Any, offset: int, length: int) -> None:
+		try:
+			async for response in client.DatasetCommand(_stripe_request(request, offset, length)):
+				await responses.put(response)
+		except Exception as e:
+			await responses.put(e)
+		await responses.put(None)
+
+	tasks = [asyncio.create_task(retrieve(client, *stripe)) for client, stripe in zip(clients, stripes)]
+	try:
+		pending = len(tasks)
+		while pending:
+			response = await responses.get()
+			if response is None:
+				pending -= 1
+			elif isinstance(response, Exception):
+				raise response
+			else:
+				yield response
+	finally:
+		for task in tasks:
+			task.cancel()
+
+
+class ControllerImpl(services.GnoschBase, services.GnoschController):
 	workers: dict[WorkerId, Worker]
 	dataset_manager: DatasetManager
+	job_registry: JobRegistry
+	# those not yet finished
+	placed: dict[str, PlacedJob]
 
-	def __init__(self, dataset_manager):
+	def __init__(self, dataset_manager, channel_options: Optional[list[tuple[str, int]]] = None):
 		self.workers = {}
+		# of the channels to the workers
+		self.channel_options = channel_options or []
 		self.dataset_manager = dataset_manager
+		self.job_registry = JobRegistry()
+		self.placed = {}
+		# NOTE of the placement, so that concurrent JobCreates see each other's jobs
+		self.lock = threading.Lock()
+		self.fetches = futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="fetches")
+		# of the batched calls, to all their workers at once
+		self.fanout = futures.ThreadPoolExecutor(max_workers=16, thread_name_prefix="fanout")
+		self.stopped = threading.Event()
 
 	def Ping(self, request: protos.PingRequest, context: Any):  # type: ignore
 		return protos.PingResponse(status=protos.ServerStatus.OK)
 
-	def JobCreate(self, request: protos.JobCreateRequest, context: Any) -> protos.JobResponse: # type: ignore
-		# TODO scheduling
-		for worker in self.workers.values():
-			return worker.client.JobCreate(request)
-		raise ValueError("no workers")
+	def _load(self, worker: Worker, held_bytes: int) -> WorkerLoad:
+		resources = worker.resources
+		cpus = resources.cpus if resources is not None and resources.cpus else 1
+		free_memory_mb = float("inf")
+		if resources is not None and resources.memory_mb:
+			free_memory_mb = resources.memory_mb - held_bytes / (1 << 20) - worker.memory_used_mb
+			# NOTE the measured catches what the estimate misses, eg the jobs using more than declared, or other processes
+			if resources.HasField("available_memory_mb"):
+				free_memory_mb = min(free_memory_mb, resources.available_memory_mb)
+		return WorkerLoad(
+			cpus=cpus,
+			cpus_used=max(worker.cpus_used, len(worker.running_jobs)),
+			free_memory_mb=free_memory_mb,
+			cpu_load=resources.cpu_load if resources is not None else 0.0,
+		)
 
-	def JobStatus(self, request: protos.JobStatusRequest, context: Any) -> protos.JobResponse: # type: ignore
-		# TODO job lookup
-		for worker in self.workers.values():
-			return worker.client.JobStatus(request)
-		raise ValueError("no workers")
+	def _fetch(self, worker: Worker, dataset_id: str, source_url: str) -> None:
+		"""Of a job's input, which the job waits for -- the worker registers the replica once done"""
+		try:
+			response = worker.client.FetchDataset(protos.FetchDatasetRequest(dataset_id=dataset_id, source_url=source_url))
+			if response.status != protos.DatasetCommandResult.DATASET_AVAILABLE:
+				logger.warning(f"fetch of {dataset_id} to {worker.url} from {source_url} ended with {response.status}")
+		except grpc.RpcError as e:
+			logger.warning(f"fetch of {dataset_id} to {worker.url} from {source_url} failed: {e}")
+
+	def _release(self, job: PlacedJob) -> None:
+		"""Under the lock"""
+		worker = self.workers[job.worker_id]
+		worker.cpus_used -= job.cpus
+		worker.memory_used_mb -= job.memory_mb
+
+	def _reserve(self, worker_id: WorkerId, request: protos.JobCreateRequest) -> PlacedJob:
+		"""Under the lock"""
+		job = PlacedJob(worker_id=worker_id, cpus=request.cpus or 1, memory_mb=request.memory_mb)
+		worker = self.workers[worker_id]
+		worker.cpus_used += job.cpus
+		worker.memory_used_mb += job.memory_mb
+		return job
+
+	def loads(self) -> dict[WorkerId, WorkerLoad]:
+		"""Of the live workers. Under the lock"""
+		held = self.dataset_manager.held_bytes()
+		return {worker_id: self._load(worker, held.get(worker_id, 0)) for worker_id, worker in self.workers.items() if worker.alive}
+
+	def _place(
+		self, request: protos.JobCreateRequest, loads: dict[WorkerId, WorkerLoad]
+	) -> tuple[PlacedJob, list[tuple[DatasetId, WorkerId]]]:
+		"""Under the lock, reserving the capacity at the chosen worker, in the loads too. With the inputs to fetch there"""
+		inputs = {dataset_id: self.dataset_manager.size_of(dataset_id) for dataset_id in request.inputs}
+		holders = {dataset_id: self.dataset_manager.holders_of(dataset_id) for dataset_id in request.inputs}
+		placement = place(loads, inputs, holders, request.cpus or 1, request.memory_mb)
+		job = self._reserve(placement.worker_id, request)
+		loads[job.worker_id].cpus_used += job.cpus
+		loads[job.worker_id].free_memory_mb -= job.memory_mb
+		return job, placement.fetches
+
+	def _fetch_inputs(self, job: PlacedJob, fetches: list[tuple[DatasetId, WorkerId]]) -> None:
+		worker = self.workers[job.worker_id]
+		logger.debug(f"placing job at {worker.url}, fetching {fetches}")
+		for dataset_id, source in fetches:
+			self.fetches.submit(self._fetch, worker, dataset_id, self.workers[source].url)
+
+	def JobCreate(self, request: protos.JobCreateRequest, context: Any) -> protos.JobResponse:  # type: ignore
+		with self.lock:
+			job, fetches = self._place(request, self.loads())
+		self._fetch_inputs(job, fetches)
+		return self._submit(job, request)
+
+	def JobCreateBatch(self, request: protos.JobCreateBatchRequest, context: Any) -> protos.JobBatchResponse:  # type: ignore
+		with self.lock:
+			loads = self.loads()
+			placed = [self._place(job_request, loads) for job_request in request.jobs]
+		by_worker: dict[WorkerId, list[int]] = {}
+		for i, (job, fetches) in enumerate(placed):
+			self._fetch_inputs(job, fetches)
+			by_worker.setdefault(job.worker_id, []).append(i)
+		# NOTE a single call per worker, all at once
+		batches = {
+			worker_id: self.fanout.submit(
+				self.workers[worker_id].client.JobCreateBatch, protos.JobCreateBatchRequest(jobs=[request.jobs[i] for i in indices])
+			)
+			for worker_id, indices in by_worker.items()
+		}
+		responses: list[protos.JobResponse] = [protos.JobResponse()] * len(placed)
+		for worker_id, batch in batches.items():
+			indices = by_worker[worker_id]
+			try:
+				created = list(batch.result().jobs)
+			except Exception as e:
+				logger.warning(f"creating {len(indices)} jobs at {worker_id} failed: {e}")
+				created = [protos.JobResponse(job_status=protos.JobStatus.WORKER_ERROR, worker_id=worker_id) for _ in indices]
+			with self.lock:
+				for i, response in zip(indices, created):
+					self._accept(placed[i][0], response)
+					responses[i] = response
+		return protos.JobBatchResponse(jobs=responses)
+
+	def create_job(self, worker_id: WorkerId, request: protos.JobCreateRequest) -> protos.JobResponse:
+		"""As JobCreate, but at the given worker, with its inputs already there"""
+		with self.lock:
+			job = self._reserve(worker_id, request)
+		return self._submit(job, request)
+
+	def _submit(self, job: PlacedJob, request: protos.JobCreateRequest) -> protos.JobResponse:
+		"""Of a job with its capacity reserved, which gets released unless the worker accepts it"""
+		worker = self.workers[job.worker_id]
+		try:
+			response = worker.client.JobCreate(request)
+		except Exception:
+			with self.lock:
+				self._release(job)
+			raise
+		with self.lock:
+			self._accept(job, response)
+		return response
+
+	def _accept(self, job: PlacedJob, response: protos.JobResponse) -> None:
+		"""Under the lock, of the worker's response to the job"""
+		if response.job_status != protos.JobStatus.WORKER_ACCEPTED:
+			self._release(job)
+			return
+		self.job_registry.update(response.job_id, job.worker_id, response.job_status)
+		# NOTE the worker may have pushed the job finished already
+		record = self.job_registry.get(response.job_id)
+		if record is not None and is_finished(record.job_status):
+			self._release(job)
+		else:
+			self.placed[response.job_id] = job
 
-	def DatasetCommand(self, request: protos.DatasetCommandRequest, context: Any) -> Iterator[protos.DatasetCommandResponse]: # type: ignore
+	def JobStatus(self, request: protos.JobStatusRequest, context: Any) -> protos.JobResponse:  # type: ignore
+		record = self.job_registry.get(request.job_id)
+		if record is None:
+			return protos.JobResponse(job_id=request.job_id, job_status=protos.JobStatus.UNKNOWN_JOB_STATUS)
+		return record.response(request.job_id)
+
+	def JobStatusBatch(self, request: protos.JobStatusBatchRequest, context: Any) -> protos.JobBatchResponse:  # type: ignore
+		return protos.JobBatchResponse(jobs=[self.JobStatus(protos.JobStatusRequest(job_id=job_id), context) for job_id in request.job_ids])
+
+	def WatchJobs(self, request: protos.WatchJobsRequest, context: Any) -> Iterator[protos.JobResponse]:  # type: ignore
+		yield from self.job_registry.watch(list(request.job_ids), context.is_active)
+
+	def _execute(self, request: protos.SubmitGraphRequest, updates: Any) -> GraphExecution:
+		"""Schedules the graph and starts following the schedule, putting the transitions of the tasks to the updates"""
+		task_graph, jobs = task_graph_of(request)
+		# compiled once, for both the scheduler and the execution
+		graph = CompiledGraph(task_graph)
+		with self.lock:
+			cluster_spec = cluster_spec_of(self.loads())
+		schedule = scheduler.schedule(graph, cluster_spec)
+		logger.debug(f"executing a graph of {len(graph)} tasks by {schedule}")
+		execution = GraphExecution(self, graph, jobs, schedule, cluster_spec, updates)
+		execution.start()
+		return execution
+
+	def SubmitGraph(self, request: protos.SubmitGraphRequest, context: Any) -> Iterator[protos.GraphTaskStatus]:  # type: ignore
+		try:
+			execution = self._execute(request, queue.Queue())
+		except ValueError as e:
+			# NOTE returns rather than raises on the aio servers
+			context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+			return
+		yield from execution.statuses()
+		if execution.error is not None:
+			context.abort(grpc.StatusCode.ABORTED, execution.error)
+
+	def UpdateJobs(self, request: protos.UpdateJobsRequest, context: Any) -> protos.PingResponse:  # type: ignore
+		with self.lock:
+			for job in request.jobs:
+				exit_code = job.exit_code if job.HasField("exit_code") else None
+				self.job_registry.update(job.job_id, request.worker_id, job.job_status, exit_code)
+				if is_finished(job.job_status) and job.job_id in self.placed:
+					self._release(self.placed.pop(job.job_id))
+		return protos.PingResponse(status=protos.ServerStatus.OK)
+
+	def DatasetCommand(self, request: protos.DatasetCommandRequest, context: Any) -> Iterator[protos.DatasetCommandResponse]:  # type: ignore
 		primary_id = self.dataset_manager.primary_of(request.dataset_id)
 		if not primary_id:
 			yield protos.DatasetCommandResponse(status=protos.DatasetCommandResult.DATASET_NOT_FOUND)
 			return
-		primary = self.workers[primary_id]
 		if request.drop:
-			workers = self.dataset_manager.replicas_with(request.dataset_id)
-			subreq = protos.DatasetCommandRequest(dataset_id=request.dataset_id, drop=True)
-			# NOTE [perf] run in async/pool. Also update status to purging
-			for worker_id in workers:
-				for response in self.workers[worker_id].client.DatasetCommand(subreq):
-					self.dataset_manager.update(response)
-					yield response
-			for response in primary.client.DatasetCommand(subreq):
-				self.dataset_manager.update(response)
-				yield response
+			yield from self._drop([request.dataset_id])
 		if request.retrieve:
-			# NOTE [perf] consider asking multiple workers, each for a different block
 			# NOTE [perf] consider returning the assignment for client to fetch on their own instead
-			for response in primary.client.DatasetCommand(request):
-				self.dataset_manager.update(response)
+			size = self.dataset_manager.size_of(request.dataset_id)
+			holders = self.dataset_manager.holders_of(request.dataset_id)
+			for response in striped(request, [self.workers[worker_id].client for worker_id in holders if worker_id in self.workers], size):
 				yield response
 
-	def RegisterWorker(self, request: protos.RegisterWorkerRequest, context: Any) -> protos.RegisterWorkerResponse: # type: ignore
+	def _drop(self, dataset_ids: list[DatasetId]) -> list[protos.DatasetCommandResponse]:
+		"""At all the holders, a single call to each, all at once"""
+		# NOTE [perf] also update status to purging
+		responses = []
+		by_worker: dict[WorkerId, list[DatasetId]] = {}
+		for dataset_id in dict.fromkeys(dataset_ids):
+			holders = [worker_id for worker_id in self.dataset_manager.holders_of(dataset_id) if worker_id in self.workers]
+			if not holders:
+				responses.append(protos.DatasetCommandResponse(status=protos.DatasetCommandResult.DATASET_NOT_FOUND, dataset_id=dataset_id))
+			for worker_id in holders:
+				by_worker.setdefault(worker_id, []).append(dataset_id)
+		batches = {
+			worker_id: self.fanout.submit(
+				self.workers[worker_id].client.DatasetBatch, protos.DatasetBatchRequest(dataset_ids=ids, drop=True)
+			)
+			for worker_id, ids in by_worker.items()
+		}
+		for worker_id, batch in batches.items():
+			try:
+				dropped = batch.result().datasets
+			except Exception as e:
+				logger.warning(f"dropping {len(by_worker[worker_id])} datasets at {worker_id} failed: {e}")
+				continue
+			for response in dropped:
+				self.dataset_manager.update(response)
+				responses.append(response)
+		return responses
+
+	def DatasetBatch(self, request: protos.DatasetBatchRequest, context: Any) -> protos.DatasetBatchResponse:  # type: ignore
+		if request.drop:
+			return protos.DatasetBatchResponse(datasets=self._drop(list(request.dataset_ids)))
+		responses = []
+		for dataset_id in request.dataset_ids:
+			holders = self.dataset_manager.holders_of(dataset_id)
+			if not holders:
+				responses.append(protos.DatasetCommandResponse(status=protos.DatasetCommandResult.DATASET_NOT_FOUND, dataset_id=dataset_id))
+			size = self.dataset_manager.size_of(dataset_id)
+			for worker_id in holders:
+				response = protos.DatasetCommandResponse(
+					status=protos.DatasetCommandResult.DATASET_AVAILABLE, dataset_id=dataset_id, worker_id=worker_id
+				)
+				if size >= 0:
+					response.size_bytes = size
+				responses.append(response)
+		return protos.DatasetBatchResponse(datasets=responses)
+
+	def PlaceDataset(self, request: protos.PlaceDatasetRequest, context: Any) -> protos.PlaceDatasetResponse:  # type: ignore
+		# NOTE [perf] once the controller knows the pending tasks, prefer the workers which will run its consumers
+		alive = [worker_id for worker_id, worker in self.workers.items() if worker.alive]
+		if not alive:
+			raise ValueError("no workers")
+		held = self.dataset_manager.held_bytes()
+		worker_id = min(alive, key=lambda worker_id: (held.get(worker_id, 0), worker_id))
+		return protos.PlaceDatasetResponse(worker_id=worker_id, url=self.workers[worker_id].url)
+
+	def RegisterWorker(self, request: protos.RegisterWorkerRequest, context: Any) -> protos.RegisterWorkerResponse:  # type: ignore
 		logger.info(f"registering worker {request}")
-		while True:
-			worker_id = str(uuid.uuid4())
-			if worker_id not in self.workers:
-				break
-		channel = grpc.insecure_channel(request.url)
+		channel = grpc.insecure_channel(request.url, options=self.channel_options)
 		client = services.GnoschBaseStub(channel)
-		self.workers[worker_id] = Worker(url=request.url, channel=channel, client=client)
-		logger.debug(f"currently registered {len(self.workers)} workers")
+		resources = request.resources if request.HasField("resources") else None
+		# under the lock as the heartbeat checks and the placement iterate the workers
+		with self.lock:
+			while True:
+				worker_id = str(uuid.uuid4())
+				if worker_id not in self.workers:
+					break
+			self.workers[worker_id] = Worker(url=request.url, channel=channel, client=client, resources=resources)
+			count = len(self.workers)
+		logger.debug(f"currently registered {count} workers")
 		return protos.RegisterWorkerResponse(worker_id=worker_id)
 
-	def RegisterDataset(self, request: protos.DatasetCommandResponse, context: Any) -> protos.PingResponse: # type: ignore
+	def RegisterDataset(self, request: protos.DatasetCommandResponse, context: Any) -> protos.PingResponse:  # type: ignore
 		logger.info(f"registering dataset {request}")
 		if request.status != protos.DatasetCommandResult.DATASET_AVAILABLE:
 			raise NotImplementedError(request.status)
 		self.dataset_manager.update(request)
 		return protos.PingResponse(status=protos.ServerStatus.OK)
-		
+
+	def UpdateWorker(self, request: protos.UpdateWorkerRequest, context: Any) -> protos.PingResponse:  # type: ignore
+		worker = self.workers.get(request.worker_id)
+		if worker is None:
+			raise ValueError(f"unknown worker {request.worker_id}")
+		with self.lock:
+			worker.resources = request.resources
+			worker.running_jobs = list(request.running_jobs)
+			worker.beat_interval_s = request.interval_s or worker.beat_interval_s
+			worker.last_beat = time.monotonic()
+			if not worker.alive:
+				logger.info(f"worker {request.worker_id} is back, with {len(request.datasets)} datasets")
+				worker.alive = True
+				for dataset in request.datasets:
+					self.dataset_manager.update(dataset)
+		return protos.PingResponse(status=protos.ServerStatus.OK)
+
+	def check_heartbeats(self, now: float) -> list[WorkerId]:
+		"""Marks dead the workers which missed their heartbeats, forgetting their datasets and failing their jobs"""
+		with self.lock:
+			dead = [
+				worker_id
+				for worker_id, worker in self.workers.items()
+				if worker.alive and now > worker.last_beat + missed_beats * worker.beat_interval_s
+			]
+			for worker_id in dead:
+				self.workers[worker_id].alive = False
+				self.dataset_manager.forget_worker(worker_id)
+				for job_id in [job_id for job_id, job in self.placed.items() if job.worker_id == worker_id]:
+					self._release(self.placed.pop(job_id))
+					self.job_registry.update(job_id, worker_id, protos.JobStatus.WORKER_ERROR)
+		for worker_id in dead:
+			logger.warning(f"worker {worker_id} missed its heartbeats, considered dead")
+		return dead
+
+	def monitor(self) -> None:
+		"""Of the heartbeats, until quit"""
+		while not self.stopped.wait(_monitor_interval_s):
+			self.check_heartbeats(time.monotonic())
 
 	def quit(self):
+		self.stopped.set()
+		self.fetches.shutdown(cancel_futures=True)
+		self.fanout.shutdown(cancel_futures=True)
 		for worker in self.workers.values():
 			worker.quit()
 
 
+class AsyncControllerImpl(ControllerImpl):
+	"""For the aio servers -- the calls which stream or await the workers are coroutines, so they don't hold a thread of
+	the pool meanwhile, which the rest keep running on"""
+
+	# on the event loop, as their channels belong to it
+	aio_clients: dict[WorkerId, Any]
+
+	def __init__(self, dataset_manager, channel_options: Optional[list[tuple[str, int]]] = None):
+		super().__init__(dataset_manager, channel_options)
+		self.aio_clients = {}
+
+	def _aio_client(self, worker_id: WorkerId) -> Any:
+		client = self.aio_clients.get(worker_id)
+		if client is None:
+			channel = grpc.aio.insecure_channel(self.workers[worker_id].url, options=self.channel_options)
+			client = self.aio_clients[worker_id] = services.GnoschBaseStub(channel)
+		return client
+
+	async def JobCreate(self, request: protos.JobCreateRequest, context: Any) -> protos.JobResponse:  # type: ignore
+		with self.lock:
+			job, fetches = self._place(request, self.loads())
+		self._fetch_inputs(job, fetches)
+		try:
+			response = await self._aio_client(job.worker_id).JobCreate(request)
+		except Exception:
+			with self.lock:
+				self._release(job)
+			raise
+		with self.lock:
+			self._accept(job, response)
+		return response
+
+	async def WatchJobs(self, request: protos.WatchJobsRequest, context: Any) -> AsyncIterator[protos.JobResponse]:  # type: ignore
+		async for response in self.job_registry.watch_async(list(request.job_ids)):
+			yield response
+
+	async def SubmitGraph(self, request: protos.SubmitGraphRequest, context: Any) -> AsyncIterator[protos.GraphTaskStatus]:  # type: ignore
+		updates = LoopQueue()
+		try:
+			# NOTE the planning takes a while for large graphs, so not on the loop
+			execution = await asyncio.to_thread(self._execute, request, updates)
+		except ValueError as e:
+			await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+		while (status := await updates.get()) is not None:
+			yield status
+		if execution.error is not None:
+			await context.abort(grpc.StatusCode.ABORTED, execution.error)
+
+	async def DatasetCommand(self, request: protos.DatasetCommandRequest, context: Any) -> AsyncIterator[protos.DatasetCommandResponse]:  # type: ignore
+		if not self.dataset_manager.primary_of(request.dataset_id):
+			yield protos.DatasetCommandResponse(status=protos.DatasetCommandResult.DATASET_NOT_FOUND)
+			return
+		if request.drop:
+			# NOTE brief, unlike the retrievals, so on a thread
+			for response in await asyncio.to_thread(self._drop, [request.dataset_id]):
+				yield response
+		if request.retrieve:
+			size = self.dataset_manager.size_of(request.dataset_id)
+			holders = [worker_id for worker_id in self.dataset_manager.holders_of(request.dataset_id) if worker_id in self.workers]
+			async for response in striped_async(request, [self._aio_client(worker_id) for worker_id in holders], size):
+				yield response
+
+
 def start() -> None:
 	new_process()
 	logger.info("starting controller grpc server")
 
-	dataset_manager = DatasetManager()
-	controller = ControllerImpl(dataset_manager)
-
-	server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+	server_config = config.controller()
+	implementation = AsyncControllerImpl if server_config.mode == "aio" else ControllerImpl
+	controller = implementation(DatasetManager(), server_config.options())
 	atexit.register(controller.quit)
-	services.add_GnoschControllerServicer_to_server(controller, server)
-	services.add_GnoschBaseServicer_to_server(controller, server)
-	server.add_insecure_port("[::]:50051")
-	server.start()
-	server.wait_for_termination()
+	threading.Thread(target=controller.monitor, name="heartbeats", daemon=True).start()
+
+	def register(server: Any) -> None:
+		services.add_GnoschControllerServicer_to_server(controller, server)
+		services.add_GnoschBaseServicer_to_server(controller, server)
+
+	serve(server_config, register)
@@ -14,12 +14,14 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+
 class DatasetStatus(Enum):
 	TRANSFERING = 0
 	COMPUTING = 1
 	AVAILABLE = 2
 	PURGING = 3
 
+
 @dataclass
 class Dataset:
 	primary_worker: WorkerId
@@ -28,7 +30,8 @@ class Dataset:
 	last_update: float
 	size_bytes: int
 
-class DatasetManager():
+
+class DatasetManager:
 	datasets: dict[DatasetId, Dataset]
 
 	def __init__(self):
@@ -42,6 +45,25 @@ class DatasetManager():
 			# NOTE [perf] maybe cache, pyrsistent, etc...
 			return ds.replicas.keys()
 
+	def holders_of(self, dataset_id: DatasetId) -> list[WorkerId]:
+		"""The primary first, then the replicas"""
+		ds = self.datasets.get(dataset_id, None)
+		return [ds.primary_worker, *(worker_id for worker_id in ds.replicas if worker_id != ds.primary_worker)] if ds else []
+
+	def size_of(self, dataset_id: DatasetId) -> int:
+		"""-1 if unknown"""
+		ds = self.datasets.get(dataset_id, None)
+		return ds.size_bytes if ds else -1
+
+	def held_bytes(self) -> dict[WorkerId, int]:
+		"""Total size of the datasets of known size each worker holds"""
+		held: dict[WorkerId, int] = {}
+		for ds in self.datasets.values():
+			# NOTE the primary re-registering the dataset gets among the replicas too
+			for worker_id in {ds.primary_worker, *ds.replicas}:
+				held[worker_id] = held.get(worker_id, 0) + max(0, ds.size_bytes)
+		return held
+
 	def primary_of(self, dataset_id: DatasetId) -> Optional[WorkerId]:
 		# NOTE [perf] this method should instead yield the "least busy worker with this dataset".
 		#      the whole primary concept should go away to simplify the rest of the code
@@ -51,6 +73,16 @@ class DatasetManager():
 		else:
 			return ds.primary_worker
 
+	def forget_worker(self, worker_id: WorkerId) -> None:
+		"""Of a worker gone, as if it dropped all it held"""
+		held = [dataset_id for dataset_id, ds in self.datasets.items() if worker_id == ds.primary_worker or worker_id in ds.replicas]
+		for dataset_id in held:
+			self.update(
+				protos.DatasetCommandResponse(
+					status=protos.DatasetCommandResult.DATASET_DROPPED, dataset_id=dataset_id, worker_id=worker_id
+				)
+			)
+
 	def update(self, response: protos.DatasetCommandResponse) -> None:
 		ds = self.datasets.get(response.dataset_id, None)
 		if response.status == protos.DatasetCommandResult.DATASET_AVAILABLE:
@@ -62,17 +94,18 @@ class DatasetManager():
 					primary_status=DatasetStatus.AVAILABLE,
 					replicas={},
 					last_update=time(),
-					size_bytes=-1,
+					size_bytes=response.size_bytes if response.HasField("size_bytes") else -1,
 				)
 		elif ds:
 			ds.last_update = max(ds.last_update, time())
 			if response.status == protos.DatasetCommandResult.DATASET_DROPPED:
 				if response.worker_id != ds.primary_worker:
-					ds.replicas.pop(response.worker_id)
+					ds.replicas.pop(response.worker_id, None)
+				elif not ds.replicas:
+					self.datasets.pop(response.dataset_id)
 				else:
-					if not ds.replicas:
-						self.datasets.pop(response.dataset_id)
-					else:
-						raise NotImplementedError("must first remove all replicas")
+					# NOTE a schedule drops the producer's copy once the others fetched it, so a replica takes over
+					ds.primary_worker = next(iter(ds.replicas))
+					ds.primary_status = ds.replicas.pop(ds.primary_worker)
 		else:
 			logger.warning(f"received dataset update for a non-existent dataset: {response}")
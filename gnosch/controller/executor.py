@@ -0,0 +1,191 @@
+"""
+Execution of a task graph, for ControllerImpl.SubmitGraph -- the scheduler plans it onto the workers, and the
+controller then follows the command queue of each worker by scheduler.queues, as scheduler.simulator does, carrying
+out the fetches, launches and drops at the workers. A single thread follows the queues, woken by the transitions of
+the jobs and by the fetches done.
+"""
+
+import logging
+import queue
+import threading
+from concurrent import futures
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Iterator, Optional, Union
+import grpc
+import gnosch.api.gnosch_pb2 as protos
+from gnosch.common import compression
+from gnosch.controller.jobs import is_finished
+from gnosch.controller.placement import WorkerLoad
+from gnosch.controller.types import DatasetId, WorkerId
+from gnosch.scheduler.graph import CompiledGraph
+from gnosch.scheduler.model import ClusterSpec, NodeSpec, Schedule, Task, TaskGraph, TaskId, TaskInput, TaskOutput
+from gnosch.scheduler.queues import NodeQueue, QueueFollower
+
+if TYPE_CHECKING:
+	from gnosch.controller.api_server import ControllerImpl
+
+logger = logging.getLogger(__name__)
+
+# for the workers not reporting their memory
+_unbounded_mb = 1 << 40
+
+
+def task_graph_of(request: protos.SubmitGraphRequest) -> tuple[TaskGraph, dict[TaskId, protos.JobCreateRequest]]:
+	"""The graph to schedule, and the job of each task"""
+	task_graph: TaskGraph = {}
+	jobs: dict[TaskId, protos.JobCreateRequest] = {}
+	for task_id, task in request.tasks.items():
+		task_graph[task_id] = Task(
+			inputs=[TaskInput(dataset_id=dataset_id) for dataset_id in task.inputs],
+			outputs=[TaskOutput(dataset_id=dataset_id, size_mb=size_mb) for dataset_id, size_mb in sorted(task.outputs_mb.items())],
+			memory_mb=task.memory_mb,
+			prefered_cpus=task.cpus or 1,
+			runtime_est_s=task.runtime_est_s or 1,
+		)
+		job = jobs[task_id] = protos.JobCreateRequest(inputs=task.inputs, memory_mb=task.memory_mb, cpus=task.cpus or 1)
+		if task.HasField("spec"):
+			job.spec.CopyFrom(task.spec)
+		else:
+			job.definition = task.definition
+	return task_graph, jobs
+
+
+def cluster_spec_of(loads: dict[WorkerId, WorkerLoad]) -> ClusterSpec:
+	"""Of the workers as the controller knows them. NOTE a stub as for the links, all assumed of
+	compression.default_link_mbps -- the workers measure theirs, but don't report them to the controller yet"""
+	nodes = {
+		worker_id: NodeSpec(cpus=load.cpus, memory_mb=int(min(load.free_memory_mb, _unbounded_mb))) for worker_id, load in loads.items()
+	}
+	comm_mbps = {(source, target): compression.default_link_mbps for source in nodes for target in nodes if source != target}
+	return ClusterSpec(nodes=nodes, comm_mbps=comm_mbps)
+
+
+@dataclass
+class _Fetched:
+	worker_id: WorkerId
+	d: int
+	error: Optional[str] = None
+
+
+class GraphExecution(QueueFollower[NodeQueue]):
+	# of the jobs launched and not yet finished, the task and the worker
+	running: dict[str, tuple[int, WorkerId]]
+	# set once failed
+	error: Optional[str]
+
+	def __init__(
+		self,
+		controller: "ControllerImpl",
+		graph: CompiledGraph,
+		jobs: dict[TaskId, protos.JobCreateRequest],
+		schedule: Schedule,
+		cluster_spec: ClusterSpec,
+		updates: Any = None,
+	):
+		unknown = set(schedule) - set(cluster_spec.nodes)
+		if unknown:
+			raise ValueError(f"schedule for workers not in the cluster: {sorted(unknown)}")
+		nodes = {
+			worker_id: NodeQueue(worker_id, commands, graph, cluster_spec.nodes[worker_id].memory_mb)
+			for worker_id, commands in schedule.items()
+		}
+		super().__init__(cluster_spec, graph, nodes)
+		self.controller = controller
+		self.jobs = jobs
+		self.running = {}
+		self.finished: set[int] = set()
+		self.fetching = 0
+		self.error = None
+		# the job transitions, as JobResponse, and the fetches done, as _Fetched
+		self.events: queue.Queue = queue.Queue()
+		# the task transitions for the client, None once done. As queue.Queue
+		self.updates = updates if updates is not None else queue.Queue()
+		# NOTE [perf] the fetches take a thread each for their whole transfer
+		self.rpcs = futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="graph")
+		self.thread = threading.Thread(target=self.run, daemon=True)
+
+	def start(self) -> None:
+		self.thread.start()
+
+	def statuses(self) -> Iterator[protos.GraphTaskStatus]:
+		"""The transitions of the tasks' jobs, until all are finished or the execution failed"""
+		while (status := self.updates.get()) is not None:
+			yield status
+
+	def run(self) -> None:
+		subscription = self.controller.job_registry.subscribe(self.events)
+		try:
+			woken = set(self.nodes)
+			while True:
+				self.proceed_all(woken)
+				if not self.running and not self.fetching:
+					break
+				self.handle(self.events.get(), woken)
+			stuck = self.stuck()
+			if stuck is not None:
+				raise ValueError(f"schedule can't progress, {stuck.name} blocked on {stuck.commands[stuck.cursor]}")
+			missing = [task_id for t, task_id in enumerate(self.graph.task_ids) if t not in self.finished]
+			if missing:
+				raise ValueError(f"tasks not in the schedule: {sorted(missing)}")
+		except Exception as e:
+			# NOTE the jobs already launched keep running, their outputs stay at the workers
+			logger.exception("graph execution failed")
+			self.error = str(e)
+		finally:
+			self.controller.job_registry.unsubscribe(subscription)
+			self.rpcs.shutdown(wait=self.error is None, cancel_futures=self.error is not None)
+			self.updates.put(None)
+
+	def handle(self, event: Union[protos.JobResponse, _Fetched], woken: set[WorkerId]) -> None:
+		if isinstance(event, _Fetched):
+			self.fetching -= 1
+			if event.error is not None:
+				raise ValueError(f"fetch of {self.graph.dataset_ids[event.d]} to {event.worker_id} failed: {event.error}")
+			self.finish_fetch(event.d, self.nodes[event.worker_id], woken)
+			return
+		launched = self.running.get(event.job_id)
+		if launched is None:
+			return
+		t, worker_id = launched
+		task_id = self.graph.task_ids[t]
+		self.updates.put(protos.GraphTaskStatus(task_id=task_id, job=event))
+		if event.job_status == protos.JobStatus.WORKER_ERROR:
+			raise ValueError(f"task {task_id} failed at {worker_id} with exit code {event.exit_code}")
+		if is_finished(event.job_status):
+			self.running.pop(event.job_id)
+			self.finished.add(t)
+			self.finish_task(self.nodes[worker_id], t, woken)
+
+	def start_fetch(self, d: int, source: WorkerId, target: NodeQueue, woken: set[WorkerId]) -> None:
+		self.fetching += 1
+		self.rpcs.submit(self._fetch, target.name, d, source)
+
+	def launch(self, t: int, node: NodeQueue) -> None:
+		task_id = self.graph.task_ids[t]
+		response = self.controller.create_job(node.name, self.jobs[task_id])
+		if response.job_status != protos.JobStatus.WORKER_ACCEPTED:
+			raise ValueError(f"task {task_id} not accepted by {node.name}: {protos.JobStatus.Name(response.job_status)}")
+		self.running[response.job_id] = (t, node.name)
+
+	def dropped(self, d: int, node: NodeQueue) -> None:
+		self.rpcs.submit(self._drop, node.name, self.graph.dataset_ids[d])
+
+	def _fetch(self, worker_id: WorkerId, d: int, source: WorkerId) -> None:
+		"""The worker registers the replica once done"""
+		error = None
+		try:
+			request = protos.FetchDatasetRequest(dataset_id=self.graph.dataset_ids[d], source_url=self.controller.workers[source].url)
+			response = self.controller.workers[worker_id].client.FetchDataset(request)
+			if response.status != protos.DatasetCommandResult.DATASET_AVAILABLE:
+				error = f"ended with {protos.DatasetCommandResult.Name(response.status)}"
+		except Exception as e:
+			error = str(e)
+		self.events.put(_Fetched(worker_id=worker_id, d=d, error=error))
+
+	def _drop(self, worker_id: WorkerId, dataset_id: DatasetId) -> None:
+		request = protos.DatasetCommandRequest(dataset_id=dataset_id, drop=True)
+		try:
+			for response in self.controller.workers[worker_id].client.DatasetCommand(request):
+				self.controller.dataset_manager.update(response)
+		except grpc.RpcError as e:
+			logger.warning(f"drop of {dataset_id} at {worker_id} failed: {e}")
@@ -0,0 +1,145 @@
+"""
+Registry of the jobs the controller knows of -- which worker runs each, and its last status as the workers push
+their transitions. Serves JobStatus by a lookup, and WatchJobs by streaming the transitions as they come.
+"""
+
+import itertools
+import logging
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+import gnosch.api.gnosch_pb2 as protos
+from gnosch.common.server import LoopQueue
+from gnosch.controller.types import WorkerId
+
+logger = logging.getLogger(__name__)
+
+# the order of the transitions, as a late WORKER_ACCEPTED may come after the job is already running
+_rank: dict[protos.JobStatus, int] = {
+	protos.JobStatus.WORKER_ACCEPTED: 0,
+	protos.JobStatus.WORKER_RUNNING: 1,
+	protos.JobStatus.FINISHED: 2,
+	protos.JobStatus.WORKER_ERROR: 2,
+}
+
+
+def is_finished(job_status: protos.JobStatus) -> bool:
+	return _rank.get(job_status, 0) == 2
+
+
+@dataclass
+class JobRecord:
+	worker_id: WorkerId
+	job_status: protos.JobStatus
+	exit_code: Optional[int] = None
+
+	def response(self, job_id: str) -> protos.JobResponse:
+		response = protos.JobResponse(job_id=job_id, job_status=self.job_status, worker_id=self.worker_id)
+		if self.exit_code is not None:
+			response.exit_code = self.exit_code
+		return response
+
+
+@dataclass
+class _Watcher:
+	# None for all the jobs
+	job_ids: Optional[set[str]]
+	# as queue.Queue, put to under the lock
+	responses: Any
+
+
+class JobRegistry:
+	# NOTE [mem] the finished ones stay too
+	jobs: dict[str, JobRecord]
+	watchers: dict[int, _Watcher]
+
+	def __init__(self):
+		self.jobs = {}
+		self.watchers = {}
+		self.watcher_ids = itertools.count()
+		self.lock = threading.Lock()
+
+	def get(self, job_id: str) -> Optional[JobRecord]:
+		return self.jobs.get(job_id)
+
+	def update(self, job_id: str, worker_id: WorkerId, job_status: protos.JobStatus, exit_code: Optional[int] = None) -> bool:
+		"""Records the status, unless the job has already gotten further. True if recorded"""
+		with self.lock:
+			record = self.jobs.get(job_id)
+			if record is not None and _rank.get(record.job_status, 0) >= _rank.get(job_status, 0):
+				return False
+			record = self.jobs[job_id] = JobRecord(worker_id=worker_id, job_status=job_status, exit_code=exit_code)
+			response = record.response(job_id)
+			for watcher in self.watchers.values():
+				if watcher.job_ids is None or job_id in watcher.job_ids:
+					watcher.responses.put(response)
+		return True
+
+	def subscribe(self, responses: Any, job_ids: Optional[set[str]] = None) -> int:
+		"""The transitions of the jobs, all if None, get put to the queue from now on until unsubscribed"""
+		with self.lock:
+			watcher_id = next(self.watcher_ids)
+			self.watchers[watcher_id] = _Watcher(job_ids=job_ids, responses=responses)
+		return watcher_id
+
+	def unsubscribe(self, watcher_id: int) -> None:
+		with self.lock:
+			self.watchers.pop(watcher_id)
+
+	def _watch(self, job_ids: list[str], responses: Any) -> tuple[int, list[protos.JobResponse], set[str]]:
+		"""Subscribes, with the current statuses and the jobs yet to finish"""
+		with self.lock:
+			watcher_id = next(self.watcher_ids)
+			self.watchers[watcher_id] = _Watcher(job_ids=set(job_ids) if job_ids else None, responses=responses)
+			current = [(job_id, self.jobs.get(job_id)) for job_id in dict.fromkeys(job_ids)]
+		statuses, pending = [], set()
+		for job_id, record in current:
+			if record is None:
+				statuses.append(protos.JobResponse(job_id=job_id, job_status=protos.JobStatus.UNKNOWN_JOB_STATUS))
+				continue
+			statuses.append(record.response(job_id))
+			if not is_finished(record.job_status):
+				pending.add(job_id)
+		return watcher_id, statuses, pending
+
+	@staticmethod
+	def _passes(response: protos.JobResponse, job_ids: list[str], pending: set[str]) -> bool:
+		"""Whether to yield the transition, updating the pending ones"""
+		# those not known at the start are not waited for
+		if job_ids and response.job_id not in pending:
+			return False
+		if is_finished(response.job_status):
+			pending.discard(response.job_id)
+		return True
+
+	def watch(self, job_ids: list[str], active: Callable[[], bool] = lambda: True) -> Iterator[protos.JobResponse]:
+		"""The current statuses of the jobs, UNKNOWN_JOB_STATUS for those not known, then their transitions until all
+		are finished. Without job ids, the transitions of all the jobs until no longer active"""
+		responses: queue.Queue = queue.Queue()
+		watcher_id, statuses, pending = self._watch(job_ids, responses)
+		try:
+			yield from statuses
+			while (pending or not job_ids) and active():
+				try:
+					response = responses.get(timeout=1)
+				except queue.Empty:
+					continue
+				if self._passes(response, job_ids, pending):
+					yield response
+		finally:
+			self.unsubscribe(watcher_id)
+
+	async def watch_async(self, job_ids: list[str]) -> AsyncIterator[protos.JobResponse]:
+		"""As watch, for the coroutine handlers -- until cancelled rather than no longer active"""
+		responses = LoopQueue()
+		watcher_id, statuses, pending = self._watch(job_ids, responses)
+		try:
+			for response in statuses:
+				yield response
+			while pending or not job_ids:
+				response = await responses.get()
+				if self._passes(response, job_ids, pending):
+					yield response
+		finally:
+			self.unsubscribe(watcher_id)
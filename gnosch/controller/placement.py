@@ -0,0 +1,60 @@
+"""
+Placement of single jobs onto the workers, for ControllerImpl.JobCreate -- by where their inputs are and by the
+load of the workers, as far as the controller knows them.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, Mapping
+from gnosch.controller.types import WorkerId, DatasetId
+
+
+@dataclass
+class WorkerLoad:
+	cpus: int
+	# by the jobs placed there and not known finished, or running as of the last heartbeat
+	cpus_used: int
+	free_memory_mb: float
+	# as measured, including what the controller didn't place there
+	cpu_load: float = 0.0
+
+	@property
+	def load(self) -> float:
+		return max(self.cpus_used, self.cpu_load) / max(self.cpus, 1)
+
+	def fits(self, cpus: int, memory_mb: int) -> bool:
+		return self.cpus_used + cpus <= self.cpus and memory_mb <= self.free_memory_mb
+
+
+@dataclass
+class Placement:
+	worker_id: WorkerId
+	# the inputs missing at the worker, each with the worker to fetch it from
+	fetches: list[tuple[DatasetId, WorkerId]]
+
+
+def place(
+	loads: dict[WorkerId, WorkerLoad],
+	inputs: dict[DatasetId, int],
+	holders: Mapping[DatasetId, Iterable[WorkerId]],
+	cpus: int,
+	memory_mb: int,
+) -> Placement:
+	"""Of those workers with the capacity for the job, the one holding the most bytes of its inputs, the least loaded
+	one on ties. When none has the capacity, the same of all -- its admission then queues the job. The inputs are of
+	their sizes, -1 if unknown. The missing ones get fetched from their least loaded holders, unless nowhere yet"""
+	if not loads:
+		raise ValueError("no workers")
+	holding = {dataset_id: set(holders.get(dataset_id, ())) for dataset_id in inputs}
+	local_bytes = {
+		worker_id: sum(max(size, 1) for dataset_id, size in inputs.items() if worker_id in holding[dataset_id]) for worker_id in loads
+	}
+	eligible = [worker_id for worker_id, load in loads.items() if load.fits(cpus, memory_mb)] or list(loads)
+	worker_id = min(eligible, key=lambda worker_id: (-local_bytes[worker_id], loads[worker_id].load, worker_id))
+
+	def source_key(source: WorkerId) -> tuple[float, WorkerId]:
+		return (loads[source].load if source in loads else float("inf"), source)
+
+	fetches = [
+		(dataset_id, min(sources, key=source_key)) for dataset_id, sources in holding.items() if sources and worker_id not in sources
+	]
+	return Placement(worker_id=worker_id, fetches=fetches)
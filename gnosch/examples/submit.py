@@ -5,16 +5,17 @@ Submits a simple job corresponding to gnosch.examples.jobs
 """
 
 import numpy as np
-import time
 import os
 import grpc
 import gnosch.api.gnosch_pb2_grpc as services
 import gnosch.api.gnosch_pb2 as protos
+from gnosch.client.jobs import job_spec
+import gnosch.common.config as config
 
 
 def main() -> None:
 	print(f"main starting with pid {os.getpid()}")
-	channel = grpc.insecure_channel("localhost:50052")
+	channel = grpc.insecure_channel(config.worker().url)
 	client = services.GnoschBaseStub(channel)
 	ping = client.Ping(protos.PingRequest())
 	if ping.status != protos.ServerStatus.OK:
@@ -22,7 +23,7 @@ def main() -> None:
 	else:
 		print("worker healthy")
 
-	channel = grpc.insecure_channel("localhost:50051")
+	channel = grpc.insecure_channel(config.controller().url)
 	client = services.GnoschBaseStub(channel)
 	ping = client.Ping(protos.PingRequest())
 	if ping.status != protos.ServerStatus.OK:
@@ -36,35 +37,33 @@ def main() -> None:
 	print(f"{purgeRes=}")
 
 	print("about to run producer")
-	job1req = protos.JobCreateRequest(definition="import gnosch.examples.jobs; gnosch.examples.jobs.data_producer()")
+	job1req = protos.JobCreateRequest(spec=job_spec("gnosch.examples.jobs:data_producer"))
 	job1res = client.JobCreate(job1req)
 	print(f"{job1res=}")
 
 	print("about to run consumer")
-	job2req = protos.JobCreateRequest(definition="import gnosch.examples.jobs; gnosch.examples.jobs.data_consumer()")
+	job2req = protos.JobCreateRequest(definition="import gnosch.examples.jobs; gnosch.examples.jobs.data_consumer()", inputs=["d1"])
 	job2res = client.JobCreate(job2req)
 	print(f"{job2res=}")
 
-	job2stReq = protos.JobStatusRequest(job_id=job2res.job_id)
-	while True:
-		job2stRes = client.JobStatus(job2stReq)
-		print(f"{job2stRes=}")
-		if job2stRes.job_status == protos.JobStatus.WORKER_RUNNING:
-			time.sleep(0.2)
-		elif job2stRes.job_status == protos.JobStatus.FINISHED:
-			print("done")
-			break
-		else:
-			raise ValueError(job2stRes)
+	# the statuses of both, streamed as they change
+	for jobStRes in client.WatchJobs(protos.WatchJobsRequest(job_ids=[job1res.job_id, job2res.job_id])):
+		print(f"{jobStRes=}")
+		if jobStRes.job_status not in (protos.JobStatus.WORKER_ACCEPTED, protos.JobStatus.WORKER_RUNNING, protos.JobStatus.FINISHED):
+			raise ValueError(jobStRes)
+	print("done")
 
 	finReq = protos.DatasetCommandRequest(dataset_id="d1", block_size_hint=1024, retrieve=True)
 	finRes = client.DatasetCommand(finReq)
-	finResBuf = b""
+	finResBuf = bytearray()
 	for finResIt in finRes:
 		if finResIt.status != protos.DatasetCommandResult.DATASET_AVAILABLE:
 			print("error obtaining final result")
 		else:
-			finResBuf += finResIt.data
+			# the blocks may come out of order when multiple workers hold the dataset
+			if not finResBuf:
+				finResBuf = bytearray(finResIt.size_bytes)
+			finResBuf[finResIt.offset : finResIt.offset + len(finResIt.data)] = finResIt.data
 	finResNp = np.frombuffer(finResBuf, dtype=int, count=3)
 	print(f"final result: {finResNp}")
 
@@ -0,0 +1,37 @@
+"""
+Assumes a controller and at least one worker running.
+
+Submits the jobs of gnosch.examples.jobs as a graph, for the controller to schedule and run
+"""
+
+import grpc
+import gnosch.api.gnosch_pb2_grpc as services
+import gnosch.api.gnosch_pb2 as protos
+from gnosch.client.jobs import job_spec
+import gnosch.common.config as config
+
+
+def main() -> None:
+	channel = grpc.insecure_channel(config.controller().url)
+	client = services.GnoschBaseStub(channel)
+
+	# the dataset of a previous run (if exists)
+	for response in client.DatasetCommand(protos.DatasetCommandRequest(dataset_id="d1", drop=True)):
+		print(f"{response=}")
+
+	request = protos.SubmitGraphRequest()
+	producer = request.tasks["producer"]
+	producer.spec.CopyFrom(job_spec("gnosch.examples.jobs:data_producer"))
+	producer.outputs_mb["d1"] = 1
+	consumer = request.tasks["consumer"]
+	consumer.spec.CopyFrom(job_spec("gnosch.examples.jobs:data_consumer"))
+	consumer.inputs.append("d1")
+
+	# the transitions of the tasks, until all are finished
+	for status in client.SubmitGraph(request):
+		print(f"{status.task_id}: {protos.JobStatus.Name(status.job.job_status)} at {status.job.worker_id}")
+	print("graph done")
+
+
+if __name__ == "__main__":
+	main()
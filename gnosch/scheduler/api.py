@@ -1,5 +1,14 @@
-from gnosch.scheduler.model import TaskGraph, ClusterSpec, Schedule
+from typing import Optional, Union
+from gnosch.scheduler.graph import CompiledGraph
+from gnosch.scheduler.model import TaskGraph, ClusterSpec, ExecutionState, Schedule
+from gnosch.scheduler.planner import plan
+from gnosch.scheduler import reschedule as _reschedule
 
 
-def schedule(task_graph: TaskGraph, cluster_spec: ClusterSpec) -> Schedule:
-	raise NotImplementedError()
+def schedule(task_graph: Union[TaskGraph, CompiledGraph], cluster_spec: ClusterSpec) -> Schedule:
+	return plan(task_graph, cluster_spec)
+
+
+def reschedule(task_graph: TaskGraph, cluster_spec: ClusterSpec, schedule: Schedule, state: ExecutionState) -> Optional[Schedule]:
+	"""The remainder of the schedule to follow from the state on, or None if the current one still holds"""
+	return _reschedule.reschedule(task_graph, cluster_spec, schedule, state)
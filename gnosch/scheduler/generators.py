@@ -0,0 +1,96 @@
+"""
+Synthetic task graphs and clusters of common shapes, for benchmarks and tests. All randomness comes from the
+passed rng, so a seed determines the output.
+"""
+
+import random
+from gnosch.scheduler.model import ClusterSpec, NodeName, NodeSpec, Task, TaskGraph, TaskInput, TaskOutput
+
+
+def _task(rng: random.Random, inputs: list[str], outputs: list[str], max_runtime_s: int = 30, max_size_mb: int = 256) -> Task:
+	return Task(
+		inputs=[TaskInput(dataset_id=dataset_id) for dataset_id in inputs],
+		outputs=[TaskOutput(dataset_id=dataset_id, size_mb=rng.randint(1, max_size_mb)) for dataset_id in outputs],
+		memory_mb=rng.randint(128, 2048),
+		prefered_cpus=rng.randint(1, 4),
+		runtime_est_s=rng.randint(1, max_runtime_s),
+	)
+
+
+def map_reduce(rng: random.Random, mappers: int, reducers: int) -> TaskGraph:
+	"""Each mapper produces a partition for every reducer, each reducer reads its partition from all mappers"""
+	graph = {}
+	for m in range(mappers):
+		graph[f"map{m}"] = _task(rng, [], [f"map{m}_part{r}" for r in range(reducers)], max_size_mb=8)
+	for r in range(reducers):
+		graph[f"reduce{r}"] = _task(rng, [f"map{m}_part{r}" for m in range(mappers)], [f"reduce{r}_out"])
+	return graph
+
+
+def fork_join(rng: random.Random, width: int, stages: int) -> TaskGraph:
+	"""Stages of width parallel tasks, each stage forked from and joined into a single task"""
+	graph = {"fork0": _task(rng, [], ["fork0_out"])}
+	for s in range(stages):
+		for i in range(width):
+			graph[f"s{s}_{i}"] = _task(rng, [f"fork{s}_out"], [f"s{s}_{i}_out"])
+		graph[f"fork{s + 1}"] = _task(rng, [f"s{s}_{i}_out" for i in range(width)], [f"fork{s + 1}_out"], max_size_mb=64)
+	return graph
+
+
+def layered(rng: random.Random, layers: int, width: int, max_inputs: int = 3) -> TaskGraph:
+	"""Random dag of layers, each task reading up to max_inputs outputs of the previous layer"""
+	graph = {}
+	previous: list[str] = []
+	for layer in range(layers):
+		current = []
+		for i in range(width):
+			task_id = f"t{layer}_{i}"
+			inputs = [f"{p}_out" for p in rng.sample(previous, min(len(previous), rng.randint(1, max_inputs)))]
+			graph[task_id] = _task(rng, inputs, [f"{task_id}_out"])
+			current.append(task_id)
+		previous = current
+	return graph
+
+
+def chains(rng: random.Random, count: int, length: int) -> TaskGraph:
+	"""Independent chains, each task reading the output of the previous one"""
+	graph = {}
+	for c in range(count):
+		for i in range(length):
+			graph[f"c{c}_{i}"] = _task(rng, [f"c{c}_{i - 1}_out"] if i else [], [f"c{c}_{i}_out"])
+	return graph
+
+
+def fan_in(rng: random.Random, width: int) -> TaskGraph:
+	"""Many independent sources all read by a single sink"""
+	graph = {f"src{i}": _task(rng, [], [f"src{i}_out"], max_size_mb=32) for i in range(width)}
+	graph["sink"] = _task(rng, [f"src{i}_out" for i in range(width)], [])
+	graph["sink"].memory_mb = 2048 + 32 * width
+	return graph
+
+
+def uniform_links(nodes: list[NodeName], mbps: float) -> dict[tuple[NodeName, NodeName], float]:
+	return {(a, b): mbps for a in nodes for b in nodes if a != b}
+
+
+def rack_links(
+	nodes: list[NodeName], rack_size: int, in_rack_mbps: float, cross_rack_mbps: float
+) -> dict[tuple[NodeName, NodeName], float]:
+	"""Nodes in consecutive groups of rack_size, with faster links within a group"""
+	return {
+		(a, b): in_rack_mbps if i // rack_size == j // rack_size else cross_rack_mbps
+		for i, a in enumerate(nodes)
+		for j, b in enumerate(nodes)
+		if i != j
+	}
+
+
+def homogeneous_cluster(count: int, cpus: int = 8, memory_mb: int = 16384, mbps: float = 100.0) -> ClusterSpec:
+	nodes = {f"n{i}": NodeSpec(cpus=cpus, memory_mb=memory_mb) for i in range(count)}
+	return ClusterSpec(nodes=nodes, comm_mbps=uniform_links(list(nodes), mbps))
+
+
+def heterogeneous_cluster(rng: random.Random, count: int, rack_size: int = 4) -> ClusterSpec:
+	"""Nodes of varying cpus and memory, in racks with 10x faster links within than across"""
+	nodes = {f"n{i}": NodeSpec(cpus=rng.choice([2, 4, 8, 16]), memory_mb=rng.choice([8192, 16384, 32768])) for i in range(count)}
+	return ClusterSpec(nodes=nodes, comm_mbps=rack_links(list(nodes), rack_size, 1000.0, 100.0))
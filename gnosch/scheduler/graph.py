@@ -0,0 +1,173 @@
+"""
+Compiled form of a TaskGraph, in which the dependencies -- implicit in the dataset ids -- are resolved once.
+
+Tasks and datasets are numbered, tasks in the order of the TaskGraph and datasets in the order they are produced
+in, followed by the external ones (consumed but produced by no task) if allowed. The resources of the tasks and
+the adjacency are held in flat arrays, the latter in CSR form, so that graphs with millions of tasks stay compact
+and the planner, simulators and search can all work over plain integers.
+"""
+
+from array import array
+from typing import Optional, Union
+from gnosch.scheduler.model import ClusterSpec, TaskGraph, TaskId
+
+
+class CompiledGraph:
+	"""Eg the input datasets of task t are input_values[input_offsets[t] : input_offsets[t + 1]], see inputs(t).
+	Datasets from produced on are external, with producer -1 and size 0"""
+
+	__slots__ = (
+		"task_ids",
+		"task_index",
+		"dataset_ids",
+		"dataset_index",
+		"produced",
+		"memory_mb",
+		"cpus",
+		"runtime_s",
+		"cpusecs",
+		"sizes",
+		"producer",
+		"input_offsets",
+		"input_values",
+		"output_offsets",
+		"output_values",
+		"consumer_offsets",
+		"consumer_values",
+		"order",
+	)
+
+	def __init__(self, task_graph: TaskGraph, allow_external: bool = False):
+		self.task_ids: list[TaskId] = list(task_graph)
+		self.task_index = {task_id: t for t, task_id in enumerate(self.task_ids)}
+		self.dataset_ids: list[str] = []
+		self.dataset_index: dict[str, int] = {}
+		self.memory_mb = array("d", (task.memory_mb for task in task_graph.values()))
+		self.cpus = array("q", (task.prefered_cpus for task in task_graph.values()))
+		self.runtime_s = array("d", (task.runtime_est_s for task in task_graph.values()))
+		self.cpusecs = array("d", (task.cpusecs for task in task_graph.values()))
+		self.sizes = array("d")
+		self.producer = array("q")
+		self.output_offsets = array("q", [0])
+		self.output_values = array("q")
+		for t, task in enumerate(task_graph.values()):
+			for output in task.outputs:
+				d = self.dataset_index.get(output.dataset_id)
+				if d is not None:
+					raise ValueError(
+						f"dataset {output.dataset_id} produced by both {self.task_ids[self.producer[d]]} and {self.task_ids[t]}"
+					)
+				self.output_values.append(self._add_dataset(output.dataset_id, t, output.size_mb))
+			self.output_offsets.append(len(self.output_values))
+		self.produced = len(self.dataset_ids)
+
+		self.input_offsets = array("q", [0])
+		self.input_values = array("q")
+		consumer_counts = array("q", bytes(8 * self.produced))
+		for t, task in enumerate(task_graph.values()):
+			for dataset_id in dict.fromkeys(inp.dataset_id for inp in task.inputs):
+				d = self.dataset_index.get(dataset_id)
+				if d is None:
+					if not allow_external:
+						raise ValueError(f"dataset {dataset_id} consumed by {self.task_ids[t]} has no producer")
+					d = self._add_dataset(dataset_id, -1, 0)
+					consumer_counts.append(0)
+				self.input_values.append(d)
+				consumer_counts[d] += 1
+			self.input_offsets.append(len(self.input_values))
+
+		# counting sort of the (dataset, consumer) pairs
+		self.consumer_offsets = array("q", [0])
+		for count in consumer_counts:
+			self.consumer_offsets.append(self.consumer_offsets[-1] + count)
+		self.consumer_values = array("q", bytes(8 * len(self.input_values)))
+		fill = array("q", self.consumer_offsets[:-1])
+		for t in range(len(self.task_ids)):
+			for d in self.inputs(t):
+				self.consumer_values[fill[d]] = t
+				fill[d] += 1
+		self.order = self._topological_order()
+
+	def _add_dataset(self, dataset_id: str, producer: int, size_mb: float) -> int:
+		d = len(self.dataset_ids)
+		self.dataset_ids.append(dataset_id)
+		self.dataset_index[dataset_id] = d
+		self.producer.append(producer)
+		self.sizes.append(size_mb)
+		return d
+
+	def _topological_order(self) -> array:
+		indegree = array("q", (sum(1 for d in self.inputs(t) if self.producer[d] >= 0) for t in range(len(self.task_ids))))
+		order = array("q", (t for t, degree in enumerate(indegree) if degree == 0))
+		i = 0
+		while i < len(order):
+			for d in self.outputs(order[i]):
+				for consumer in self.consumers(d):
+					indegree[consumer] -= 1
+					if indegree[consumer] == 0:
+						order.append(consumer)
+			i += 1
+		if len(order) < len(self.task_ids):
+			cyclic = sorted(self.task_ids[t] for t, degree in enumerate(indegree) if degree > 0)
+			raise ValueError(f"task graph contains a cycle, involving {cyclic[:8]}")
+		return order
+
+	def __len__(self) -> int:
+		return len(self.task_ids)
+
+	def inputs(self, t: int) -> array:
+		return self.input_values[self.input_offsets[t] : self.input_offsets[t + 1]]
+
+	def outputs(self, t: int) -> array:
+		return self.output_values[self.output_offsets[t] : self.output_offsets[t + 1]]
+
+	def consumers(self, d: int) -> array:
+		return self.consumer_values[self.consumer_offsets[d] : self.consumer_offsets[d + 1]]
+
+	def output_mb(self, t: int) -> float:
+		return sum(self.sizes[d] for d in self.outputs(t))
+
+	def depends(self, consumer: int, producer: int) -> bool:
+		"""Whether consumer directly reads an output of producer"""
+		return any(self.producer[d] == producer for d in self.inputs(consumer))
+
+	def upward_ranks(self, cluster_spec: Optional[ClusterSpec] = None) -> array:
+		"""Length of the longest path from the start of each task to any sink, with transfers at the average link speed"""
+		mean_mbps = _mean_mbps(cluster_spec)
+		ranks = array("d", bytes(8 * len(self.task_ids)))
+		for t in reversed(self.order):
+			tail = 0.0
+			for d in self.outputs(t):
+				comm_s = self.sizes[d] / mean_mbps if mean_mbps else 0.0
+				for consumer in self.consumers(d):
+					tail = max(tail, comm_s + ranks[consumer])
+			ranks[t] = self.runtime_s[t] + tail
+		return ranks
+
+	def downward_ranks(self, cluster_spec: Optional[ClusterSpec] = None) -> array:
+		"""Length of the longest path from any source to the start of each task, with transfers at the average link speed"""
+		mean_mbps = _mean_mbps(cluster_spec)
+		ranks = array("d", bytes(8 * len(self.task_ids)))
+		for t in self.order:
+			head = 0.0
+			for d in self.inputs(t):
+				producer = self.producer[d]
+				if producer >= 0:
+					comm_s = self.sizes[d] / mean_mbps if mean_mbps else 0.0
+					head = max(head, ranks[producer] + self.runtime_s[producer] + comm_s)
+			ranks[t] = head
+		return ranks
+
+	def critical_path_s(self, cluster_spec: Optional[ClusterSpec] = None) -> float:
+		"""A lower bound on the makespan if transfers are ignored, an estimate of it otherwise"""
+		return max(self.upward_ranks(cluster_spec), default=0.0)
+
+
+def _mean_mbps(cluster_spec: Optional[ClusterSpec]) -> float:
+	links = [mbps for mbps in cluster_spec.comm_mbps.values() if mbps > 0] if cluster_spec else []
+	return sum(links) / len(links) if links else 0.0
+
+
+def compiled(task_graph: Union[TaskGraph, CompiledGraph]) -> CompiledGraph:
+	"""Compiles the graph unless it already is"""
+	return task_graph if isinstance(task_graph, CompiledGraph) else CompiledGraph(task_graph)
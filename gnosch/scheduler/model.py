@@ -53,6 +53,18 @@ class ClusterSpec:
 	nodes: dict[NodeName, NodeSpec]
 	comm_mbps: dict[tuple[NodeName, NodeName], float]
 
+	def transfer_s(self, source: NodeName, target: NodeName, size_mb: float) -> float:
+		"""Copy within a node is free, as is a copy over a link missing from comm_mbps (eg single host setups)"""
+		if source == target:
+			return 0.0
+		mbps = self.comm_mbps.get((source, target), None)
+		if mbps is None:
+			return 0.0
+		elif mbps <= 0:
+			return float("inf")
+		else:
+			return size_mb / mbps
+
 
 @dataclass
 class SchedulingCommand:
@@ -61,9 +73,29 @@ class SchedulingCommand:
 	fetch_dataset: Optional[str] = None
 	drop_dataset: Optional[str] = None  # TODO this needs some [task_done] understanding...
 	launch_task: Optional[TaskId] = None
+	# of a drop_dataset, to defer the drop until the fetches of the dataset queued at the other nodes are done, as this copy may be their
+	# source. The queue goes on meanwhile
+	after_fetches: bool = False
 	# TODO constructor validation
 
 
 """The controller is supposed to follow the schedule by issuing the first command in the queue for a node
-whenever the node has (memory) capacity and in case of fetch_dataset it is already available somewhere."""
+whenever the node has (memory) capacity and in case of fetch_dataset it is already available somewhere. A drop_dataset
+waits for the tasks using the dataset at the node to finish -- and if after_fetches, happens only once its fetches elsewhere are done."""
 Schedule = dict[NodeName, list[SchedulingCommand]]
+
+
+@dataclass
+class RunningTask:
+	node: NodeName
+	elapsed_s: float
+	progress: float  # fraction of the task done, as reported by it. 0 if unknown
+
+
+@dataclass
+class ExecutionState:
+	"""Snapshot of a schedule being carried out, as observed by the controller"""
+
+	finished: dict[TaskId, NodeName]
+	running: dict[TaskId, RunningTask]
+	datasets: dict[str, set[NodeName]]  # where the datasets are present, including those being fetched
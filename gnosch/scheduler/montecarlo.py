@@ -0,0 +1,344 @@
+"""
+Batch mode of the simulator -- runs many samples of a single schedule at once, with the actual runtime and
+memory of each task drawn as a multiplicative noise over its estimate. Used to rank schedules by how robust
+they are to bad estimates, rather than by their makespan on paper.
+
+Semantics follow scheduler.simulator, with the node queues still gated by the *declared* memory (as that is
+all the controller knows), while the *actual* memory is tracked to detect when a node would run out of it.
+The state of all samples is held in numpy arrays -- the datasets per (node, dataset) pair the schedule refers to,
+rather than for all nodes and datasets -- and advanced in lockstep, one event per sample per step,
+so the cost is roughly (events per sample) x (samples x tasks) -- fine for thousands of samples of graphs
+with hundreds of tasks.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Optional, Sequence, Union
+import numpy as np
+from gnosch.scheduler.graph import CompiledGraph, compiled
+from gnosch.scheduler.model import ClusterSpec, Schedule, TaskGraph, TaskId
+
+logger = logging.getLogger(__name__)
+
+_END, _FETCH, _DROP, _LAUNCH, _DROP_AFTER_FETCHES = 0, 1, 2, 3, 4
+_eps = 1e-9
+
+
+@dataclass
+class TaskNoise:
+	"""Lognormal multiplicative factors with median 1, eg runtime_sigma=0.5 gives 1.65x or more in 16% of samples"""
+
+	runtime_sigma: float = 0.0
+	memory_sigma: float = 0.0
+
+
+@dataclass
+class MonteCarloResult:
+	makespans: np.ndarray  # inf for samples which could not finish
+	oom: np.ndarray  # whether the sample exceeded the memory of some node at some point
+
+	def percentiles(self, qs: Sequence[float] = (50, 90, 99)) -> dict[float, float]:
+		return {q: float(np.percentile(self.makespans, q)) for q in qs}
+
+	@property
+	def oom_probability(self) -> float:
+		return float(self.oom.mean())
+
+
+class _Ragged:
+	"""Lists of indices per row, as CSR arrays -- eg slots of the inputs per task"""
+
+	def __init__(self, offsets: Sequence[int], values: Sequence[int]):
+		offsets_np = np.array(offsets, dtype=np.int64)
+		self.lengths = np.diff(offsets_np)
+		self.offsets = offsets_np[:-1]
+		self.values = np.array(values, dtype=np.int64)
+
+	@classmethod
+	def of(cls, lists: list[list[int]]) -> "_Ragged":
+		return cls(np.cumsum([0] + [len(values) for values in lists]).tolist(), [value for values in lists for value in values])
+
+	def expand(self, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+		"""For the given rows, returns (position in rows, value) pairs of all their values"""
+		lengths = self.lengths[rows]
+		position = np.repeat(np.arange(rows.size), lengths)
+		within = np.arange(position.size) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+		return position, self.values[self.offsets[rows][position] + within]
+
+
+def sample_factors(
+	task_graph: Union[TaskGraph, CompiledGraph], noise: Union[TaskNoise, dict[TaskId, TaskNoise]], samples: int, seed: Optional[int] = None
+) -> tuple[np.ndarray, np.ndarray]:
+	"""Runtime and memory factors of shape (samples, tasks), tasks in the order of the task_graph"""
+	rng = np.random.default_rng(seed)
+	task_ids = task_graph.task_ids if isinstance(task_graph, CompiledGraph) else list(task_graph)
+	per_task = [noise.get(task_id, TaskNoise()) if isinstance(noise, dict) else noise for task_id in task_ids]
+	runtime_sigma = np.array([n.runtime_sigma for n in per_task], dtype=float)
+	memory_sigma = np.array([n.memory_sigma for n in per_task], dtype=float)
+	shape = (samples, len(per_task))
+	return np.exp(rng.standard_normal(shape) * runtime_sigma), np.exp(rng.standard_normal(shape) * memory_sigma)
+
+
+def simulate_samples(
+	cluster_spec: ClusterSpec,
+	task_graph: Union[TaskGraph, CompiledGraph],
+	schedule: Schedule,
+	runtime_factors: np.ndarray,
+	memory_factors: np.ndarray,
+) -> MonteCarloResult:
+	"""Simulates the schedule once per row of the factors, see sample_factors"""
+	graph = compiled(task_graph)
+	node_names = list(cluster_spec.nodes)
+	node_index = {name: i for i, name in enumerate(node_names)}
+	task_index, dataset_index = graph.task_index, graph.dataset_index
+	S, N, T, D = runtime_factors.shape[0], len(node_names), len(graph), len(graph.dataset_ids)
+
+	# static tables
+	cpus = np.array([spec.cpus for spec in cluster_spec.nodes.values()], dtype=float)
+	memory = np.array([spec.memory_mb for spec in cluster_spec.nodes.values()], dtype=float)
+	ds_size = np.array(graph.sizes, dtype=float)
+	cpusecs = np.array(graph.cpusecs, dtype=float)
+	task_mem = np.array(graph.memory_mb, dtype=float)
+	out_size = np.array([graph.output_mb(t) for t in range(T)], dtype=float)
+	# bandwidth[source, target], inf for the untimed links, which complete instantly
+	bandwidth = np.full((N, N), np.inf)
+	for (source, target), mbps in cluster_spec.comm_mbps.items():
+		bandwidth[node_index[source], node_index[target]] = max(mbps, 0.0)
+
+	# command tables, padded with _END. Datasets at a node are tracked per slot, ie, per (node, dataset) pair the
+	# schedule refers to -- as launches, fetches and drops at the node -- rather than for all nodes and datasets
+	width = max((len(commands) for commands in schedule.values()), default=0) + 1
+	kind = np.zeros((N, width), dtype=np.int8)
+	arg = np.zeros((N, width), dtype=np.int64)
+	slots: dict[tuple[int, int], int] = {}
+	fetch_slot: list[int] = []
+	deferred_slot: list[int] = []  # of the drops after fetches
+	task_node = np.zeros(T, dtype=np.int64)
+	launched: list[int] = []
+	for name, commands in schedule.items():
+		n = node_index[name]
+		for c, command in enumerate(commands):
+			if command.fetch_dataset:
+				kind[n, c], arg[n, c] = _FETCH, len(fetch_slot)
+				fetch_slot.append(slots.setdefault((n, dataset_index[command.fetch_dataset]), len(slots)))
+			elif command.drop_dataset and command.after_fetches:
+				kind[n, c], arg[n, c] = _DROP_AFTER_FETCHES, len(deferred_slot)
+				deferred_slot.append(slots.setdefault((n, dataset_index[command.drop_dataset]), len(slots)))
+			elif command.drop_dataset:
+				kind[n, c], arg[n, c] = _DROP, slots.setdefault((n, dataset_index[command.drop_dataset]), len(slots))
+			elif command.launch_task:
+				t = task_index[command.launch_task]
+				kind[n, c], arg[n, c] = _LAUNCH, t
+				task_node[t] = n
+				launched.append(t)
+	in_slots: list[list[int]] = [[] for _ in range(T)]
+	out_slots: list[list[int]] = [[] for _ in range(T)]
+	for t in launched:
+		n = int(task_node[t])
+		in_slots[t] = [slots.setdefault((n, d), len(slots)) for d in graph.inputs(t)]
+		out_slots[t] = [slots.setdefault((n, d), len(slots)) for d in graph.outputs(t)]
+	inputs = _Ragged.of(in_slots)
+	outputs = _Ragged.of(out_slots)
+	slot_node = np.array([n for n, _ in slots], dtype=np.int64)
+	slot_ds = np.array([d for _, d in slots], dtype=np.int64)
+	slot_size = ds_size[slot_ds]
+	# the other slots of the dataset of each fetch, best source first -- ties go to the first by name, as in the simulator
+	holders: dict[int, list[tuple[int, int]]] = {}
+	for (n, d), holder_slot in slots.items():
+		holders.setdefault(d, []).append((n, holder_slot))
+	sources = _Ragged.of(
+		[
+			[slot for n, slot in sorted(holders[slot_ds[f]], key=lambda h: (-bandwidth[h[0], slot_node[f]], node_names[h[0]])) if slot != f]
+			for f in fetch_slot
+		]
+	)
+	F, P = len(fetch_slot), len(slots)
+	f_slot = np.array(fetch_slot, dtype=np.int64)
+	f_target, f_ds, f_size = slot_node[f_slot], slot_ds[f_slot], slot_size[f_slot]
+	r_slot = np.array(deferred_slot, dtype=np.int64)
+	r_ds, r_node = slot_ds[r_slot], slot_node[r_slot]
+
+	# per sample state
+	clock = np.zeros(S)
+	cursor = np.zeros((S, N), dtype=np.int64)
+	present = np.zeros((S, P), dtype=bool)
+	incoming = np.zeros((S, P), dtype=bool)
+	in_use = np.zeros((S, P), dtype=np.int32)
+	free_mb = np.tile(memory, (S, 1))  # declared
+	used_mb = np.zeros((S, N))  # actual
+	oom = np.zeros(S, dtype=bool)
+	remaining = np.zeros((S, T))
+	work = cpusecs[None, :] * runtime_factors
+	actual_mem = task_mem[None, :] * memory_factors
+	t_remaining = np.zeros((S, F))
+	t_source = np.zeros((S, F), dtype=np.int64)
+	pending = np.tile(np.bincount(f_ds, minlength=D), (S, 1))  # fetches of the datasets queued or in transfer
+	deferred = np.zeros((S, len(deferred_slot)), dtype=bool)  # drops reached, waiting for the fetches
+	# (sample, task) of the running tasks and (sample, fetch) of the active transfers, as appended by proceed
+	started_tasks: list[tuple[np.ndarray, np.ndarray]] = []
+	started_transfers: list[tuple[np.ndarray, np.ndarray]] = []
+	rs, rt = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+	fs, ff = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+	def drop(s: np.ndarray, slot: np.ndarray) -> None:
+		gone = present[s, slot]
+		s, slot = s[gone], slot[gone]
+		present[s, slot] = False
+		np.add.at(free_mb, (s, slot_node[slot]), slot_size[slot])
+		np.subtract.at(used_mb, (s, slot_node[slot]), slot_size[slot])
+
+	def fetched(s: np.ndarray, ds: np.ndarray) -> None:
+		"""Carries out the drops deferred until the last fetch"""
+		np.subtract.at(pending, (s, ds), 1)
+		s = np.unique(s[pending[s, ds] == 0])
+		if s.size and deferred.shape[1]:
+			row, r = np.nonzero(deferred[s] & (pending[s][:, r_ds] == 0))
+			deferred[s[row], r] = False
+			drop(s[row], r_slot[r])
+			touched[s[row], r_node[r]] = True
+
+	def proceed(n: int, candidates: np.ndarray) -> None:
+		"""Advances the cursors of node n as far as possible in the candidate samples"""
+		idx_all = candidates
+		while idx_all.size:
+			c = cursor[idx_all, n]
+			k, a = kind[n, c], arg[n, c]
+			advance = np.zeros(idx_all.size, dtype=bool)
+
+			sel = np.nonzero(k == _FETCH)[0]
+			if sel.size:
+				idx, f = idx_all[sel], a[sel]
+				target = f_slot[f]
+				have = present[idx, target] | incoming[idx, target]
+				# the first source holding the dataset, if any
+				row, source_slot = sources.expand(f)
+				held = np.nonzero(present[idx[row], source_slot])[0]
+				first = np.full(f.size, row.size)
+				np.minimum.at(first, row[held], held)
+				found = first < row.size
+				source = np.zeros(f.size, dtype=np.int64)
+				source[found] = slot_node[source_slot[first[found]]]
+				size = f_size[f]
+				start = ~have & found & (free_mb[idx, n] >= size)
+				instant = start & np.isinf(bandwidth[source, n])
+				timed = start & ~instant
+				ti, tf = idx[timed], f[timed]
+				present[idx[instant], target[instant]] = True
+				incoming[ti, target[timed]] = True
+				t_remaining[ti, tf] = size[timed]
+				t_source[ti, tf] = source[timed]
+				started_transfers.append((ti, tf))
+				free_mb[idx[start], n] -= size[start]
+				used_mb[idx[start], n] += size[start]
+				advance[sel[have | start]] = True
+				fetched(idx[have | instant], f_ds[f[have | instant]])
+
+			sel = np.nonzero((k == _DROP) | (k == _DROP_AFTER_FETCHES))[0]
+			if sel.size:
+				after = k[sel] == _DROP_AFTER_FETCHES
+				idx, slot = idx_all[sel], a[sel].copy()
+				slot[after] = r_slot[a[sel][after]]
+				ok = ~incoming[idx, slot] & (in_use[idx, slot] == 0)
+				wait = ok & after & (pending[idx, slot_ds[slot]] > 0)
+				deferred[idx[wait], a[sel][wait]] = True
+				now = ok & ~wait
+				drop(idx[now], slot[now])
+				advance[sel[ok]] = True
+
+			sel = np.nonzero(k == _LAUNCH)[0]
+			if sel.size:
+				idx, t = idx_all[sel], a[sel]
+				row, slot = inputs.expand(t)
+				missing = np.bincount(row[~present[idx[row], slot]], minlength=t.size)
+				go = (missing == 0) & (task_mem[t] <= free_mb[idx, n])
+				gi, gt = idx[go], t[go]
+				remaining[gi, gt] = work[gi, gt]
+				started_tasks.append((gi, gt))
+				free_mb[gi, n] -= task_mem[gt]
+				used_mb[gi, n] += actual_mem[gi, gt]
+				row, slot = inputs.expand(gt)
+				np.add.at(in_use, (gi[row], slot), 1)
+				advance[sel[go]] = True
+
+			idx_all = idx_all[advance]
+			cursor[idx_all, n] += 1
+			oom[idx_all] |= used_mb[idx_all, n] > memory[n] * (1 + _eps)
+
+	# which nodes of which samples may be able to proceed -- those with an event since, or waiting for a new dataset.
+	# A node unblocks another at the same instant only by an instant fetch, so the passes over the nodes repeat until none
+	touched = np.ones((S, N), dtype=bool)
+	while True:
+		while touched.any():
+			passing = touched.copy()
+			touched[:] = False
+			for n in range(N):
+				proceed(n, np.nonzero(passing[:, n])[0])
+
+		# time to the next event of each sample, computed over the running tasks and active transfers only
+		rs = np.concatenate([rs] + [e[0] for e in started_tasks])
+		rt = np.concatenate([rt] + [e[1] for e in started_tasks])
+		fs = np.concatenate([fs] + [e[0] for e in started_transfers])
+		ff = np.concatenate([ff] + [e[1] for e in started_transfers])
+		started_tasks.clear()
+		started_transfers.clear()
+		rn = task_node[rt]
+		tasks_on = np.bincount(rs * N + rn, minlength=S * N)
+		task_rate = cpus[rn] / tasks_on[rs * N + rn]
+		dt = np.full(S, np.inf)
+		np.minimum.at(dt, rs, remaining[rs, rt] / task_rate)
+		link = t_source[fs, ff] * N + f_target[ff]
+		on_link = np.bincount(fs * N * N + link, minlength=S * N * N)
+		transfer_rate = bandwidth[t_source[fs, ff], f_target[ff]] / on_link[fs * N * N + link]
+		moving = transfer_rate > 0
+		np.minimum.at(dt, fs[moving], t_remaining[fs[moving], ff[moving]] / transfer_rate[moving])
+		live = np.isfinite(dt)
+		if not live.any():
+			break
+		dt = np.where(live, dt, 0.0)
+		clock += dt
+
+		remaining[rs, rt] -= dt[rs] * task_rate
+		done = remaining[rs, rt] <= _eps * np.maximum(work[rs, rt], 1.0)
+		if done.any():
+			s, t, tn = rs[done], rt[done], rn[done]
+			np.add.at(free_mb, (s, tn), task_mem[t] - out_size[t])
+			np.add.at(used_mb, (s, tn), out_size[t] - actual_mem[s, t])
+			row, slot = inputs.expand(t)
+			np.subtract.at(in_use, (s[row], slot), 1)
+			row, slot = outputs.expand(t)
+			present[s[row], slot] = True
+			oom[s] |= used_mb[s, tn] > memory[tn] * (1 + _eps)
+			touched[s, tn] = True
+			# new datasets may unblock fetches elsewhere
+			touched[s] |= kind[np.arange(N)[None, :], cursor[s]] == _FETCH
+			rs, rt = rs[~done], rt[~done]
+		if fs.size:
+			t_remaining[fs, ff] -= dt[fs] * transfer_rate
+			arrived = t_remaining[fs, ff] <= _eps * np.maximum(f_size[ff], 1.0)
+			if arrived.any():
+				s, f = fs[arrived], ff[arrived]
+				incoming[s, f_slot[f]] = False
+				present[s, f_slot[f]] = True
+				touched[s, f_target[f]] = True
+				touched[s] |= kind[np.arange(N)[None, :], cursor[s]] == _FETCH
+				fetched(s, f_ds[f])
+				fs, ff = fs[~arrived], ff[~arrived]
+
+	lengths = np.array([len(schedule.get(name, [])) for name in node_names], dtype=np.int64)
+	stuck = (cursor < lengths[None, :]).any(axis=1)
+	if stuck.any():
+		logger.warning(f"{int(stuck.sum())} of {S} samples could not finish the schedule")
+	return MonteCarloResult(makespans=np.where(stuck, np.inf, clock), oom=oom)
+
+
+def monte_carlo(
+	cluster_spec: ClusterSpec,
+	task_graph: Union[TaskGraph, CompiledGraph],
+	schedule: Schedule,
+	noise: Union[TaskNoise, dict[TaskId, TaskNoise]],
+	samples: int = 1000,
+	seed: Optional[int] = None,
+) -> MonteCarloResult:
+	graph = compiled(task_graph)
+	runtime_factors, memory_factors = sample_factors(graph, noise, samples, seed)
+	return simulate_samples(cluster_spec, graph, schedule, runtime_factors, memory_factors)
@@ -0,0 +1,358 @@
+"""
+List scheduler behind scheduler.api -- a HEFT-like heuristic.
+
+Tasks are ordered by their upward rank (the longest path to the end of the dag, counting in the expected
+transfers) and each is appended to the queue of the node where it is estimated to finish the earliest,
+given the node's cpus and memory and the location of the task's inputs. Inputs not present at the chosen
+node get a fetch_dataset right before the launch, and replicas no longer needed by any task get dropped
+right after their last local consumer.
+
+Only a handful of nodes is evaluated per task -- those already holding its inputs and the least loaded
+ones -- so that planning stays roughly linear in the number of tasks.
+"""
+
+import bisect
+import heapq
+import logging
+from collections import defaultdict
+from typing import Optional, Union
+from gnosch.scheduler.graph import CompiledGraph, compiled
+from gnosch.scheduler.model import ClusterSpec, ExecutionState, NodeName, NodeSpec, Schedule, SchedulingCommand, TaskGraph, TaskId
+
+logger = logging.getLogger(__name__)
+
+# how many of the least loaded nodes are evaluated for a task, besides those holding its inputs
+least_loaded_candidates = 4
+
+
+class _NodePlan:
+	"""Command queue of a node, together with the resources estimated to be in use by the time the
+	next task in the queue gets launched. Since the queue is followed in order, launches are monotonic"""
+
+	__slots__ = (
+		"name",
+		"spec",
+		"commands",
+		"drops_after",
+		"last_start_s",
+		"running",
+		"cpus_used",
+		"tasks_mb",
+		"datasets",
+		"datasets_mb",
+		"load_s",
+	)
+
+	def __init__(self, name: NodeName, spec: NodeSpec):
+		self.name = name
+		self.spec = spec
+		self.commands: list[SchedulingCommand] = []
+		self.drops_after: dict[int, list[SchedulingCommand]] = defaultdict(list)
+		self.last_start_s = 0.0
+		self.running: list[tuple[float, int, float]] = []  # (finish_s, cpus, memory_mb), sorted
+		self.cpus_used = 0
+		self.tasks_mb = 0.0
+		self.datasets: dict[int, float] = {}
+		self.datasets_mb = 0.0
+		self.load_s = 0.0
+
+	def cpus_for(self, prefered_cpus: int) -> int:
+		return max(1, min(prefered_cpus, self.spec.cpus))
+
+	def earliest_start(self, cpus: int, ready_s: float, memory_mb: float) -> Optional[float]:
+		"""When could a task using cpus be launched if it needs memory_mb for itself and its datasets. None if never"""
+		if self.datasets_mb + memory_mb > self.spec.memory_mb:
+			return None
+		start = max(ready_s, self.last_start_s)
+		cpus_free = self.spec.cpus - self.cpus_used
+		mem_free = self.spec.memory_mb - self.datasets_mb - self.tasks_mb
+		for finish_s, task_cpus, task_mb in self.running:
+			if finish_s > start:
+				if cpus_free >= cpus and mem_free >= memory_mb:
+					break
+				start = finish_s
+			cpus_free += task_cpus
+			mem_free += task_mb
+		return start
+
+	def launch(self, task_id: TaskId, cpus: int, memory_mb: float, cpusecs: float, start: float, finish: float) -> int:
+		finished = bisect.bisect_right(self.running, (start, float("inf"), float("inf")))
+		for _, task_cpus, task_mb in self.running[:finished]:
+			self.cpus_used -= task_cpus
+			self.tasks_mb -= task_mb
+		del self.running[:finished]
+		bisect.insort(self.running, (finish, cpus, memory_mb))
+		self.cpus_used += cpus
+		self.tasks_mb += memory_mb
+		self.last_start_s = start
+		self.load_s += cpusecs / max(1, self.spec.cpus)
+		self.commands.append(SchedulingCommand(launch_task=task_id))
+		return len(self.commands) - 1
+
+	def add_dataset(self, d: int, size_mb: float) -> None:
+		self.datasets[d] = size_mb
+		self.datasets_mb += size_mb
+
+	def drop_dataset_after(self, index: int, d: int, dataset_id: str, after_fetches: bool = False) -> None:
+		self.drops_after[index].append(SchedulingCommand(drop_dataset=dataset_id, after_fetches=after_fetches))
+		self.datasets_mb -= self.datasets.pop(d)
+
+	def materialize(self) -> list[SchedulingCommand]:
+		# drops after -1 are of datasets present before the queue starts
+		commands = list(self.drops_after.get(-1, ()))
+		for i, command in enumerate(self.commands):
+			commands.append(command)
+			commands.extend(self.drops_after.get(i, ()))
+		return commands
+
+
+class _Planner:
+	def __init__(self, graph: CompiledGraph, cluster_spec: ClusterSpec):
+		self.graph = graph
+		self.cluster_spec = cluster_spec
+		self.nodes = {name: _NodePlan(name, spec) for name, spec in cluster_spec.nodes.items()}
+		self.loads = [(0.0, name) for name in self.nodes]
+		heapq.heapify(self.loads)
+		self.replicas: dict[int, dict[NodeName, float]] = {}  # dataset -> node -> available since
+		self.producer_node: dict[int, NodeName] = {}
+		self.pending_consumers = [graph.consumer_offsets[d + 1] - graph.consumer_offsets[d] for d in range(len(graph.dataset_ids))]
+		self.last_use: dict[int, dict[NodeName, int]] = defaultdict(dict)  # dataset -> node -> index of last launch using it
+
+	def candidates(self, inputs: list[tuple[int, float, NodeName, float]]) -> dict[NodeName, None]:
+		names: dict[NodeName, None] = {}
+		for _, _, producer_node, _ in inputs:
+			names[producer_node] = None
+		least_loaded: list[tuple[float, NodeName]] = []
+		while self.loads and len(least_loaded) < least_loaded_candidates:
+			load, name = heapq.heappop(self.loads)
+			if load == self.nodes[name].load_s:
+				least_loaded.append((load, name))
+			# else stale entry, superseded by a later push
+		for entry in least_loaded:
+			heapq.heappush(self.loads, entry)
+			names[entry[1]] = None
+		return names
+
+	def evaluate(
+		self, t: int, inputs: list[tuple[int, float, NodeName, float]], memory_mb: float, node: _NodePlan
+	) -> Optional[tuple[float, float, float]]:
+		"""Returns (finish_s, start_s, fetched_mb) of the task if launched next at the node, or None if it does not fit.
+		Inputs are (dataset, size_mb, producer_node, produced_s) -- fetches are estimated from the producer only"""
+		ready_s = 0.0
+		fetched_mb = 0.0
+		for d, size_mb, producer_node, produced_s in inputs:
+			if d in node.datasets:
+				arrival_s = self.replicas[d][node.name]
+			else:
+				arrival_s = produced_s + self.cluster_spec.transfer_s(producer_node, node.name, size_mb)
+				fetched_mb += size_mb
+			if arrival_s > ready_s:
+				ready_s = arrival_s
+		cpus = node.cpus_for(self.graph.cpus[t])
+		start = node.earliest_start(cpus, ready_s, memory_mb + fetched_mb)
+		if start is None:
+			return None
+		return start + self.graph.cpusecs[t] / cpus, start, fetched_mb
+
+	def sources(self, t: int) -> list[tuple[int, float, NodeName, float]]:
+		inputs = []
+		for d in self.graph.inputs(t):
+			producer_node = self.producer_node[d]
+			inputs.append((d, self.graph.sizes[d], producer_node, self.replicas[d][producer_node]))
+		return inputs
+
+	def place(self, t: int) -> None:
+		graph = self.graph
+		inputs = self.sources(t)
+		memory_mb = graph.memory_mb[t] + graph.output_mb(t)
+		best: Optional[tuple[float, float, float, _NodePlan]] = None
+		candidates = self.candidates(inputs)
+		for name in candidates:
+			estimate = self.evaluate(t, inputs, memory_mb, self.nodes[name])
+			if estimate and (best is None or (estimate[0], estimate[2]) < best[:2]):
+				best = (estimate[0], estimate[2], estimate[1], self.nodes[name])
+		if best is None:
+			# the usual candidates are full, fall back to all nodes
+			for name, node in self.nodes.items():
+				estimate = None if name in candidates else self.evaluate(t, inputs, memory_mb, node)
+				if estimate and (best is None or (estimate[0], estimate[2]) < best[:2]):
+					best = (estimate[0], estimate[2], estimate[1], node)
+		if best is None:
+			raise ValueError(f"task {graph.task_ids[t]} does not fit on any node")
+		finish, _, start, node = best
+		self.commit(t, node, start, finish)
+
+	def assign(self, t: int, name: NodeName) -> None:
+		"""Places the task at the given node, eg to keep it where an earlier plan had it"""
+		node = self.nodes[name]
+		estimate = self.evaluate(t, self.sources(t), self.graph.memory_mb[t] + self.graph.output_mb(t), node)
+		if estimate is None:
+			# over the memory estimate, so assume it waits for everything at the node to finish
+			start = max([node.last_start_s] + [finish_s for finish_s, _, _ in node.running])
+			estimate = (start + self.graph.cpusecs[t] / node.cpus_for(self.graph.cpus[t]), start, 0.0)
+		self.commit(t, node, estimate[1], estimate[0])
+
+	def add_running(self, t: int, name: NodeName, finish_s: float) -> None:
+		"""A task launched by an earlier plan, expected to finish at finish_s"""
+		node = self.nodes[name]
+		cpus = node.cpus_for(self.graph.cpus[t])
+		bisect.insort(node.running, (finish_s, cpus, self.graph.memory_mb[t]))
+		node.cpus_used += cpus
+		node.tasks_mb += self.graph.memory_mb[t]
+		node.load_s += finish_s * cpus / max(1, node.spec.cpus)
+		heapq.heappush(self.loads, (node.load_s, name))
+		for d in self.graph.outputs(t):
+			node.add_dataset(d, self.graph.sizes[d])
+			self.replicas[d] = {name: finish_s}
+			self.producer_node[d] = name
+		for d in self.graph.inputs(t):
+			self.pending_consumers[d] -= 1
+
+	def add_replica(self, d: int, name: NodeName, is_source: bool = False) -> None:
+		"""A dataset already present at the node. Fetches are estimated from the copy marked as the source, if any"""
+		if d not in self.nodes[name].datasets:
+			self.nodes[name].add_dataset(d, self.graph.sizes[d])
+		self.replicas.setdefault(d, {})[name] = 0.0
+		if d not in self.producer_node or is_source:
+			self.producer_node[d] = name
+
+	def commit(self, t: int, node: _NodePlan, start: float, finish: float) -> None:
+		graph = self.graph
+		inputs = graph.inputs(t)
+		for d in inputs:
+			if d not in node.datasets:
+				producer_node = self.producer_node[d]
+				size_mb = graph.sizes[d]
+				arrival = self.replicas[d][producer_node] + self.cluster_spec.transfer_s(producer_node, node.name, size_mb)
+				node.commands.append(SchedulingCommand(fetch_dataset=graph.dataset_ids[d]))
+				node.add_dataset(d, size_mb)
+				self.replicas[d][node.name] = arrival
+		index = node.launch(graph.task_ids[t], node.cpus_for(graph.cpus[t]), graph.memory_mb[t], graph.cpusecs[t], start, finish)
+		heapq.heappush(self.loads, (node.load_s, node.name))
+		for d in graph.outputs(t):
+			node.add_dataset(d, graph.sizes[d])
+			self.replicas[d] = {node.name: finish}
+			self.producer_node[d] = node.name
+		for d in inputs:
+			self.last_use[d][node.name] = index
+			self.pending_consumers[d] -= 1
+			if self.pending_consumers[d] == 0:
+				self.release(d)
+
+	def release(self, d: int) -> None:
+		"""All consumers of the dataset are placed, so its replicas can go after their last local use. The producer's
+		copy, if fetched by others, goes after everything queued at its node so far, and once the fetches are done"""
+		producer_node = self.producer_node[d]
+		fetched = len(self.replicas[d]) > 1
+		for name, index in self.last_use.pop(d).items():
+			if name != producer_node or not fetched:
+				self.nodes[name].drop_dataset_after(index, d, self.graph.dataset_ids[d])
+		if fetched:
+			node = self.nodes[producer_node]
+			node.drop_dataset_after(len(node.commands) - 1, d, self.graph.dataset_ids[d], after_fetches=True)
+
+	def schedule(self) -> Schedule:
+		return {name: node.materialize() for name, node in self.nodes.items()}
+
+
+def materialize(
+	task_graph: Union[TaskGraph, CompiledGraph], assignment: dict[NodeName, list[TaskId]], state: Optional[ExecutionState] = None
+) -> Schedule:
+	"""Schedule launching the tasks in the given order per node, with fetches of the inputs not present locally
+	right before their first local use, and drops right after the last local use -- unless another node may still
+	need to fetch the dataset from here. Thus fetched replicas always go, locally produced datasets only if not
+	consumed by other nodes, and sinks are kept.
+
+	If the state is given, the assignment covers only the tasks yet to be launched, and datasets present at a node
+	but no longer needed there get dropped at the start of its queue"""
+	graph = compiled(task_graph)
+	placement: dict[int, NodeName] = {}
+	present_at: dict[NodeName, set[int]] = defaultdict(set)  # datasets present or due at the nodes, before the assignment starts
+	holders: dict[int, set[NodeName]] = defaultdict(set)  # the same, by dataset
+	finished: set[int] = set()
+	if state:
+		for task_id, node in state.finished.items():
+			placement[graph.task_index[task_id]] = node
+			finished.add(graph.task_index[task_id])
+		for task_id, running in state.running.items():
+			t = graph.task_index[task_id]
+			placement[t] = running.node
+			for d in graph.outputs(t):
+				present_at[running.node].add(d)
+				holders[d].add(running.node)
+		for dataset_id, nodes in state.datasets.items():
+			for node in nodes:
+				present_at[node].add(graph.dataset_index[dataset_id])
+				holders[graph.dataset_index[dataset_id]].add(node)
+	pending: set[int] = set()
+	for node, task_ids in assignment.items():
+		for task_id in task_ids:
+			placement[graph.task_index[task_id]] = node
+			pending.add(graph.task_index[task_id])
+
+	needy_cache: dict[int, tuple[Optional[NodeName], set[NodeName], set[NodeName]]] = {}
+
+	def needy(d: int) -> tuple[Optional[NodeName], set[NodeName], set[NodeName]]:
+		"""(producer node, nodes that will hold the dataset without fetching it, nodes that will fetch it)"""
+		if d not in needy_cache:
+			producer = graph.producer[d]
+			producer_node = placement.get(producer) if producer >= 0 else None
+			sources = set(holders.get(d, ()))
+			if producer_node is not None and producer not in finished:
+				sources.add(producer_node)
+			fetching = {placement[consumer] for consumer in graph.consumers(d) if consumer in pending} - sources
+			needy_cache[d] = (producer_node, sources, fetching)
+		return needy_cache[d]
+
+	def droppable(d: int, node: NodeName) -> bool:
+		if graph.consumer_offsets[d] == graph.consumer_offsets[d + 1]:
+			return False
+		producer_node, sources, fetching = needy(d)
+		# nobody else needs it from here, or the producer keeps its copy as the source for the others
+		return not (fetching - {node}) or (node != producer_node and producer_node in sources and bool(fetching - {producer_node}))
+
+	schedule: Schedule = {}
+	for node, task_ids in assignment.items():
+		tasks = [graph.task_index[task_id] for task_id in task_ids]
+		last_use: dict[int, int] = {}
+		for i, t in enumerate(tasks):
+			for d in graph.inputs(t):
+				last_use[d] = i
+		present = set(present_at.get(node, ()))
+		commands = []
+		if state:
+			due = {d for t in state.running if placement[graph.task_index[t]] == node for d in graph.outputs(graph.task_index[t])}
+			for d in sorted(present - last_use.keys() - due):
+				if droppable(d, node):
+					commands.append(SchedulingCommand(drop_dataset=graph.dataset_ids[d]))
+		for i, t in enumerate(tasks):
+			inputs = graph.inputs(t)
+			for d in inputs:
+				if d not in present:
+					commands.append(SchedulingCommand(fetch_dataset=graph.dataset_ids[d]))
+					present.add(d)
+			commands.append(SchedulingCommand(launch_task=task_ids[i]))
+			present.update(graph.outputs(t))
+			for d in inputs:
+				if last_use[d] == i and droppable(d, node):
+					commands.append(SchedulingCommand(drop_dataset=graph.dataset_ids[d]))
+		schedule[node] = commands
+	return schedule
+
+
+def plan(task_graph: Union[TaskGraph, CompiledGraph], cluster_spec: ClusterSpec) -> Schedule:
+	if not cluster_spec.nodes:
+		raise ValueError("cluster has no nodes")
+	graph = compiled(task_graph)
+	if graph.produced < len(graph.dataset_ids):
+		raise ValueError(f"dataset {graph.dataset_ids[graph.produced]} has no producer")
+	ranks = graph.upward_ranks(cluster_spec)
+	position = [0] * len(graph)
+	for i, t in enumerate(graph.order):
+		position[t] = i
+	planner = _Planner(graph, cluster_spec)
+	# ties in rank are possible only for zero-cost edges, where the topological position keeps producers first
+	for t in sorted(graph.order, key=lambda t: (-ranks[t], position[t])):
+		planner.place(t)
+	logger.debug(f"planned {len(graph)} tasks over {len(planner.nodes)} nodes")
+	return planner.schedule()
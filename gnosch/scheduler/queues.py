@@ -0,0 +1,166 @@
+"""
+Following of the command queues of a schedule, as scheduler.model documents: a fetch once the dataset is somewhere and
+fits, a drop once no running task at the node uses the dataset (and if after_fetches, once the others have fetched it),
+a launch once its inputs are at the node and it fits.
+
+Shared by scheduler.simulator, which carries out the fetches and launches as timed events, and by the controller's
+executor, which carries them out at the workers -- so that what gets simulated is what gets executed.
+"""
+
+from typing import Generic, Iterable, Optional, TypeVar
+from gnosch.scheduler.graph import CompiledGraph
+from gnosch.scheduler.model import ClusterSpec, NodeName, SchedulingCommand
+
+FETCH, DROP, LAUNCH, DROP_AFTER_FETCHES = 0, 1, 2, 3
+
+
+class NodeQueue:
+	"""Memory and datasets of a node, plus a cursor into its command queue. The queue is kept as (kind, task or
+	dataset index) pairs, resolved against the compiled graph upfront"""
+
+	__slots__ = ("name", "commands", "queue", "cursor", "datasets", "incoming", "in_use", "free_mb")
+
+	def __init__(self, name: NodeName, commands: list[SchedulingCommand], graph: CompiledGraph, memory_mb: float):
+		self.name = name
+		self.commands = commands
+		self.queue = [_resolve(command, graph) for command in commands]
+		self.cursor = 0
+		self.datasets: dict[int, float] = {}
+		self.incoming: dict[int, float] = {}  # datasets being transfered in, their memory is already reserved
+		self.in_use: dict[int, int] = {}  # dataset -> number of running tasks reading it
+		self.free_mb = float(memory_mb)
+
+
+def _resolve(command: SchedulingCommand, graph: CompiledGraph) -> tuple[int, int]:
+	try:
+		if command.fetch_dataset:
+			return FETCH, graph.dataset_index[command.fetch_dataset]
+		elif command.drop_dataset:
+			return DROP_AFTER_FETCHES if command.after_fetches else DROP, graph.dataset_index[command.drop_dataset]
+		elif command.launch_task:
+			return LAUNCH, graph.task_index[command.launch_task]
+	except KeyError as e:
+		raise ValueError(f"{command} refers to {e} not in the task graph") from e
+	raise ValueError(f"empty command {command}")
+
+
+Node = TypeVar("Node", bound=NodeQueue)
+
+
+class QueueFollower(Generic[Node]):
+	"""Issues the commands of the nodes' queues in order, each once the node can proceed with it. The subclasses
+	carry them out by start_fetch, launch and dropped, and report back by finish_fetch and finish_task"""
+
+	def __init__(self, cluster_spec: ClusterSpec, graph: CompiledGraph, nodes: dict[NodeName, Node]):
+		self.cluster_spec = cluster_spec
+		self.graph = graph
+		self.nodes = nodes
+		self.holders: dict[int, set[NodeName]] = {}
+		self.awaiting: dict[int, set[NodeName]] = {}  # dataset -> nodes blocked on fetching it before it exists anywhere
+		self.pending_fetches: dict[int, int] = {}  # dataset -> fetches of it queued or in transfer
+		for node in nodes.values():
+			for kind, i in node.queue:
+				if kind == FETCH:
+					self.pending_fetches[i] = self.pending_fetches.get(i, 0) + 1
+		self.draining: dict[int, set[NodeName]] = {}  # dataset -> nodes to drop it once fetched by the others
+
+	def start_fetch(self, d: int, source: NodeName, target: Node, woken: set[NodeName]) -> None:
+		"""Of the dataset into target.incoming, from the source holding it"""
+		raise NotImplementedError
+
+	def launch(self, t: int, node: Node) -> None:
+		raise NotImplementedError
+
+	def dropped(self, d: int, node: Node) -> None:
+		"""Once the dataset is gone from the node's accounting"""
+
+	def add_holder(self, d: int, node: NodeName, woken: set[NodeName]) -> None:
+		self.holders.setdefault(d, set()).add(node)
+		woken.update(self.awaiting.pop(d, ()))
+
+	def finish_task(self, node: Node, t: int, woken: set[NodeName]) -> None:
+		graph = self.graph
+		node.free_mb += graph.memory_mb[t]
+		for d in graph.inputs(t):
+			node.in_use[d] -= 1
+		for d in graph.outputs(t):
+			node.datasets[d] = graph.sizes[d]
+			node.free_mb -= graph.sizes[d]
+			self.add_holder(d, node.name, woken)
+		woken.add(node.name)
+
+	def finish_fetch(self, d: int, target: Node, woken: set[NodeName]) -> None:
+		target.datasets[d] = target.incoming.pop(d)
+		self.add_holder(d, target.name, woken)
+		self.fetched(d, woken)
+		woken.add(target.name)
+
+	def drop(self, d: int, node: Node) -> None:
+		if d in node.datasets:
+			node.free_mb += node.datasets.pop(d)
+			self.holders[d].discard(node.name)
+			self.dropped(d, node)
+
+	def fetched(self, d: int, woken: set[NodeName]) -> None:
+		self.pending_fetches[d] -= 1
+		if not self.pending_fetches[d]:
+			for name in self.draining.pop(d, ()):
+				self.drop(d, self.nodes[name])
+				woken.add(name)
+
+	def proceed(self, node: Node, woken: set[NodeName]) -> bool:
+		"""Issues commands until the first one the node can't yet proceed with. True if it launched any"""
+		graph = self.graph
+		launched = False
+		while node.cursor < len(node.queue):
+			kind, i = node.queue[node.cursor]
+			if kind == FETCH:
+				size = graph.sizes[i]
+				if i in node.datasets or i in node.incoming:
+					self.fetched(i, woken)
+				elif not self.holders.get(i):
+					self.awaiting.setdefault(i, set()).add(node.name)
+					break
+				elif node.free_mb < size:
+					break
+				else:
+					node.free_mb -= size
+					node.incoming[i] = size
+					self.start_fetch(i, fastest_source(self.cluster_spec, self.holders[i], node.name), node, woken)
+			elif kind == DROP or kind == DROP_AFTER_FETCHES:
+				# the dataset can go only once no running task uses it
+				if i in node.incoming or node.in_use.get(i, 0) > 0:
+					break
+				if kind == DROP_AFTER_FETCHES and self.pending_fetches.get(i, 0) > 0:
+					# deferred, the queue goes on meanwhile
+					self.draining.setdefault(i, set()).add(node.name)
+				else:
+					self.drop(i, node)
+			else:
+				inputs = graph.inputs(i)
+				if any(d not in node.datasets for d in inputs) or graph.memory_mb[i] > node.free_mb:
+					break
+				node.free_mb -= graph.memory_mb[i]
+				for d in inputs:
+					node.in_use[d] = node.in_use.get(d, 0) + 1
+				self.launch(i, node)
+				launched = True
+			node.cursor += 1
+		return launched
+
+	def proceed_all(self, woken: set[NodeName]) -> None:
+		"""Until no node unblocks another"""
+		while woken:
+			names = sorted(woken)
+			woken.clear()
+			for name in names:
+				self.proceed(self.nodes[name], woken)
+
+	def stuck(self) -> Optional[Node]:
+		"""The first node with commands left, if any"""
+		return next((node for node in self.nodes.values() if node.cursor < len(node.queue)), None)
+
+
+def fastest_source(cluster_spec: ClusterSpec, sources: Iterable[NodeName], target: NodeName) -> NodeName:
+	# sorted for determinism in case of ties
+	return min(sorted(sources), key=lambda source: cluster_spec.transfer_s(source, target, 1.0))
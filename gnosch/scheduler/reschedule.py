@@ -0,0 +1,198 @@
+"""
+Incremental rescheduling, for when the running tasks take longer than estimated.
+
+Only the tasks yet to be launched which an overrun affects are re-placed -- those consuming the outputs of the
+late task, and those queued behind it at its node which would have run during the overrun. The other pending tasks
+keep their nodes and queue order, and only those ahead of the last affected one are replayed through the planner,
+to estimate the state of the nodes the affected ones get placed at. So a single slow task in a large graph costs
+about as much as the part of the schedule it delays, plus a linear pass re-deriving the fetches and drops.
+All times are relative to the moment of the state snapshot.
+"""
+
+import heapq
+import logging
+from typing import Iterable, Iterator, Optional, Sequence, Union
+from gnosch.scheduler.graph import CompiledGraph, compiled
+from gnosch.scheduler.model import ClusterSpec, ExecutionState, NodeName, RunningTask, Schedule, SchedulingCommand, TaskGraph, TaskId
+from gnosch.scheduler.planner import _Planner, materialize
+
+logger = logging.getLogger(__name__)
+
+# how much longer than estimated a task may run before its dependents get rescheduled
+default_tolerance = 0.25
+
+
+def _expected_s(graph: CompiledGraph, t: int, cluster_spec: ClusterSpec, running: RunningTask) -> float:
+	node = cluster_spec.nodes.get(running.node)
+	return graph.cpusecs[t] / max(1, min(graph.cpus[t], node.cpus) if node else graph.cpus[t])
+
+
+def projected_s(graph: CompiledGraph, t: int, cluster_spec: ClusterSpec, running: RunningTask) -> float:
+	"""Total runtime of a running task extrapolated from its progress. Without a progress report,
+	the estimate holds until the task is overdue, after which it is assumed to be halfway through"""
+	if running.progress > 0:
+		return running.elapsed_s / min(running.progress, 1.0)
+	expected_s = _expected_s(graph, t, cluster_spec, running)
+	return expected_s if running.elapsed_s <= expected_s else 2 * running.elapsed_s
+
+
+def violations(
+	task_graph: Union[TaskGraph, CompiledGraph], cluster_spec: ClusterSpec, state: ExecutionState, tolerance: float = default_tolerance
+) -> list[TaskId]:
+	"""Running tasks projected to take more than (1 + tolerance) times their estimate, or never to finish as their node
+	is gone from the cluster"""
+	graph = compiled(task_graph)
+	late = []
+	for task_id, running in state.running.items():
+		t = graph.task_index[task_id]
+		if running.node not in cluster_spec.nodes:
+			late.append(task_id)
+		elif projected_s(graph, t, cluster_spec, running) > (1 + tolerance) * _expected_s(graph, t, cluster_spec, running):
+			late.append(task_id)
+	return late
+
+
+def reschedule(
+	task_graph: Union[TaskGraph, CompiledGraph],
+	cluster_spec: ClusterSpec,
+	schedule: Schedule,
+	state: ExecutionState,
+	tolerance: float = default_tolerance,
+) -> Optional[Schedule]:
+	"""Returns the remainder of the schedule to follow from the state on, with the tasks affected by late ones re-placed.
+	None if no task is late, ie, the current schedule still holds"""
+	graph = compiled(task_graph)
+	late = violations(graph, cluster_spec, state, tolerance)
+	if not late:
+		return None
+	logger.debug(f"rescheduling due to {len(late)} late tasks, eg {late[0]}")
+	return replan(graph, cluster_spec, schedule, state, late)
+
+
+def replan(
+	task_graph: Union[TaskGraph, CompiledGraph],
+	cluster_spec: ClusterSpec,
+	schedule: Schedule,
+	state: ExecutionState,
+	late: Iterable[TaskId],
+) -> Schedule:
+	"""Re-places the pending tasks affected by the given running ones -- and any pending tasks missing from the schedule.
+	Returns the remainder of the schedule to follow from the state on, the finished and running tasks left out.
+
+	Nodes gone from the cluster are gone with their datasets and running tasks, the latter then pending again, and
+	with their queues, the tasks of which count as missing from the schedule"""
+	graph = compiled(task_graph)
+	state = ExecutionState(
+		finished=state.finished,
+		running={task_id: running for task_id, running in state.running.items() if running.node in cluster_spec.nodes},
+		datasets={dataset_id: {name for name in nodes if name in cluster_spec.nodes} for dataset_id, nodes in state.datasets.items()},
+	)
+	started = {graph.task_index[task_id] for task_id in state.finished} | {graph.task_index[task_id] for task_id in state.running}
+	queues: dict[Optional[NodeName], list[int]] = {}
+	for name, commands in schedule.items():
+		if name in cluster_spec.nodes:
+			queues[name] = [t for t in (graph.task_index[task_id] for task_id in _launches(commands)) if t not in started]
+	scheduled = {t for queue in queues.values() for t in queue}
+	# the unscheduled ones go into a queue of their own, in a topological order
+	queues[None] = [t for t in graph.order if t not in started and t not in scheduled]
+
+	affected = set(queues[None])
+	for task_id in late:
+		t = graph.task_index[task_id]
+		if task_id not in state.running:
+			# lost, so pending again -- and missing from the schedule
+			continue
+		running = state.running[task_id]
+		affected.update(consumer for d in graph.outputs(t) for consumer in graph.consumers(d))
+		# the tasks queued behind it which would have run during the overrun
+		overrun_s = projected_s(graph, t, cluster_spec, running) - max(running.elapsed_s, _expected_s(graph, t, cluster_spec, running))
+		node_cpus = cluster_spec.nodes[running.node].cpus
+		for queued in queues.get(running.node, ()):
+			affected.add(queued)
+			overrun_s -= graph.cpusecs[queued] / max(1, node_cpus)
+			if overrun_s <= 0:
+				break
+
+	planner = _Planner(graph, cluster_spec)
+	for task_id, running in state.running.items():
+		t = graph.task_index[task_id]
+		remaining_s = max(0.0, projected_s(graph, t, cluster_spec, running) - running.elapsed_s)
+		planner.add_running(t, running.node, remaining_s)
+	for task_id in state.finished:
+		for d in graph.inputs(graph.task_index[task_id]):
+			planner.pending_consumers[d] -= 1
+	for dataset_id, nodes in state.datasets.items():
+		d = graph.dataset_index[dataset_id]
+		# those which will be dropped right away don't count, sinks do
+		if planner.pending_consumers[d] == 0 and len(graph.consumers(d)):
+			continue
+		producer = graph.producer[d]
+		producer_node = state.finished.get(graph.task_ids[producer]) if producer >= 0 else None
+		for name in sorted(nodes):
+			planner.add_replica(d, name, is_source=name == producer_node)
+	for task_id in state.finished:
+		for d in graph.outputs(graph.task_index[task_id]):
+			if planner.pending_consumers[d] > 0 and d not in planner.replicas:
+				raise ValueError(f"dataset {graph.dataset_ids[d]} is still needed but not present anywhere")
+
+	# every queue of the result is a subsequence of this order, so the nodes can't end up waiting on each other.
+	# Past the last affected task, the queues stay as they were
+	replayed: set[int] = set()
+	pending_affected = len(affected)
+	for t, queue_name in _merged(graph, queues, started, graph.upward_ranks(cluster_spec)):
+		if pending_affected == 0:
+			break
+		if queue_name is None or t in affected:
+			# the unscheduled ones are all affected
+			planner.place(t)
+			pending_affected -= 1
+		else:
+			planner.assign(t, queue_name)
+		replayed.add(t)
+	assignment = {
+		name: _launches(node.commands) + [graph.task_ids[t] for t in queues.get(name, ()) if t not in replayed]
+		for name, node in planner.nodes.items()
+	}
+	logger.debug(f"re-placed {len(affected)} and replayed {len(replayed) - len(affected)} of {len(graph) - len(started)} pending tasks")
+	return materialize(graph, assignment, state)
+
+
+def _merged(
+	graph: CompiledGraph, queues: dict[Optional[NodeName], list[int]], started: set[int], ranks: Sequence[float]
+) -> Iterator[tuple[int, Optional[NodeName]]]:
+	"""Yields the queued tasks in an order respecting both the dependencies and the queues -- interleaving the queues
+	by the rank of their next tasks, as the planner would. Raises ValueError if there is none, ie, the queues would deadlock"""
+	cursors = {name: 0 for name in queues}
+	done = set(started)
+	waiting: dict[int, list[Optional[NodeName]]] = {}  # task -> queues whose next task waits for it
+	heads: list[tuple[float, int, str, Optional[NodeName]]] = []
+
+	def advance(name: Optional[NodeName]) -> None:
+		queue = queues[name]
+		if cursors[name] < len(queue):
+			t = queue[cursors[name]]
+			blocker = next((p for p in (graph.producer[d] for d in graph.inputs(t)) if p >= 0 and p not in done), None)
+			if blocker is None:
+				heapq.heappush(heads, (-ranks[t], cursors[name], name or "", name))
+			else:
+				waiting.setdefault(blocker, []).append(name)
+
+	for name in queues:
+		advance(name)
+	while heads:
+		*_, name = heapq.heappop(heads)
+		t = queues[name][cursors[name]]
+		yield t, name
+		done.add(t)
+		cursors[name] += 1
+		advance(name)
+		for blocked in waiting.pop(t, ()):
+			advance(blocked)
+	stuck = [name for name, queue in queues.items() if cursors[name] < len(queue)]
+	if stuck:
+		t = queues[stuck[0]][cursors[stuck[0]]]
+		raise ValueError(f"schedule can't progress, {graph.task_ids[t]} at {stuck[0]} waits on a task queued after it")
+
+
+def _launches(commands: list[SchedulingCommand]) -> list[TaskId]:
+	return [command.launch_task for command in commands if command.launch_task]
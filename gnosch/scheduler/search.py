@@ -0,0 +1,162 @@
+"""
+Local search improving upon a schedule -- simulated annealing over the assignment of tasks to nodes and their
+order within the node queues, with each candidate scored by the simulator. Candidates are evaluated in batches
+over a process pool, so the search can trade a few seconds of controller cpu for a shorter cluster runtime.
+
+Fetches and drops are not searched over directly, they are derived from the assignment via planner.materialize.
+"""
+
+import logging
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Union
+from gnosch.scheduler.graph import CompiledGraph, compiled
+from gnosch.scheduler.model import ClusterSpec, NodeName, Schedule, TaskGraph, TaskId
+from gnosch.scheduler.planner import materialize, plan
+from gnosch.scheduler.simulator import simulate
+
+logger = logging.getLogger(__name__)
+
+Assignment = dict[NodeName, list[TaskId]]
+
+
+@dataclass
+class SearchResult:
+	schedule: Schedule
+	makespan: float
+	initial_makespan: float
+	evaluations: int
+
+
+# set up in each pool process by _init_evaluator, to not ship the graph with every candidate
+_evaluator_spec: Optional[tuple[ClusterSpec, CompiledGraph]] = None
+
+
+def _init_evaluator(cluster_spec: ClusterSpec, graph: CompiledGraph) -> None:
+	global _evaluator_spec
+	_evaluator_spec = (cluster_spec, graph)
+
+
+def _evaluate(assignment: Assignment) -> float:
+	if _evaluator_spec is None:
+		raise ValueError("evaluator process not initialized")
+	cluster_spec, graph = _evaluator_spec
+	try:
+		return simulate(cluster_spec, graph, materialize(graph, assignment))
+	except ValueError:
+		# eg, the reordering introduced a cross-node deadlock
+		return float("inf")
+
+
+class _Neighbourhood:
+	"""Random modifications of an assignment: moving a task to another node, swapping the nodes of two tasks,
+	or swapping two adjacent independent tasks in a queue. Moved tasks are inserted by their priority, ie,
+	position in the upward rank order, so that the queues stay consistent with the dependencies"""
+
+	def __init__(self, graph: CompiledGraph, cluster_spec: ClusterSpec, rng: random.Random):
+		ranks = graph.upward_ranks(cluster_spec)
+		position = [0] * len(graph)
+		for i, t in enumerate(graph.order):
+			position[t] = i
+		ordered = sorted(graph.order, key=lambda t: (-ranks[t], position[t]))
+		self.priority = {graph.task_ids[t]: i for i, t in enumerate(ordered)}
+		self.task_ids = [graph.task_ids[t] for t in ordered]
+		self.graph = graph
+		self.nodes = list(cluster_spec.nodes)
+		self.rng = rng
+
+	def depends(self, consumer: TaskId, producer: TaskId) -> bool:
+		return self.graph.depends(self.graph.task_index[consumer], self.graph.task_index[producer])
+
+	def insert(self, queue: list[TaskId], task_id: TaskId) -> None:
+		key = self.priority[task_id]
+		lo, hi = 0, len(queue)
+		while lo < hi:
+			mid = (lo + hi) // 2
+			if self.priority[queue[mid]] < key:
+				lo = mid + 1
+			else:
+				hi = mid
+		queue.insert(lo, task_id)
+
+	def neighbour(self, assignment: Assignment) -> Assignment:
+		candidate = {node: list(queue) for node, queue in assignment.items()}
+		placement = {task_id: node for node, queue in candidate.items() for task_id in queue}
+		if not self.task_ids:
+			return candidate
+		move = self.rng.random()
+		if move < 0.5 and len(self.nodes) > 1:
+			task_id = self.rng.choice(self.task_ids)
+			target = self.rng.choice([node for node in self.nodes if node != placement[task_id]])
+			candidate[placement[task_id]].remove(task_id)
+			self.insert(candidate.setdefault(target, []), task_id)
+		elif move < 0.8 and len(self.nodes) > 1 and len(self.task_ids) > 1:
+			first, second = self.rng.sample(self.task_ids, 2)
+			if placement[first] != placement[second]:
+				candidate[placement[first]].remove(first)
+				candidate[placement[second]].remove(second)
+				self.insert(candidate[placement[second]], first)
+				self.insert(candidate[placement[first]], second)
+		else:
+			queue = candidate[placement[self.rng.choice(self.task_ids)]]
+			if len(queue) > 1:
+				i = self.rng.randrange(len(queue) - 1)
+				if not self.depends(queue[i + 1], queue[i]):
+					queue[i], queue[i + 1] = queue[i + 1], queue[i]
+		return candidate
+
+
+def _assignment_of(schedule: Schedule) -> Assignment:
+	return {node: [command.launch_task for command in commands if command.launch_task] for node, commands in schedule.items()}
+
+
+def search(
+	task_graph: Union[TaskGraph, CompiledGraph],
+	cluster_spec: ClusterSpec,
+	budget_s: float,
+	initial: Optional[Schedule] = None,
+	max_workers: Optional[int] = None,
+	seed: Optional[int] = None,
+) -> SearchResult:
+	"""Improves upon the initial schedule (by default the one of planner.plan) within budget_s of wall clock time.
+	Each round evaluates one candidate per pool process, and moves to the best one if better, or with a probability
+	decaying with the temperature if worse. Uses all cores unless max_workers is given"""
+	deadline = time.monotonic() + budget_s
+	rng = random.Random(seed)
+	graph = compiled(task_graph)
+	if initial is None:
+		initial = plan(graph, cluster_spec)
+	neighbourhood = _Neighbourhood(graph, cluster_spec, rng)
+	current = _assignment_of(initial)
+	initial_makespan = simulate(cluster_spec, graph, initial)
+	current_makespan = initial_makespan
+	best, best_makespan = current, current_makespan
+	evaluations = 0
+	workers = max_workers or os.cpu_count() or 1
+	start = time.monotonic()
+
+	with ProcessPoolExecutor(max_workers=workers, initializer=_init_evaluator, initargs=(cluster_spec, graph)) as pool:
+		while time.monotonic() < deadline and len(graph):
+			candidates = [neighbourhood.neighbour(current) for _ in range(workers)]
+			makespans = list(pool.map(_evaluate, candidates))
+			evaluations += len(candidates)
+			makespan, candidate = min(zip(makespans, candidates), key=lambda pair: pair[0])
+			# temperature decays linearly from 5% of the initial makespan to zero at the deadline
+			progress = (time.monotonic() - start) / max(deadline - start, 1e-9)
+			temperature = 0.05 * initial_makespan * max(0.0, 1.0 - progress)
+			delta = makespan - current_makespan
+			if delta <= 0 or (temperature > 0 and delta < float("inf") and rng.random() < math.exp(-delta / temperature)):
+				current, current_makespan = candidate, makespan
+				if makespan < best_makespan:
+					best, best_makespan = candidate, makespan
+					logger.debug(f"improved makespan to {best_makespan} after {evaluations} evaluations")
+
+	if best_makespan >= initial_makespan:
+		return SearchResult(schedule=initial, makespan=initial_makespan, initial_makespan=initial_makespan, evaluations=evaluations)
+	return SearchResult(
+		schedule=materialize(graph, best), makespan=best_makespan, initial_makespan=initial_makespan, evaluations=evaluations
+	)
@@ -1,113 +1,144 @@
 """
 Given a schedule and cluster spec, simulate how long it would, in theory, run.
+
+The simulation is a discrete event one, driven by a heap of task completions and transfer completions, with the
+command queues followed by scheduler.queues.
+Tasks on a node share its cpus evenly, and transfers over a link share its bandwidth evenly -- so instead
+of progressing every task on every event, each node (link) keeps a virtual clock of cpusecs (mb) delivered
+to each of its tasks (transfers) so far, and a heap of the virtual times at which they finish. An event
+thus touches only the node or link it concerns, and nodes are revisited only when something they may be
+blocked on has changed.
 """
 
-import math
+import heapq
 import logging
-from dataclasses import dataclass
-from gnosch.scheduler.model import ClusterSpec, Schedule, SchedulingCommand, TaskGraph, NodeSpec, TaskId, Task, NodeName
+from itertools import count
+from typing import Union
+from gnosch.scheduler.graph import CompiledGraph, compiled
+from gnosch.scheduler.model import ClusterSpec, Schedule, SchedulingCommand, TaskGraph, NodeSpec, NodeName
+from gnosch.scheduler.queues import NodeQueue, QueueFollower
 
 logger = logging.getLogger(__name__)
 
+# relative tolerance for considering a task or transfer finished
+_eps = 1e-9
+
+
+class _Shared:
+	"""Something whose capacity is shared evenly by its jobs -- cpus of a node by its tasks, bandwidth of a
+	link by its transfers. Tracks progress via a virtual clock, ie, the amount of work each job received"""
+
+	__slots__ = ("capacity", "vclock", "updated_at", "jobs", "version")
+
+	def __init__(self, capacity: float):
+		self.capacity = capacity
+		self.vclock = 0.0
+		self.updated_at = 0.0
+		self.jobs: list[tuple[float, int, object]] = []  # (vclock at which done, seq, payload)
+		self.version = 0
+
+	def advance(self, now: float) -> None:
+		if self.jobs:
+			self.vclock += (now - self.updated_at) * self.capacity / len(self.jobs)
+		self.updated_at = now
+
+	def add(self, now: float, work: float, seq: int, payload: object) -> None:
+		self.advance(now)
+		heapq.heappush(self.jobs, (self.vclock + work, seq, payload))
+
+	def pop_done(self, now: float) -> list[object]:
+		self.advance(now)
+		done = []
+		while self.jobs and self.jobs[0][0] <= self.vclock + _eps * max(1.0, abs(self.jobs[0][0])):
+			done.append(heapq.heappop(self.jobs)[2])
+		return done
+
+	def next_done_at(self) -> float:
+		if not self.jobs or self.capacity <= 0:
+			return float("inf")
+		return self.updated_at + (self.jobs[0][0] - self.vclock) * len(self.jobs) / self.capacity
+
+
+class NodeState(NodeQueue):
+	"""Of a node being simulated, its cpus shared by the tasks running there"""
 
-@dataclass
-class NodeState:
-	# TODO unify with controller's representation
-	# TODO either decouple data from behav, or remove dataclass
-	spec: NodeSpec
-	dataset_sizes: dict[str, int]
-	task_spec: dict[TaskId, Task]
-	completion_pct: dict[TaskId, float]
-
-	def remaining_mem_mb(self) -> int:
-		# NOTE perhaps cache
-		return self.spec.memory_mb - sum(self.dataset_sizes.values()) - sum(e.memory_mb for e in self.task_spec.values())
-
-	def task_done_in_s(self) -> float:
-		next_task = float("inf")
-		if not self.completion_pct:
-			return next_task
-		cpu_per_task = self.spec.cpus / len(self.completion_pct)
-		for task_id, current_pc in self.completion_pct.items():
-			task = self.task_spec[task_id]
-			remaining_cpusecs = (1 - current_pc) * task.cpusecs
-			until_done = remaining_cpusecs / cpu_per_task
-			next_task = min(until_done, next_task)
-		return next_task
-
-	def progress_for(self, secs: float) -> dict[str, int]:
-		finished_tasks: set[str] = set()
-		if not self.completion_pct:
-			return {}
-		cpu_per_task = self.spec.cpus / len(self.completion_pct)
-		elapsed_cpusecs = secs * cpu_per_task
-		for task_id in self.completion_pct:
-			task = self.task_spec[task_id]
-			progress = elapsed_cpusecs / task.cpusecs
-			self.completion_pct[task_id] += progress
-			if math.isclose(self.completion_pct[task_id], 1.0):
-				finished_tasks.add(task_id)
-		datasets = {output.dataset_id: output.size_mb for task in finished_tasks for output in self.task_spec[task].outputs}
-		self.dataset_sizes.update(datasets)
-		for task_id in finished_tasks:
-			self.completion_pct.pop(task_id)
-			self.task_spec.pop(task_id)
-		return datasets
-
-	def enque(self, commands: list[SchedulingCommand], available_datasets: dict[str, int], task_specs: TaskGraph) -> int:
-		enqueued = 0
+	__slots__ = ("spec", "cpus")
+
+	def __init__(self, name: NodeName, spec: NodeSpec, commands: list[SchedulingCommand], graph: CompiledGraph):
+		super().__init__(name, commands, graph, spec.memory_mb)
+		self.spec = spec
+		self.cpus = _Shared(spec.cpus)
+
+
+class _Simulation(QueueFollower[NodeState]):
+	def __init__(self, cluster_spec: ClusterSpec, graph: CompiledGraph, schedule: Schedule):
+		unknown = set(schedule) - set(cluster_spec.nodes)
+		if unknown:
+			raise ValueError(f"schedule for nodes not in the cluster: {sorted(unknown)}")
+		nodes = {name: NodeState(name, spec, schedule.get(name, []), graph) for name, spec in cluster_spec.nodes.items()}
+		super().__init__(cluster_spec, graph, nodes)
+		self.links: dict[tuple[NodeName, NodeName], _Shared] = {}
+		self.events: list[tuple[float, int, bool, object, int]] = []  # (time, seq, is_node, key, version)
+		self.seq = count()
+		self.now = 0.0
+
+	def reschedule(self, shared: _Shared, is_node: bool, key: object) -> None:
+		shared.version += 1
+		at = shared.next_done_at()
+		if at < float("inf"):
+			heapq.heappush(self.events, (at, next(self.seq), is_node, key, shared.version))
+
+	def start_fetch(self, d: int, source: NodeName, target: NodeState, woken: set[NodeName]) -> None:
+		if self.cluster_spec.transfer_s(source, target.name, self.graph.sizes[d]) == 0:
+			self.finish_fetch(d, target, woken)
+			return
+		link = (source, target.name)
+		if link not in self.links:
+			self.links[link] = _Shared(self.cluster_spec.comm_mbps[link])
+		self.links[link].add(self.now, self.graph.sizes[d], next(self.seq), d)
+		self.reschedule(self.links[link], False, link)
+
+	def launch(self, t: int, node: NodeState) -> None:
+		node.cpus.add(self.now, self.graph.cpusecs[t], next(self.seq), t)
+
+	def proceed(self, node: NodeState, woken: set[NodeName]) -> bool:
+		launched = super().proceed(node, woken)
+		if launched:
+			self.reschedule(node.cpus, True, node.name)
+		return launched
+
+	def run(self) -> float:
+		woken: set[NodeName] = set(self.nodes)
 		while True:
-			if enqueued >= len(commands):
+			# until no node unblocks another at the same instant
+			self.proceed_all(woken)
+			if not self.events:
 				break
-			candidate = commands[enqueued]
-			if candidate.fetch_dataset:
-				ds = available_datasets.get(candidate.fetch_dataset, None)
-				if ds and self.remaining_mem_mb() >= ds:
-					self.dataset_sizes[candidate.fetch_dataset] = ds
-					enqueued += 1
-				else:
-					break
-			elif candidate.drop_dataset:
-				self.dataset_sizes.pop(candidate.drop_dataset)
-				enqueued += 1
-			elif candidate.launch_task:
-				task = task_specs[candidate.launch_task]
-				deps = set(inp.dataset_id for inp in task.inputs)
-				miss = set(self.dataset_sizes.keys()) - deps
-				if not miss and task.memory_mb <= self.remaining_mem_mb():
-					self.task_spec[candidate.launch_task] = task
-					self.completion_pct[candidate.launch_task] = 0.0
-					enqueued += 1
+			self.now = self.events[0][0]
+			while self.events and self.events[0][0] <= self.now + _eps * max(1.0, self.now):
+				_, _, is_node, key, version = heapq.heappop(self.events)
+				if is_node:
+					node = self.nodes[key]  # type: ignore
+					if version != node.cpus.version:
+						continue
+					for t in node.cpus.pop_done(self.now):
+						self.finish_task(node, t, woken)  # type: ignore
+					self.reschedule(node.cpus, True, key)
 				else:
-					break
-		return enqueued
-
-
-def simulate(cluster_spec: ClusterSpec, task_graph: TaskGraph, schedule: Schedule) -> float:
-	"""Always returns time estimate, does not account for memory crashes or swapping slowdowns."""
-	# TODO does yet not account for internode comms
-
-	cluster = {
-		node_id: NodeState(spec=node_spec, dataset_sizes={}, task_spec={}, completion_pct={})
-		for node_id, node_spec in cluster_spec.nodes.items()
-	}
-	current_time = 0.0
-	progress: dict[NodeName, int] = {node_id: 0 for node_id in schedule}
-	remaining = sum(len(commands) for commands in schedule.values())
-	datasets: dict[str, int] = {}  # TODO include set[NodeName] as well?
-
-	while True:
-		next_event = min(node.task_done_in_s() for node in cluster.values())
-		if next_event < float("inf"):
-			# TODO consider ongoing dataset copies as event too
-			for node in cluster.values():
-				datasets.update(node.progress_for(next_event))
-			current_time += next_event
-		for node_name in schedule:
-			enqueued = cluster[node_name].enque(schedule[node_name][progress[node_name] :], datasets, task_graph)
-			progress[node_name] += enqueued
-			remaining -= enqueued
-		running = sum(len(e.completion_pct) for e in cluster.values())
-		if remaining == 0 and running == 0:
-			break
-	return current_time
+					link = self.links[key]  # type: ignore
+					if version != link.version:
+						continue
+					for d in link.pop_done(self.now):
+						self.finish_fetch(d, self.nodes[key[1]], woken)  # type: ignore
+					self.reschedule(link, False, key)
+		stuck = self.stuck()
+		if stuck is not None:
+			raise ValueError(f"schedule can't progress at {self.now}s, blocked on {stuck.commands[stuck.cursor]}")
+		return self.now
+
+
+def simulate(cluster_spec: ClusterSpec, task_graph: Union[TaskGraph, CompiledGraph], schedule: Schedule) -> float:
+	"""Always returns time estimate, does not account for memory crashes or swapping slowdowns.
+	Dataset copies take size_mb / comm_mbps of the link, shared with other copies over the same link.
+	Raises ValueError if the schedule can't be carried out, eg due to a missing dataset."""
+	return _Simulation(cluster_spec, compiled(task_graph), schedule).run()
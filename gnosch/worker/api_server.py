@@ -4,31 +4,157 @@ for receiving commands from controller. Uses worker.local_comm to relay commands
 to individual jobs, via worker.job_server.
 """
 
-# TODO expose configs (grpc port, thread count)
 # TODO separate out the controller part
 
+import base64
+import itertools
 import logging
+import struct
+import threading
+import time
 import gnosch.api.gnosch_pb2_grpc as services
 import uuid
 import gnosch.api.gnosch_pb2 as protos
 import grpc
-from concurrent import futures
+from multiprocessing import shared_memory
 from gnosch.worker.local_comm import send_command
 from gnosch.worker.job_interface import get_dataset
-from typing import Any, Iterator
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional, Union
 from gnosch.common.bootstrap import new_process
+import gnosch.common.compression as compression
+import gnosch.common.config as config
+from gnosch.common.server import serve
+import gnosch.worker.resources as resources
 from gnosch.worker.client_controller import ClientController
+from gnosch.worker.client_worker import ClientWorker, default_block_size
 
 logger = logging.getLogger(__name__)
 
+
+def _varint(value: int) -> bytes:
+	encoded = bytearray()
+	while value > 0x7F:
+		encoded.append(0x80 | (value & 0x7F))
+		value >>= 7
+	encoded.append(value)
+	return bytes(encoded)
+
+
+# field numbers of DatasetCommandResponse
+_offset_tag = _varint(6 << 3 | 0)
+_data_tag = _varint(4 << 3 | 2)
+_codec_s_tag = _varint(8 << 3 | 1)
+
+
+def encode_block(header: bytes, offset: int, block: Union[bytes, memoryview], codec_s: float = 0.0) -> bytes:
+	"""DatasetCommandResponse with the fields of the header plus offset, data and codec_s, serialized -- the block
+	gets copied just once, straight into the message, instead of into bytes for the field and then again"""
+	codec_field = _codec_s_tag + struct.pack("<d", codec_s) if codec_s else b""
+	return b"".join((header, _offset_tag, _varint(offset), codec_field, _data_tag, _varint(len(block)), block))
+
+
+def _serialize_response(response: Union[bytes, protos.DatasetCommandResponse]) -> bytes:
+	return response if isinstance(response, bytes) else response.SerializeToString()
+
+
+def add_encoded_dataset_command(servicer: Any, server: Any) -> None:
+	"""Replaces the DatasetCommand handler added by add_GnoschBaseServicer_to_server with one which also sends
+	responses already serialized, eg, by encode_block"""
+	handlers = {
+		"DatasetCommand": grpc.unary_stream_rpc_method_handler(
+			servicer.DatasetCommand,
+			request_deserializer=protos.DatasetCommandRequest.FromString,
+			response_serializer=_serialize_response,
+		)
+	}
+	# NOTE the registered handlers are looked up first, the generic ones only for unregistered calls
+	server.add_registered_method_handlers("GnoschBase", handlers)
+	server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler("GnoschBase", handlers),))
+
+
+class EmptyDataset(ValueError):
+	"""The shared memory can't be empty, so neither can the datasets"""
+
+
+class _Upload:
+	"""A dataset being written by this process -- as job_interface.get_new_buffer, but owning the memory rather than
+	keeping it in the module, so that concurrent uploads don't mix up"""
+
+	def __init__(self, dataset_id: str, size: int):
+		self.dataset_id = dataset_id
+		if size <= 0:
+			raise EmptyDataset(f"dataset of {size} bytes: {dataset_id}")
+		if send_command("new", dataset_id) != "Y":
+			raise ValueError(f"dataset already exists! {dataset_id=}")
+		try:
+			self.shm = shared_memory.SharedMemory(name=dataset_id, create=True, size=size)
+		except Exception:
+			send_command("discard", dataset_id)
+			raise
+
+	@property
+	def buf(self) -> memoryview:
+		"""Until done or abandoned"""
+		buf = self.shm.buf
+		assert buf is not None
+		return buf
+
+	def done(self) -> None:
+		"""Finalizes the dataset, which also registers it with the controller"""
+		self.shm.close()
+		if send_command("ready", self.dataset_id) != "Y":
+			raise ValueError(f"failed to finalize {self.dataset_id}")
+
+	def abandon(self) -> None:
+		self.shm.unlink()
+		try:
+			self.shm.close()
+		except BufferError:
+			# views of the memory still referenced, eg from a traceback -- the mapping goes with them
+			pass
+		send_command("discard", self.dataset_id)
+
+
+@dataclass
+class _Fetch:
+	"""A dataset being fetched, for the concurrent fetches of it to wait for"""
+
+	lock: threading.Lock
+	users: int
+
+
+@dataclass
+class _Ingest:
+	"""A dataset being ingested, kept across interrupted streams"""
+
+	upload: _Upload
+	size: int
+	received: int
+	lock: threading.Lock
+
+
 class WorkerImpl(services.GnoschBase):
 	worker_id: str
+	peers: dict[str, ClientWorker]
+	# NOTE [mem] those never resumed stay until the worker quits
+	ingests: dict[str, _Ingest]
+	fetches: dict[str, _Fetch]
 
-	def __init__(self):
-		with ClientController.get_channel() as channel:
-			client = services.GnoschControllerStub(channel)
-			request = protos.RegisterWorkerRequest(url="localhost:50052") # TODO param
-			self.worker_id = client.RegisterWorker(request).worker_id
+	def __init__(self, worker_id: Optional[str] = None):
+		"""Registers with the controller, unless the worker_id is given"""
+		self.peers = {}
+		self.ingests = {}
+		self.ingests_lock = threading.Lock()
+		self.fetches = {}
+		self.fetches_lock = threading.Lock()
+		if worker_id is not None:
+			self.worker_id = worker_id
+		else:
+			with ClientController.get_channel() as channel:
+				client = services.GnoschControllerStub(channel)
+				request = protos.RegisterWorkerRequest(url=config.worker().url, resources=resources.measure())
+				self.worker_id = client.RegisterWorker(request).worker_id
 		# TODO await ping for the job_server
 		status = send_command("report_worker_id", self.worker_id)
 		if status != "Y":
@@ -39,9 +165,13 @@ class WorkerImpl(services.GnoschBase):
 	def Ping(self, request: protos.PingRequest, context: Any):  # type: ignore
 		return protos.PingResponse(status=protos.ServerStatus.OK)
 
-	def JobCreate(self, request: protos.JobCreateRequest, context: Any) -> protos.JobResponse: # type: ignore
+	def JobCreate(self, request: protos.JobCreateRequest, context: Any) -> protos.JobResponse:  # type: ignore
 		job_id = str(uuid.uuid4())
-		status = send_command("submit", f"{job_id}_{request.definition}")
+		if request.HasField("spec"):
+			args = base64.b64encode(request.spec.args).decode("ascii")
+			status = send_command("submit_call", f"{job_id}_{request.memory_mb}_{request.spec.entrypoint} {args}")
+		else:
+			status = send_command("submit", f"{job_id}_{request.memory_mb}_{request.definition}")
 		resp = protos.JobResponse(job_id=job_id, worker_id=self.worker_id)
 		if status == "Y":
 			resp.job_status = protos.JobStatus.WORKER_ACCEPTED
@@ -49,7 +179,7 @@ class WorkerImpl(services.GnoschBase):
 			resp.job_status = protos.JobStatus.WORKER_ERROR
 		return resp
 
-	def JobStatus(self, request: protos.JobStatusRequest, context: Any) -> protos.JobResponse: # type: ignore
+	def JobStatus(self, request: protos.JobStatusRequest, context: Any) -> protos.JobResponse:  # type: ignore
 		status = send_command("ready_job", request.job_id)
 		resp = protos.JobResponse(job_id=request.job_id, worker_id=self.worker_id)
 		if status == "Y":
@@ -60,33 +190,183 @@ class WorkerImpl(services.GnoschBase):
 			resp.job_status = protos.JobStatus.WORKER_ERROR
 		return resp
 
-	def DatasetCommand(self, request: protos.DatasetCommandRequest, context: Any) -> Iterator[protos.DatasetCommandResponse]: # type: ignore
+	def DatasetCommand(self, request: protos.DatasetCommandRequest, context: Any) -> Iterator[Union[bytes, protos.DatasetCommandResponse]]:  # type: ignore
+		"""The blocks of a retrieval come already serialized, by encode_block, and pass through the serializer of
+		add_encoded_dataset_command as they are"""
 		if request.retrieve:
 			data, h, available = get_dataset(request.dataset_id, 1_000)
 			if not available:
-				yield protos.DatasetCommandResponse(data=b"", status=protos.DatasetCommandResult.DATASET_NOT_FOUND, worker_id=self.worker_id)
+				yield protos.DatasetCommandResponse(
+					data=b"", status=protos.DatasetCommandResult.DATASET_NOT_FOUND, worker_id=self.worker_id
+				)
 			else:
 				logger.debug("about to stream dataset")
-				i, k, L = 0, request.block_size_hint, len(data)
-				while i < L:
-					yield protos.DatasetCommandResponse(data=bytes(data[i : i + k]), status=protos.DatasetCommandResult.DATASET_AVAILABLE, worker_id=self.worker_id)
-					i += k
-				h()
+				L = len(data)
+				i = min(request.offset, L)
+				end = min(L, i + request.length) if request.length else L
+				k = request.block_size_hint or default_block_size
+				header = protos.DatasetCommandResponse(
+					status=protos.DatasetCommandResult.DATASET_AVAILABLE, worker_id=self.worker_id, size_bytes=L
+				)
+				codec, codec_s = compression.none, 0.0
+				if request.codecs:
+					start = time.perf_counter()
+					codec = compression.choose(
+						data[i : min(i + compression.sample_size, end)], request.link_mbps or compression.default_link_mbps, request.codecs
+					)
+					codec_s = time.perf_counter() - start
+					logger.debug(f"streaming {request.dataset_id} with {codec=}")
+				if codec != compression.none:
+					header.codec = codec
+				encoded_header = header.SerializeToString()
+				try:
+					while i < end:
+						if codec == compression.none:
+							# NOTE no view of the dataset kept across the yield, or the close in h would fail
+							yield encode_block(encoded_header, i, data[i : min(i + k, end)], codec_s)
+						else:
+							start = time.perf_counter()
+							block = compression.compress(codec, data[i : min(i + k, end)])
+							yield encode_block(encoded_header, i, block, codec_s + time.perf_counter() - start)
+						i += k
+						codec_s = 0.0
+				finally:
+					h()
 		if request.drop:
-			response = protos.DatasetCommandResponse(data=bytes(), dataset_id=request.dataset_id, worker_id=self.worker_id)
-			status = send_command("drop_ds", request.dataset_id)
-			if status == "Y":
-				response.status=protos.DatasetCommandResult.DATASET_DROPPED
-			else:
-				response.status=protos.DatasetCommandResult.DATASET_NOT_FOUND
-			yield response
+			yield self._drop(request.dataset_id)
+
+	def _drop(self, dataset_id: str) -> protos.DatasetCommandResponse:
+		response = protos.DatasetCommandResponse(data=bytes(), dataset_id=dataset_id, worker_id=self.worker_id)
+		status = send_command("drop_ds", dataset_id)
+		if status == "Y":
+			response.status = protos.DatasetCommandResult.DATASET_DROPPED
+		else:
+			response.status = protos.DatasetCommandResult.DATASET_NOT_FOUND
+		return response
+
+	def _status(self, dataset_id: str) -> protos.DatasetCommandResponse:
+		response = protos.DatasetCommandResponse(dataset_id=dataset_id, worker_id=self.worker_id)
+		if send_command("ready_ds", dataset_id) == "Y":
+			response.status = protos.DatasetCommandResult.DATASET_AVAILABLE
+		else:
+			response.status = protos.DatasetCommandResult.DATASET_NOT_FOUND
+		return response
+
+	def JobCreateBatch(self, request: protos.JobCreateBatchRequest, context: Any) -> protos.JobBatchResponse:  # type: ignore
+		return protos.JobBatchResponse(jobs=[self.JobCreate(job, context) for job in request.jobs])
+
+	def JobStatusBatch(self, request: protos.JobStatusBatchRequest, context: Any) -> protos.JobBatchResponse:  # type: ignore
+		return protos.JobBatchResponse(jobs=[self.JobStatus(protos.JobStatusRequest(job_id=job_id), context) for job_id in request.job_ids])
+
+	def DatasetBatch(self, request: protos.DatasetBatchRequest, context: Any) -> protos.DatasetBatchResponse:  # type: ignore
+		command = self._drop if request.drop else self._status
+		return protos.DatasetBatchResponse(datasets=[command(dataset_id) for dataset_id in request.dataset_ids])
+
+	def FetchDataset(self, request: protos.FetchDatasetRequest, context: Any) -> protos.DatasetCommandResponse:  # type: ignore
+		with self.fetches_lock:
+			fetch = self.fetches.setdefault(request.dataset_id, _Fetch(lock=threading.Lock(), users=0))
+			fetch.users += 1
+		try:
+			# NOTE the concurrent fetches of the dataset wait for the first one, and then find the dataset ready
+			with fetch.lock:
+				return self._fetch(request)
+		finally:
+			with self.fetches_lock:
+				fetch.users -= 1
+				if not fetch.users:
+					self.fetches.pop(request.dataset_id)
+
+	def _fetch(self, request: protos.FetchDatasetRequest) -> protos.DatasetCommandResponse:
+		response = protos.DatasetCommandResponse(dataset_id=request.dataset_id, worker_id=self.worker_id)
+		if send_command("ready_ds", request.dataset_id) == "Y":
+			response.status = protos.DatasetCommandResult.DATASET_AVAILABLE
+			return response
+		if request.source_url not in self.peers:
+			# NOTE not thread safe, but a duplicate client is harmless
+			self.peers[request.source_url] = ClientWorker(request.source_url)
+		peer = self.peers[request.source_url]
+		logger.debug(f"fetching {request.dataset_id} from {request.source_url}")
+		upload: Optional[_Upload] = None
+
+		def allocate(size: int) -> memoryview:
+			nonlocal upload
+			upload = _Upload(request.dataset_id, size)
+			return upload.buf
+
+		try:
+			size = peer.retrieve_into(
+				request.dataset_id, allocate, request.block_size_hint or default_block_size, request.link_mbps or None
+			)
+		except EmptyDataset:
+			logger.warning(f"fetch of {request.dataset_id} from {request.source_url} rejected, as empty")
+			response.status = protos.DatasetCommandResult.DATASET_INVALID
+			return response
+		except Exception:
+			logger.exception(f"fetch of {request.dataset_id} from {request.source_url} failed")
+			if upload is not None:
+				upload.abandon()
+			raise
+		if size is None or upload is None:
+			if upload is not None:
+				upload.abandon()
+			response.status = protos.DatasetCommandResult.DATASET_NOT_FOUND
+			return response
+		# registers the new replica with the controller
+		upload.done()
+		response.status = protos.DatasetCommandResult.DATASET_AVAILABLE
+		response.size_bytes = size
+		return response
+
+	def IngestDataset(self, request_iterator: Iterator[protos.DatasetBlock], context: Any) -> protos.IngestDatasetResponse:  # type: ignore
+		blocks = iter(request_iterator)
+		first = next(blocks, None)
+		if first is None:
+			return protos.IngestDatasetResponse(status=protos.DatasetCommandResult.UNKNOWN_DATASET_STATUS, worker_id=self.worker_id)
+		dataset_id = first.dataset_id
+		response = protos.IngestDatasetResponse(dataset_id=dataset_id, worker_id=self.worker_id)
+		if first.size_bytes <= 0:
+			response.status = protos.DatasetCommandResult.DATASET_INVALID
+			return response
+		with self.ingests_lock:
+			ingest = self.ingests.get(dataset_id)
+			if ingest is None:
+				if send_command("ready_ds", dataset_id) == "Y":
+					response.status = protos.DatasetCommandResult.DATASET_AVAILABLE
+					response.received_bytes = first.size_bytes
+					return response
+				upload = _Upload(dataset_id, first.size_bytes)
+				ingest = self.ingests[dataset_id] = _Ingest(upload=upload, size=first.size_bytes, received=0, lock=threading.Lock())
+		with ingest.lock:
+			for block in itertools.chain((first,), blocks):
+				end = block.offset + len(block.data)
+				if block.offset > ingest.received or end > ingest.size:
+					logger.warning(
+						f"ingest of {dataset_id} got block at {block.offset} of {len(block.data)} bytes, having {ingest.received}"
+					)
+					break
+				ingest.upload.buf[block.offset : end] = block.data
+				ingest.received = max(ingest.received, end)
+			response.received_bytes = ingest.received
+			if ingest.received < ingest.size:
+				response.status = protos.DatasetCommandResult.DATASET_NOT_READY
+				return response
+			with self.ingests_lock:
+				self.ingests.pop(dataset_id)
+			# registers the dataset with the controller
+			ingest.upload.done()
+		response.status = protos.DatasetCommandResult.DATASET_AVAILABLE
+		return response
+
 
 def start() -> None:
 	new_process()
 	logger.info("starting worker grpc server")
 
-	server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
-	services.add_GnoschBaseServicer_to_server(WorkerImpl(), server)
-	server.add_insecure_port("[::]:50052") # TODO param
-	server.start()
-	server.wait_for_termination()
+	servicer = WorkerImpl()
+
+	def register(server: Any) -> None:
+		services.add_GnoschBaseServicer_to_server(servicer, server)
+		add_encoded_dataset_command(servicer, server)
+
+	# NOTE in the aio mode too, the calls run on the pool -- they mostly wait for the local job_server or copy memory
+	serve(config.worker(), register)
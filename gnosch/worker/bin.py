@@ -11,7 +11,9 @@ import gnosch.worker.datasets as datasets
 import gnosch.worker.jobs as jobs
 import gnosch.worker.api_server as api_server
 import gnosch.worker.job_server as job_server
+import gnosch.worker.resources as resources
 from gnosch.common.bootstrap import new_process
+import gnosch.common.config as config
 from gnosch.worker.client_controller import ClientController
 
 logger = logging.getLogger(__name__)
@@ -22,9 +24,17 @@ def start() -> None:
 	logger.info("starting worker")
 
 	set_start_method("forkserver")
+	process_config = config.worker_process()
 	local_server = local_comm.LocalServer()
-	dataset_manager = datasets.DatasetManager()
-	job_manager = jobs.JobManager()
+	dataset_manager = datasets.DatasetManager(budget_mb=process_config.datasets_budget_mb, spill_dir=process_config.spill_dir)
+	job_manager = jobs.JobManager(
+		pool_size=process_config.runner_pool_size,
+		preload=process_config.preload,
+		max_jobs_per_runner=process_config.max_jobs_per_runner,
+		max_rss_growth_mb=process_config.max_rss_growth_mb,
+		memory_mb=resources.measure().memory_mb,
+		held_mb=dataset_manager.held_mb,
+	)
 	client_controller = ClientController()
 	grpc_server = Process(target=api_server.start)
 	grpc_server.start()
@@ -37,4 +47,4 @@ def start() -> None:
 		local_server.quit()
 
 	atexit.register(_shutdown)
-	job_server.start(local_server, dataset_manager, job_manager, client_controller)
+	job_server.start(local_server, dataset_manager, job_manager, client_controller, heartbeat_s=process_config.heartbeat_s)
@@ -1,34 +1,62 @@
 import grpc
-from typing import Any
+from typing import Any, Optional
 import gnosch.api.gnosch_pb2_grpc as services
 import gnosch.api.gnosch_pb2 as protos
+import gnosch.common.config as config
 
-class ClientController():
-	controller_url = "localhost:50051" # TODO param
+
+class ClientController:
+	controller_url = config.controller().url
+	channel_options = config.controller().options()
 	channel: Any
 	client: Any
 
 	@classmethod
 	def get_channel(cls) -> Any:
 		"""For one-off calls"""
-		return grpc.insecure_channel(cls.controller_url)
+		return grpc.insecure_channel(cls.controller_url, options=cls.channel_options)
 
 	def __init__(self):
-		self.channel = grpc.insecure_channel(self.controller_url)
+		self.channel = grpc.insecure_channel(self.controller_url, options=self.channel_options)
 		self.client = services.GnoschControllerStub(self.channel)
 
 	def quit(self):
 		self.channel.close()
 
-	def register_dataset(self, dataset_id: str, worker_id: str) -> bool:
+	def register_dataset(self, dataset_id: str, worker_id: str, size_bytes: int) -> bool:
 		request = protos.DatasetCommandResponse(
 			status=protos.DatasetCommandResult.DATASET_AVAILABLE,
 			dataset_id=dataset_id,
 			worker_id=worker_id,
+			size_bytes=size_bytes,
 		)
 		response = self.client.RegisterDataset(request)
 		if response.status == protos.ServerStatus.OK:
 			return True
 		else:
 			return False
-			
+
+	def heartbeat(
+		self, worker_id: str, resources: protos.WorkerResources, running_jobs: list[str], datasets: list[tuple[str, int]], interval_s: float
+	) -> bool:
+		"""Of the datasets held as (id, size)"""
+		request = protos.UpdateWorkerRequest(worker_id=worker_id, resources=resources, running_jobs=running_jobs, interval_s=interval_s)
+		for dataset_id, size_bytes in datasets:
+			request.datasets.add(
+				status=protos.DatasetCommandResult.DATASET_AVAILABLE, dataset_id=dataset_id, worker_id=worker_id, size_bytes=size_bytes
+			)
+		response = self.client.UpdateWorker(request)
+		return response.status == protos.ServerStatus.OK
+
+	def update_jobs(self, worker_id: str, events: list[tuple[str, Optional[int]]]) -> bool:
+		"""Of (job id, exit code), None once started"""
+		request = protos.UpdateJobsRequest(worker_id=worker_id)
+		for job_id, exit_code in events:
+			job = request.jobs.add(job_id=job_id, worker_id=worker_id)
+			if exit_code is None:
+				job.job_status = protos.JobStatus.WORKER_RUNNING
+			else:
+				job.job_status = protos.JobStatus.FINISHED if exit_code == 0 else protos.JobStatus.WORKER_ERROR
+				job.exit_code = exit_code
+		response = self.client.UpdateJobs(request)
+		return response.status == protos.ServerStatus.OK
@@ -0,0 +1,75 @@
+"""
+Client of the grpc api of other workers, for transfers of datasets between them.
+"""
+
+import grpc
+import time
+from typing import Any, Callable, Optional
+import gnosch.api.gnosch_pb2_grpc as services
+import gnosch.api.gnosch_pb2 as protos
+import gnosch.common.compression as compression
+
+# NOTE grpc limits the messages to 4MB by default
+default_block_size = 1 << 20
+
+
+class ClientWorker:
+	url: str
+	channel: Any
+	client: Any
+	# link throughput of the past retrievals from this peer, in MB/s as transferred ie compressed. NOTE without the
+	# time of the codecs at either end, which would otherwise make the link seem slow and the heavier codecs chosen
+	measured_mbps: Optional[float]
+
+	def __init__(self, url: str):
+		self.url = url
+		self.channel = grpc.insecure_channel(url)
+		self.client = services.GnoschBaseStub(self.channel)
+		self.measured_mbps = None
+
+	def quit(self):
+		self.channel.close()
+
+	def retrieve_into(
+		self,
+		dataset_id: str,
+		allocate: Callable[[int], memoryview],
+		block_size: int = default_block_size,
+		link_mbps: Optional[float] = None,
+	) -> Optional[int]:
+		"""Streams the dataset from the peer into the buffer which allocate returns for its size, block by block.
+		The link throughput, if not given, is as measured in the past retrievals. Returns the size, or None if the
+		peer does not hold the dataset"""
+		request = protos.DatasetCommandRequest(
+			dataset_id=dataset_id,
+			retrieve=True,
+			block_size_hint=block_size,
+			codecs=list(compression.codecs),
+			link_mbps=link_mbps or self.measured_mbps or compression.default_link_mbps,
+		)
+		buf: Optional[memoryview] = None
+		offset, size, transferred = 0, 0, 0
+		start, codec_s = time.perf_counter(), 0.0
+		for response in self.client.DatasetCommand(request):
+			if response.status != protos.DatasetCommandResult.DATASET_AVAILABLE:
+				return None
+			if buf is None:
+				size = response.size_bytes
+				buf = allocate(size)
+			codec_s += response.codec_s
+			if response.codec:
+				decompress_start = time.perf_counter()
+				data = compression.decompress(response.codec, response.data)
+				codec_s += time.perf_counter() - decompress_start
+			else:
+				data = response.data
+			buf[offset : offset + len(data)] = data
+			offset += len(data)
+			transferred += len(response.data)
+		# NOTE small ones measure the latency rather than the throughput
+		if transferred >= 1 << 20:
+			mbps = transferred / 1e6 / max(time.perf_counter() - start - codec_s, 1e-9)
+			self.measured_mbps = mbps if self.measured_mbps is None else (self.measured_mbps + mbps) / 2
+		if buf is None or offset != size:
+			raise ValueError(f"stream of {dataset_id} from {self.url} ended at {offset} of {size} bytes")
+		return offset
@@ -1,5 +1,9 @@
 """
 Manager of the shared memory for holding datasets. Used from worker.job_server
+
+Beyond the budget, the least recently used finalized datasets get spilled to files on the local disk, and mapped back
+to the shared memory once used again -- the jobs see them the same either way. Those being read are pinned in memory
+from the wait for them until the reader releases them.
 """
 
 from dataclasses import dataclass
@@ -7,6 +11,10 @@ from multiprocessing import shared_memory
 from typing import Optional
 from enum import Enum
 import logging
+import mmap
+import os
+import tempfile
+import time
 
 # memory management
 # NOTE we are currently based on shared_memory, but we may want to explore other venues:
@@ -24,6 +32,13 @@ logger = logging.getLogger(__name__)
 class Dataset:
 	shm: Optional[shared_memory.SharedMemory]
 	finalized: bool
+	size: int = 0
+	# by time.monotonic, of the finalization or the last wait for it
+	last_used: float = 0.0
+	# the file holding it instead of the shm, once spilled
+	spilled: Optional[str] = None
+	# pins, of those promised it and not done reading yet
+	readers: int = 0
 
 
 class DatasetStatus(Enum):
@@ -34,9 +49,22 @@ class DatasetStatus(Enum):
 
 class DatasetManager:
 	datasets: dict[str, Dataset]
+	# of the finalized datasets in the shared memory, not the spilled. NOTE read from other threads, eg by the admission of the jobs
+	held_bytes: int
 
-	def __init__(self):
+	def __init__(self, budget_mb: Optional[float] = None, spill_dir: Optional[str] = None):
+		"""Without the budget, nothing gets spilled"""
 		self.datasets = {}
+		self.held_bytes = 0
+		self.budget_bytes = None if budget_mb is None else int(budget_mb * (1 << 20))
+		self.spill_dir = spill_dir or os.path.join(tempfile.gettempdir(), "gnosch-spill")
+
+	def held_mb(self) -> float:
+		return self.held_bytes / (1 << 20)
+
+	def sizes(self) -> list[tuple[str, int]]:
+		"""The finalized datasets with their sizes, the spilled included. NOTE read from other threads, eg by the heartbeat"""
+		return [(dataset_key, ds.size) for dataset_key, ds in list(self.datasets.items()) if ds.finalized]
 
 	def status(self, dataset_key: str) -> DatasetStatus:
 		if dataset_key not in self.datasets:
@@ -59,21 +87,113 @@ class DatasetManager:
 		if status == DatasetStatus.missing or status == DatasetStatus.finalized:
 			return False
 		else:
-			self.datasets[dataset_key].shm = shared_memory.SharedMemory(name=dataset_key, create=False)
-			self.datasets[dataset_key].finalized = True
+			ds = self.datasets[dataset_key]
+			ds.shm = shared_memory.SharedMemory(name=dataset_key, create=False)
+			ds.finalized, ds.size, ds.last_used = True, ds.shm.size, time.monotonic()
+			self.held_bytes += ds.size
+			self.spill_over(keep=dataset_key)
+			return True
+
+	def size(self, dataset_key: str) -> int:
+		"""Of a finalized dataset"""
+		ds = self.datasets[dataset_key]
+		if not ds.finalized:
+			raise ValueError(f"dataset not finalized: {dataset_key}")
+		return ds.size
+
+	def use(self, dataset_key: str) -> None:
+		"""Of a finalized dataset about to be read, mapping it back if spilled. It stays pinned in memory until released"""
+		ds = self.datasets[dataset_key]
+		ds.last_used = time.monotonic()
+		ds.readers += 1
+		if ds.spilled is not None:
+			self.restore(dataset_key)
+			self.spill_over(keep=dataset_key)
+
+	def release(self, dataset_key: str) -> bool:
+		"""Of a dataset used, once the reader is done with it. False if not pinned, eg dropped meanwhile"""
+		ds = self.datasets.get(dataset_key)
+		if ds is None or ds.readers == 0:
+			return False
+		ds.readers -= 1
+		# those over the budget while pinned can go now
+		self.spill_over()
+		return True
+
+	def spill_over(self, keep: Optional[str] = None) -> list[str]:
+		"""The least recently used until within the budget, but the one kept and the pinned. Returns those spilled"""
+		if self.budget_bytes is None or self.held_bytes <= self.budget_bytes:
+			return []
+		resident = [
+			(ds.last_used, dataset_key)
+			for dataset_key, ds in self.datasets.items()
+			if ds.shm is not None and not ds.readers and dataset_key != keep
+		]
+		spilled = []
+		for _, dataset_key in sorted(resident):
+			if self.held_bytes <= self.budget_bytes:
+				break
+			self.spill(dataset_key)
+			spilled.append(dataset_key)
+		return spilled
+
+	def spill(self, dataset_key: str) -> None:
+		"""Of a finalized dataset not pinned, to a file, unlinking its shared memory"""
+		ds = self.datasets[dataset_key]
+		shm = ds.shm
+		if shm is None:
+			raise ValueError(f"dataset not resident: {dataset_key}")
+		assert shm.buf is not None
+		if ds.readers:
+			raise ValueError(f"dataset pinned by {ds.readers} readers: {dataset_key}")
+		os.makedirs(self.spill_dir, exist_ok=True)
+		path = os.path.join(self.spill_dir, dataset_key)
+		# NOTE [perf] blocks the caller for the whole write, consider moving to the background
+		with open(path, "wb") as f:
+			f.write(shm.buf[: ds.size])
+		shm.close()
+		shm.unlink()
+		ds.shm, ds.spilled = None, path
+		self.held_bytes -= ds.size
+		logger.debug(f"spilled {dataset_key} of {ds.size} bytes to {path}")
+
+	def restore(self, dataset_key: str) -> None:
+		"""Of a spilled dataset, back to the shared memory of the same name"""
+		ds = self.datasets[dataset_key]
+		if ds.spilled is None:
+			raise ValueError(f"dataset not spilled: {dataset_key}")
+		shm = shared_memory.SharedMemory(name=dataset_key, create=True, size=ds.size)
+		assert shm.buf is not None
+		with open(ds.spilled, "rb") as f, mmap.mmap(f.fileno(), ds.size, access=mmap.ACCESS_READ) as m:
+			shm.buf[: ds.size] = m
+		os.remove(ds.spilled)
+		ds.shm, ds.spilled = shm, None
+		self.held_bytes += ds.size
+		logger.debug(f"restored {dataset_key} of {ds.size} bytes")
+
+	def discard(self, dataset_key: str) -> bool:
+		"""Forgets a dataset whose upload failed -- the uploader unlinks the memory"""
+		if self.status(dataset_key) == DatasetStatus.not_finalized:
+			self.datasets.pop(dataset_key)
 			return True
+		else:
+			return False
 
 	def drop(self, dataset_key: str, pop: bool = True) -> bool:
 		status = self.status(dataset_key)
 		if status == DatasetStatus.finalized:
 			if pop:
-				shm = self.datasets.pop(dataset_key).shm
+				ds = self.datasets.pop(dataset_key)
 			else:
-				shm = self.datasets[dataset_key].shm
-			if shm is None:
+				ds = self.datasets[dataset_key]
+			if ds.spilled is not None:
+				os.remove(ds.spilled)
+				return True
+			if ds.shm is None:
 				raise ValueError(f"finalized but None dataset: {dataset_key}")
-			shm.close()
-			shm.unlink()
+			self.held_bytes -= ds.size
+			ds.shm.close()
+			ds.shm.unlink()
 			return True
 		else:
 			return False
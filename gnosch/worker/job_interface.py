@@ -9,7 +9,7 @@ dataset for usage in the job.
 import logging
 from multiprocessing import shared_memory
 from typing import Callable
-from gnosch.worker.local_comm import send_command, await_command
+from gnosch.worker.local_comm import send_command
 
 logger = logging.getLogger(__name__)
 
@@ -28,15 +28,35 @@ def get_new_buffer(name: str, size: int) -> memoryview:
 
 
 def notify_upload_done(name: str) -> None:
-	datasets[name].close()
+	datasets.pop(name).close()
 	response = send_command("ready", name)
 	if response == "N":
 		raise ValueError(f"problem: {response=}")
 
 
+def discard_buffer(name: str) -> None:
+	"""Abandons an upload started by get_new_buffer, if any"""
+	m = datasets.pop(name, None)
+	if m is not None:
+		m.close()
+		m.unlink()
+		send_command("discard", name)
+
+
 def get_dataset(name: str, timeout_ms: int) -> tuple[bytes, Callable, bool]:
 	# TODO return status instead of bool... and wrap in a dataclass
-	if not await_command("ready_ds", name, timeout_ms):
+	# the worker replies as soon as the dataset gets finalized, or once the timeout passes
+	if send_command("wait_ds", f"{timeout_ms}:{name}") != "Y":
 		return b"", lambda: None, False
-	m = shared_memory.SharedMemory(name=name, create=False)
-	return m.buf, lambda: m.close(), True  # or register the m.close for atexit instead?
+	# the worker keeps the dataset in memory until released by the close
+	try:
+		m = shared_memory.SharedMemory(name=name, create=False)
+	except Exception:
+		send_command("release_ds", name)
+		raise
+
+	def close() -> None:
+		m.close()
+		send_command("release_ds", name)
+
+	return m.buf, close, True  # or register the close for atexit instead?
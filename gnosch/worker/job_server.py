@@ -9,82 +9,266 @@ Handles:
 
 This module is thus a Bridge responsibe for the event loop reading from
 LocalServer and invoking the right methods from Dataset- and Job- Managers.
+
+The loop itself only does the quick in-memory work. Whatever may block -- calls
+to the controller, spawning of processes -- runs in a thread pool, which sends
+the reply once done, so the other commands are served meanwhile. Threads of their
+own keep the controller's view of the worker's resources current, and push the jobs
+starting and finishing to the controller, batched.
 """
 
-# TODO try catches in the loop etc
 # TODO add active job monitoring
-# TODO add in grpc client to communicate to other workers
-# TODO make the command names systematic, get rid of repetitive code
-#      each command should be Callable[payload, bool|exception]
-#      the error codes should be made systematic as well, sorta like http
+# TODO the error codes should be made systematic, sorta like http
 
 from gnosch.worker.datasets import DatasetManager, DatasetStatus
-from gnosch.worker.jobs import JobManager
+from gnosch.worker.jobs import Call, JobManager
 from gnosch.worker.client_controller import ClientController
-from gnosch.worker.local_comm import LocalServer
+from gnosch.worker.local_comm import LocalServer, Client
+import gnosch.worker.resources as resources
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+import base64
+import heapq
+import itertools
 import logging
+import queue
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
 
-def start(local_server: LocalServer, dataset_manager: DatasetManager, job_manager: JobManager, controller: ClientController):
-	worker_id = None
-
-	while True:
-		payload, client = local_server.receive()
-		logger.debug(payload)
-		command, data = payload.decode("ascii").split(":", 1)
-		if command == "report_worker_id":
-			worker_id = data
-			local_server.sendto(b"Y", client)
-		elif command == "ping":
-			local_server.sendto(b"Y", client)
-		elif not worker_id:
-			local_server.sendto(b"W", client)
-		elif command == "new":
-			if dataset_manager.new(data):
-				local_server.sendto(b"Y", client)
-			else:
-				local_server.sendto(b"N", client)
-		elif command == "ready":
-			if dataset_manager.finalize(data):
-				if controller.register_dataset(data, worker_id):
-					local_server.sendto(b"Y", client)
-				else:
-					local_server.sendto(b"E", client)
-			else:
-				local_server.sendto(b"N", client)
-		elif command == "ready_ds":
-			ds_status = dataset_manager.status(data)
-			if ds_status == DatasetStatus.finalized:
-				local_server.sendto(b"Y", client)
-			else:
-				local_server.sendto(b"N", client)
-		elif command == "drop_ds":
-			if dataset_manager.drop(data):
-				logger.debug(f"dataset was dropped: {data}")
-				local_server.sendto(b"Y", client)
-			else:
-				logger.debug(f"dataset was not present/finalized: {data}")
-				local_server.sendto(b"N", client)
-		elif command == "submit":
-			job_name, job_code = data.split("_", 1)
-			if job_manager.submit(job_name, job_code):
-				local_server.sendto(b"Y", client)
+class DatasetWaiters:
+	"""Clients blocked until a dataset gets finalized, or until their deadline passes"""
+
+	def __init__(self):
+		self.waiting: dict[str, dict[int, Client]] = {}
+		self.deadlines: list[tuple[float, int, str]] = []
+		self.ids = itertools.count()
+
+	def add(self, dataset_key: str, client: Client, deadline: float) -> None:
+		waiter_id = next(self.ids)
+		self.waiting.setdefault(dataset_key, {})[waiter_id] = client
+		heapq.heappush(self.deadlines, (deadline, waiter_id, dataset_key))
+
+	def wake(self, dataset_key: str) -> list[Client]:
+		# NOTE their deadline entries stay in the heap, and get skipped once due
+		return list(self.waiting.pop(dataset_key, {}).values())
+
+	def expired(self, now: float) -> list[Client]:
+		clients = []
+		while self.deadlines and self.deadlines[0][0] <= now:
+			_, waiter_id, dataset_key = heapq.heappop(self.deadlines)
+			waiting = self.waiting.get(dataset_key, {})
+			if waiter_id in waiting:
+				clients.append(waiting.pop(waiter_id))
+				if not waiting:
+					self.waiting.pop(dataset_key)
+		return clients
+
+	def timeout_s(self, now: float) -> Optional[float]:
+		"""Until the nearest deadline, None if there is no waiter"""
+		while self.deadlines and self.deadlines[0][1] not in self.waiting.get(self.deadlines[0][2], {}):
+			heapq.heappop(self.deadlines)
+		return max(0.0, self.deadlines[0][0] - now) if self.deadlines else None
+
+
+# returns the reply, or None when it gets sent later
+Handler = Callable[[str, Client], Optional[bytes]]
+
+
+class JobServer:
+	def __init__(
+		self,
+		local_server: LocalServer,
+		dataset_manager: DatasetManager,
+		job_manager: JobManager,
+		controller: ClientController,
+		pool_size: int = 4,
+		heartbeat_s: float = 2.0,
+	):
+		self.local_server = local_server
+		self.dataset_manager = dataset_manager
+		self.job_manager = job_manager
+		self.controller = controller
+		self.pool = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="job_server")
+		self.waiters = DatasetWaiters()
+		self.worker_id: Optional[str] = None
+		self.running = False
+		self.heartbeat_s = heartbeat_s
+		self.stopped = threading.Event()
+		self.handlers: dict[str, Handler] = {
+			"report_worker_id": self.report_worker_id,
+			"ping": lambda data, client: b"Y",
+			"quit": self.quit,
+			"new": self.new,
+			"ready": self.ready,
+			"discard": self.discard,
+			"ready_ds": self.ready_ds,
+			"wait_ds": self.wait_ds,
+			"release_ds": self.release_ds,
+			"drop_ds": self.drop_ds,
+			"submit": self.submit,
+			"submit_call": self.submit_call,
+			"ready_job": self.ready_job,
+		}
+		# those available before the worker id gets reported
+		self.unregistered = {"report_worker_id", "ping", "quit"}
+
+	def serve(self) -> None:
+		self.running = True
+		reporters = [
+			threading.Thread(target=self.heartbeat, name="heartbeat", daemon=True),
+			threading.Thread(target=self.report_jobs, name="jobs_reporter", daemon=True),
+		]
+		for reporter in reporters:
+			reporter.start()
+		while self.running:
+			for client in self.waiters.expired(time.monotonic()):
+				self.local_server.sendto(b"N", client)
+			received = self.local_server.receive(self.waiters.timeout_s(time.monotonic()))
+			if received is not None:
+				self.handle(*received)
+		self.stopped.set()
+		for reporter in reporters:
+			reporter.join()
+		self.pool.shutdown()
+
+	def report_jobs(self) -> None:
+		"""The job events, as they come, until the serving stops. Those failing to push get retried with the next ones"""
+		events: list[tuple[str, Optional[int]]] = []
+		while not self.stopped.is_set():
+			try:
+				events.append(self.job_manager.events.get(timeout=0.1))
+				while True:
+					events.append(self.job_manager.events.get_nowait())
+			except queue.Empty:
+				pass
+			if not events or self.worker_id is None:
+				continue
+			try:
+				self.controller.update_jobs(self.worker_id, events)
+				events = []
+			except Exception as e:
+				logger.warning(f"failed to report {len(events)} job events: {e!r}")
+				self.stopped.wait(1)
+
+	def heartbeat(self) -> None:
+		"""The state of the worker to the controller, periodically once the worker id is known, until the serving stops"""
+		while not self.stopped.wait(self.heartbeat_s):
+			if self.worker_id is None:
+				continue
+			try:
+				running, datasets = self.job_manager.running(), self.dataset_manager.sizes()
+				self.controller.heartbeat(self.worker_id, resources.measure(), running, datasets, self.heartbeat_s)
+			except Exception as e:
+				logger.warning(f"failed to send the heartbeat: {e!r}")
+
+	def handle(self, payload: bytes, client: Client) -> None:
+		try:
+			command, data = payload.decode("ascii").split(":", 1)
+			logger.debug(f"{command} with {len(data)} chars")
+			handler = self.handlers.get(command)
+			if handler is None:
+				reply: Optional[bytes] = b"E"
+			elif not self.worker_id and command not in self.unregistered:
+				reply = b"W"
 			else:
-				local_server.sendto(b"N", client)
-		elif command == "ready_job":
-			job_status = job_manager.status(data)
-			if not job_status.exists:
-				local_server.sendto(b"N", client)
-			elif job_status.code == 0:
-				local_server.sendto(b"Y", client)
-			elif job_status.code is None:
-				local_server.sendto(b"N", client)
+				reply = handler(data, client)
+		except Exception:
+			logger.exception(f"failed to handle {payload[:64]!r}")
+			reply = b"E"
+		if reply is not None:
+			self.local_server.sendto(reply, client)
+
+	def offload(self, client: Client, call: Callable[[], bytes]) -> None:
+		"""Runs the call in the pool, replying with its result"""
+
+		def reply(future: Future) -> None:
+			if future.exception() is not None:
+				logger.error(f"offloaded call failed: {future.exception()!r}")
+				self.local_server.sendto(b"E", client)
 			else:
-				local_server.sendto(b"E", client)
-		elif command == "quit":
-			local_server.sendto(b"Y", client)
-			break
-		else:
-			local_server.sendto(b"E", client)
+				self.local_server.sendto(future.result(), client)
+
+		self.pool.submit(call).add_done_callback(reply)
+
+	def report_worker_id(self, data: str, client: Client) -> bytes:
+		self.worker_id = data
+		return b"Y"
+
+	def quit(self, data: str, client: Client) -> bytes:
+		self.running = False
+		return b"Y"
+
+	def new(self, data: str, client: Client) -> bytes:
+		return b"Y" if self.dataset_manager.new(data) else b"N"
+
+	def ready(self, data: str, client: Client) -> Optional[bytes]:
+		if not self.dataset_manager.finalize(data):
+			return b"N"
+		for waiter in self.waiters.wake(data):
+			self.dataset_manager.use(data)
+			self.local_server.sendto(b"Y", waiter)
+		worker_id, size = self.worker_id, self.dataset_manager.size(data)
+		self.offload(client, lambda: b"Y" if self.controller.register_dataset(data, worker_id, size) else b"E")  # type: ignore
+		return None
+
+	def discard(self, data: str, client: Client) -> bytes:
+		return b"Y" if self.dataset_manager.discard(data) else b"N"
+
+	def ready_ds(self, data: str, client: Client) -> bytes:
+		return b"Y" if self.dataset_manager.status(data) == DatasetStatus.finalized else b"N"
+
+	def wait_ds(self, data: str, client: Client) -> Optional[bytes]:
+		"""The dataset replied with Y stays pinned in memory until the release_ds"""
+		timeout_ms, dataset_key = data.split(":", 1)
+		if self.dataset_manager.status(dataset_key) == DatasetStatus.finalized:
+			# NOTE [perf] maps a spilled one back within the loop, consider offloading
+			self.dataset_manager.use(dataset_key)
+			return b"Y"
+		if int(timeout_ms) <= 0:
+			return b"N"
+		self.waiters.add(dataset_key, client, time.monotonic() + int(timeout_ms) / 1000)
+		return None
+
+	def release_ds(self, data: str, client: Client) -> bytes:
+		# NOTE the pins of the readers dying before the release stay, keeping the dataset in memory
+		return b"Y" if self.dataset_manager.release(data) else b"N"
+
+	def drop_ds(self, data: str, client: Client) -> bytes:
+		if self.dataset_manager.drop(data):
+			logger.debug(f"dataset was dropped: {data}")
+			return b"Y"
+		logger.debug(f"dataset was not present/finalized: {data}")
+		return b"N"
+
+	def submit(self, data: str, client: Client) -> None:
+		"""Of the job name, its memory_mb and the code to exec, separated by underscores"""
+		job_name, memory_mb, job_code = data.split("_", 2)
+		self.offload(client, lambda: b"Y" if self.job_manager.submit(job_name, job_code, int(memory_mb)) else b"N")
+		return None
+
+	def submit_call(self, data: str, client: Client) -> None:
+		"""As submit, but with the module:function entrypoint and the base64 of its pickled (args, kwargs) after a space"""
+		job_name, memory_mb, spec = data.split("_", 2)
+		entrypoint, args = spec.split(" ", 1)
+		call = Call(entrypoint=entrypoint, args=base64.b64decode(args))
+		self.offload(client, lambda: b"Y" if self.job_manager.submit(job_name, call, int(memory_mb)) else b"N")
+		return None
+
+	def ready_job(self, data: str, client: Client) -> bytes:
+		job_status = self.job_manager.status(data)
+		if not job_status.exists or job_status.code is None:
+			return b"N"
+		return b"Y" if job_status.code == 0 else b"E"
+
+
+def start(
+	local_server: LocalServer,
+	dataset_manager: DatasetManager,
+	job_manager: JobManager,
+	controller: ClientController,
+	heartbeat_s: float = 2.0,
+):
+	JobServer(local_server, dataset_manager, job_manager, controller, heartbeat_s=heartbeat_s).serve()
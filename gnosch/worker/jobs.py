@@ -1,24 +1,121 @@
 """
 Manager of the spawned processes (jobs). Used from worker.job_server
+
+The jobs run in a pool of runner processes, started ahead and with the common modules already imported, each
+running one job at a time. A runner gets replaced after a number of jobs or once its memory grows too much past
+the preload, as the jobs may leave anything behind. The replacements get started in the background, off the path of
+the submits. When all runners are busy, another one gets started -- the pool keeps at most pool_size of them.
+
+A job is either a code to exec, or a Call of a function. The runners keep the compiled codes and the resolved
+functions, so that repeated jobs cost neither parsing nor imports.
+
+With a memory budget, the jobs declaring their memory get started only once it fits next to the datasets held and
+the memory declared by the running jobs -- in the order submitted, so that the large ones don't starve. A monitor
+thread collects the finished jobs and starts the queued ones meanwhile.
+
+The jobs starting and finishing get posted to the events, for the job server to push to the controller.
 """
 
+import functools
+import importlib
 import logging
-from multiprocessing import Process
+import os
+import pickle
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection, wait
 from dataclasses import dataclass
-from typing import Optional
+from types import CodeType
+from typing import Any, Callable, Optional, Union
 from gnosch.common.bootstrap import new_process
 
 logger = logging.getLogger(__name__)
 
+default_preload = ["numpy", "gnosch.worker.job_interface"]
 
-def spawned_job_entrypoint(name: str, code: str) -> None:
-	new_process()
+
+def _rss_mb() -> float:
+	try:
+		with open("/proc/self/statm") as statm:
+			return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+	except OSError:
+		import resource
+
+		# NOTE the peak rather than the current, but good enough for spotting growth
+		return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@dataclass(frozen=True)
+class Call:
+	"""A job calling the entrypoint, "module:function", with the pickled (args, kwargs). Its return value is ignored"""
+
+	entrypoint: str
+	args: bytes = b""
+
+
+# the code to exec, or the call
+Job = Union[str, Call]
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile(code: str) -> CodeType:
+	return compile(code, "<job>", "exec")
+
+
+@functools.lru_cache(maxsize=1024)
+def _resolve(entrypoint: str) -> Callable:
+	module, sep, path = entrypoint.partition(":")
+	if not sep or not path:
+		raise ValueError(f"entrypoint not of the module:function form: {entrypoint}")
+	target: Any = importlib.import_module(module)
+	for attribute in path.split("."):
+		target = getattr(target, attribute)
+	if not callable(target):
+		raise ValueError(f"entrypoint not callable: {entrypoint}")
+	return target
+
+
+def _run(name: str, job: Job) -> int:
+	"""The exit code the job would have as a process of its own"""
 	logger.debug(f"job starting: {name}")
 	try:
-		exec(code)
+		if isinstance(job, Call):
+			args, kwargs = pickle.loads(job.args) if job.args else ((), {})
+			_resolve(job.entrypoint)(*args, **kwargs)
+		else:
+			# NOTE each in fresh globals, but whatever the job does to the modules stays for the next ones
+			exec(_compile(job), {})
+		return 0
+	except SystemExit as e:
+		return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
 	except Exception:
 		logger.exception(f"job got exception! {name}")
-		raise
+		return 1
+
+
+def runner_entrypoint(conn: Connection, preload: list[str]) -> None:
+	"""Runs the (name, job) jobs received, replying with (name, exit code, rss growth in MB since the preload)
+	for each, until None or the worker going away"""
+	new_process()
+	for module in preload:
+		try:
+			importlib.import_module(module)
+		except Exception:
+			logger.exception(f"failed to preload {module}")
+	baseline_mb = _rss_mb()
+	while True:
+		try:
+			job = conn.recv()
+		except EOFError:
+			break
+		if job is None:
+			break
+		name, spec = job
+		exit_code = _run(name, spec)
+		conn.send((name, exit_code, _rss_mb() - baseline_mb))
 
 
 @dataclass
@@ -27,36 +124,240 @@ class JobStatus:
 	code: Optional[int]
 
 
+@dataclass
+class _Runner:
+	process: Process
+	conn: Connection
+	jobs_done: int = 0
+	job: Optional[str] = None
+
+
+@dataclass
+class _Queued:
+	name: str
+	job: Job
+	memory_mb: int
+
+
 class JobManager:
-	jobs: dict[str, Process]
+	# exit codes, None while queued or running
+	jobs: dict[str, Optional[int]]
+	idle: list[_Runner]
+	# including those beyond the pool size, and those being handed a job
+	busy: list[_Runner]
+	retired: list[Process]
+	queued: deque[_Queued]
+	# the declared memory of the jobs started and not yet finished
+	reserved_mb: dict[str, int]
+	# of (name, exit code), None once started
+	events: queue.Queue
 
-	def __init__(self):
+	def __init__(
+		self,
+		pool_size: int = 4,
+		preload: Optional[list[str]] = None,
+		max_jobs_per_runner: int = 100,
+		max_rss_growth_mb: float = 1024.0,
+		memory_mb: Optional[float] = None,
+		held_mb: Callable[[], float] = lambda: 0.0,
+	):
+		"""Without the memory_mb budget, the jobs start right away. The held_mb are of the datasets, to count against it"""
+		self.pool_size = pool_size
+		self.preload = default_preload if preload is None else preload
+		self.max_jobs_per_runner = max_jobs_per_runner
+		self.max_rss_growth_mb = max_rss_growth_mb
+		self.memory_mb = memory_mb
+		self.held_mb = held_mb
 		self.jobs = {}
+		self.idle = []
+		self.busy = []
+		self.retired = []
+		self.queued = deque()
+		self.reserved_mb = {}
+		# NOTE unbounded, but small and drained by the job server
+		self.events = queue.Queue()
+		self.starting = 0
+		self.quitting = False
+		# NOTE submit gets called from multiple threads
+		self.lock = threading.Lock()
+		self.spawner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job_runners")
+		for _ in range(pool_size):
+			self.idle.append(self._start_runner())
+		self.monitor = threading.Thread(target=self._monitor, name="job_monitor", daemon=True)
+		self.monitor.start()
 
-	def quit(self):
-		for job_name, job_process in self.jobs.items():
-			logger.debug(f"joining {job_name}")
-			job_process.join()
+	def _start_runner(self) -> _Runner:
+		conn, runner_conn = Pipe()
+		process = Process(target=runner_entrypoint, args=(runner_conn, self.preload))
+		process.start()
+		runner_conn.close()
+		return _Runner(process=process, conn=conn)
 
-	def submit(self, name: str, code: str) -> bool:
-		if name in self.jobs:
-			return False
-		else:
-			p = Process(
-				target=spawned_job_entrypoint,
-				args=(
-					name,
-					code,
-				),
-			)
-			p.start()
-			self.jobs[name] = p
-			logger.debug(f"started job {p.pid} with {p.exitcode=}")
+	def _start_idle(self) -> None:
+		runner = self._start_runner()
+		with self.lock:
+			self.starting -= 1
+			if self.quitting:
+				self._retire(runner)
+			else:
+				self.idle.append(runner)
+
+	def _refill(self) -> None:
+		"""Starts, in the background, the runners missing to the pool size. Under the lock"""
+		missing = self.pool_size - len(self.idle) - len(self.busy) - self.starting
+		if missing > 0 and not self.quitting:
+			self.starting += missing
+			for _ in range(missing):
+				self.spawner.submit(self._start_idle)
+
+	def _retire(self, runner: _Runner) -> None:
+		try:
+			runner.conn.send(None)
+		except OSError:
+			pass
+		runner.conn.close()
+		self.retired.append(runner.process)
+
+	def _collect(self) -> None:
+		"""Records the jobs finished meanwhile, and recycles their runners. Under the lock"""
+		for runner in list(self.busy):
+			if runner.job is None:
+				continue
+			finished = False
+			try:
+				while runner.conn.poll():
+					name, exit_code, growth_mb = runner.conn.recv()
+					self._finished(name, exit_code)
+					runner.jobs_done += 1
+					finished = True
+			except EOFError:
+				pass
+			if finished:
+				runner.job = None
+				self.busy.remove(runner)
+				if runner.jobs_done >= self.max_jobs_per_runner or growth_mb > self.max_rss_growth_mb or len(self.idle) >= self.pool_size:
+					logger.debug(f"retiring runner {runner.process.pid} after {runner.jobs_done} jobs, grown by {growth_mb:.0f}MB")
+					self._retire(runner)
+				else:
+					self.idle.append(runner)
+			elif not runner.process.is_alive():
+				# the job took the runner down with it, eg, by os._exit or a signal
+				logger.warning(f"runner {runner.process.pid} died with {runner.process.exitcode} running {runner.job}")
+				self._finished(runner.job, runner.process.exitcode)
+				self.busy.remove(runner)
+				runner.conn.close()
+				self.retired.append(runner.process)
+		self.retired = [process for process in self.retired if process.is_alive()]
+		self._refill()
+
+	def _finished(self, name: str, exit_code: Optional[int]) -> None:
+		self.jobs[name] = exit_code
+		self.reserved_mb.pop(name, None)
+		self.events.put((name, exit_code))
+
+	def _fits(self, memory_mb: int) -> bool:
+		if self.memory_mb is None or not memory_mb:
 			return True
+		return sum(self.reserved_mb.values()) + self.held_mb() + memory_mb <= self.memory_mb
+
+	def _admit(self) -> list[_Queued]:
+		"""Those queued to start now, in order. Under the lock"""
+		admitted = []
+		while self.queued and self._fits(self.queued[0].memory_mb):
+			queued = self.queued.popleft()
+			self.reserved_mb[queued.name] = queued.memory_mb
+			admitted.append(queued)
+		return admitted
+
+	def _monitor(self) -> None:
+		"""Collects the jobs as they finish, starting the queued ones"""
+		while True:
+			with self.lock:
+				if self.quitting:
+					return
+				waitables = [runner.conn for runner in self.busy] + [runner.process.sentinel for runner in self.busy]
+			try:
+				# NOTE the timeout for the runners getting busy meanwhile, and the datasets getting dropped
+				wait(waitables, timeout=0.1)
+			except OSError:
+				# a connection closed meanwhile
+				pass
+			with self.lock:
+				if self.quitting:
+					return
+				self._collect()
+				admitted = self._admit()
+			for queued in admitted:
+				self._start(queued)
+
+	def quit(self):
+		with self.lock:
+			self.quitting = True
+		self.monitor.join()
+		self.spawner.shutdown()
+		with self.lock:
+			logger.debug(f"joining {len(self.busy)} runners with jobs")
+			for runner in self.idle + self.busy:
+				self._retire(runner)
+			self.idle, self.busy = [], []
+		for process in self.retired:
+			process.join()
+
+	def submit(self, name: str, job: Job, memory_mb: int = 0) -> bool:
+		"""False if a job of the name exists already. A job declaring more memory than the budget is rejected by
+		ValueError, one which fits just not now is queued"""
+		if self.memory_mb is not None and memory_mb > self.memory_mb:
+			raise ValueError(f"job {name} needs {memory_mb}MB, more than the {self.memory_mb:.0f}MB of the worker")
+		with self.lock:
+			if name in self.jobs:
+				return False
+			self._collect()
+			self.jobs[name] = None
+			self.queued.append(_Queued(name=name, job=job, memory_mb=memory_mb))
+			admitted = self._admit()
+		if not admitted:
+			logger.debug(f"queued job {name} needing {memory_mb}MB")
+		for queued in admitted:
+			self._start(queued)
+		return True
+
+	def _start(self, queued: _Queued) -> None:
+		name, job = queued.name, queued.job
+		with self.lock:
+			runner = self.idle.pop() if self.idle else None
+			if runner is not None:
+				runner.job = name
+				self.busy.append(runner)
+		if runner is not None:
+			try:
+				runner.conn.send((name, job))
+			except OSError:
+				logger.warning(f"idle runner {runner.process.pid} died with {runner.process.exitcode}")
+				runner.conn.close()
+				with self.lock:
+					self.busy.remove(runner)
+					self.retired.append(runner.process)
+				runner = None
+		if runner is None:
+			# NOTE all busy, so paying for the start here
+			runner = self._start_runner()
+			runner.job = name
+			runner.conn.send((name, job))
+			with self.lock:
+				self.busy.append(runner)
+		logger.debug(f"started job {name} at runner {runner.process.pid}")
+		self.events.put((name, None))
+		with self.lock:
+			self._refill()
+
+	def running(self) -> list[str]:
+		with self.lock:
+			return [runner.job for runner in self.busy if runner.job is not None]
 
 	def status(self, name: str) -> JobStatus:
-		if name not in self.jobs:
-			return JobStatus(False, None)
-		else:
-			logger.debug(f"inquries about job {self.jobs[name].pid} with {self.jobs[name].exitcode}")
-			return JobStatus(True, self.jobs[name].exitcode)
+		with self.lock:
+			self._collect()
+			if name not in self.jobs:
+				return JobStatus(False, None)
+			else:
+				return JobStatus(True, self.jobs[name])
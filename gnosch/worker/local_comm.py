@@ -6,59 +6,227 @@ Also used by the grpc server of the worker to relay the controller's commands.
 
 The fact that unix sockets is used for local communications should remain
 confined to this module.
+
+Each process keeps a single persistent connection to the worker's unix stream socket,
+shared by its threads. Both requests and replies are frames of a header -- the request
+id and the payload length -- followed by the payload, so payloads may be of any size,
+and requests may be pipelined, with the replies matched back by the id. A request payload
+is `command:data`, a reply payload is a single status character followed by optional data.
 """
 
-import time
-import socket
+import itertools
 import os
+import selectors
+import socket
+import struct
+import tempfile
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import NamedTuple, Optional
+
+client_address_envvar = "_GNOSCH_SOCKET"
 
-client_port_envvar = "_PORT"
+_header = struct.Struct("!QQ")  # request id, payload length
+_recv_size = 1 << 16
 
 
-def publish_client_port(port: int) -> None:
+def publish_client_address(path: str) -> None:
 	"""Used by worker on start, to ensure future child processes can comm"""
-	os.environ[client_port_envvar] = str(port)
+	os.environ[client_address_envvar] = path
 
 
-client_port = int(os.getenv(client_port_envvar, "0"))
+def _frame(request_id: int, payload: bytes) -> bytes:
+	return _header.pack(request_id, len(payload)) + payload
 
 
-class LocalServer:
-	"""Abstraction over socket, used for local comms. No business logic, just io"""
+@dataclass
+class Reply:
+	status: str
+	data: bytes
+
+
+class _Connection:
+	"""Reads the complete frames out of a stream, and serializes the writes into it"""
+
+	def __init__(self, conn: socket.socket):
+		self.conn = conn
+		self.send_lock = threading.Lock()
+		self.buf = bytearray()
+		self.start = 0
+
+	def feed(self, data: bytes) -> list[tuple[int, bytes]]:
+		if self.start == len(self.buf):
+			self.buf, self.start = bytearray(data), 0
+		else:
+			self.buf += data
+		frames = []
+		while len(self.buf) - self.start >= _header.size:
+			request_id, length = _header.unpack_from(self.buf, self.start)
+			end = self.start + _header.size + length
+			if len(self.buf) < end:
+				break
+			frames.append((request_id, bytes(self.buf[self.start + _header.size : end])))
+			self.start = end
+		if self.start > _recv_size and self.start * 2 > len(self.buf):
+			del self.buf[: self.start]
+			self.start = 0
+		return frames
 
-	def __init__(self):
-		self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-		server = ("0.0.0.0", 0)
-		self.sock.bind(server)
-		publish_client_port(self.sock.getsockname()[1])
 
-	def receive(self) -> tuple[bytes, str]:
-		return self.sock.recvfrom(1024)
+class Client(NamedTuple):
+	"""The connection and the id of a request, for sending the reply to"""
 
-	def sendto(self, payload: bytes, address: str) -> None:
-		self.sock.sendto(payload, address)
+	conn: _Connection
+	request_id: int
+
+
+class LocalServer:
+	"""Abstraction over socket, used for local comms. No business logic, just io.
+	Only receive is bound to a single thread, replies may be sent from any"""
+
+	def __init__(self):
+		self.directory = tempfile.mkdtemp(prefix="gnosch-")
+		self.path = os.path.join(self.directory, "local.sock")
+		self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		self.sock.bind(self.path)
+		self.sock.listen(128)
+		self.selector = selectors.DefaultSelector()
+		self.selector.register(self.sock, selectors.EVENT_READ)
+		self.connections: dict[socket.socket, _Connection] = {}
+		self.received: deque[tuple[bytes, Client]] = deque()
+		publish_client_address(self.path)
+
+	def receive(self, timeout_s: Optional[float] = None) -> Optional[tuple[bytes, Client]]:
+		"""The next request, or None if none came within the timeout"""
+		deadline = None if timeout_s is None else time.monotonic() + timeout_s
+		while not self.received:
+			remaining_s = None if deadline is None else deadline - time.monotonic()
+			if remaining_s is not None and remaining_s <= 0:
+				return None
+			for key, _ in self.selector.select(remaining_s):
+				if key.fileobj is self.sock:
+					conn, _ = self.sock.accept()
+					self.connections[conn] = _Connection(conn)
+					self.selector.register(conn, selectors.EVENT_READ)
+				else:
+					self._read(key.fileobj)  # type: ignore
+		return self.received.popleft()
+
+	def _read(self, conn: socket.socket) -> None:
+		try:
+			data = conn.recv(_recv_size)
+		except ConnectionError:
+			data = b""
+		if not data:
+			self.selector.unregister(conn)
+			self.connections.pop(conn)
+			conn.close()
+			return
+		connection = self.connections[conn]
+		for request_id, payload in connection.feed(data):
+			self.received.append((payload, Client(connection, request_id)))
+
+	def sendto(self, payload: bytes, client: Client) -> None:
+		try:
+			with client.conn.send_lock:
+				client.conn.conn.sendall(_frame(client.request_id, payload))
+		except OSError:
+			# the client is gone, the selector finds out on the next read
+			pass
 
 	def quit(self) -> None:
+		for conn in self.connections:
+			conn.close()
+		self.connections.clear()
+		self.selector.close()
+		self.sock.close()
+		if os.path.exists(self.path):
+			os.unlink(self.path)
+		os.rmdir(self.directory)
+
+
+class LocalClient:
+	"""Persistent connection to the LocalServer, safe to share among threads. Requests may be pipelined by
+	calling submit several times before the results -- whichever thread waits reads the replies for all"""
+
+	def __init__(self, path: str):
+		self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		self.sock.connect(path)
+		self.stream = self.sock.makefile("rb")
+		self.send_lock = threading.Lock()
+		self.reply_cond = threading.Condition()
+		self.replies: dict[int, Reply] = {}
+		self.reading = False
+		self.request_ids = itertools.count(1)
+
+	def submit(self, command: str, data: str) -> int:
+		payload = f"{command}:{data}".encode()
+		with self.send_lock:
+			request_id = next(self.request_ids)
+			self.sock.sendall(_frame(request_id, payload))
+		return request_id
+
+	def result(self, request_id: int) -> Reply:
+		with self.reply_cond:
+			while request_id not in self.replies and self.reading:
+				self.reply_cond.wait()
+			if request_id in self.replies:
+				return self.replies.pop(request_id)
+			self.reading = True
+		try:
+			while True:
+				received_id, reply = self._read()
+				if received_id == request_id:
+					return reply
+				with self.reply_cond:
+					self.replies[received_id] = reply
+					self.reply_cond.notify_all()
+		finally:
+			with self.reply_cond:
+				self.reading = False
+				self.reply_cond.notify_all()
+
+	def call(self, command: str, data: str) -> Reply:
+		return self.result(self.submit(command, data))
+
+	def _read(self) -> tuple[int, Reply]:
+		header = self.stream.read(_header.size)
+		if len(header) < _header.size:
+			raise ConnectionError("local server closed the connection")
+		request_id, length = _header.unpack(header)
+		payload = self.stream.read(length)
+		if len(payload) < length:
+			raise ConnectionError("local server closed the connection")
+		return request_id, Reply(status=payload[:1].decode(), data=payload[1:])
+
+	def close(self) -> None:
+		self.stream.close()
 		self.sock.close()
 
 
+_client: Optional[LocalClient] = None
+_client_key: Optional[tuple[int, str]] = None
+_client_lock = threading.Lock()
+
+
+def client() -> LocalClient:
+	"""The connection of this process, opened on first use -- and reopened in a forked child"""
+	global _client, _client_key
+	path = os.getenv(client_address_envvar, "")
+	if not path:
+		raise ValueError("Client address not available -- process not launched correctly by worker")
+	key = (os.getpid(), path)
+	with _client_lock:
+		if _client_key != key:
+			_client, _client_key = LocalClient(path), key
+		return _client  # type: ignore
+
+
+def call(command: str, data: str) -> Reply:
+	return client().call(command, data)
+
+
 def send_command(command: str, data: str) -> str:
-	sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-	if client_port == 0:
-		raise ValueError("Client port not available -- process not launched correctly by worker")
-	sock.connect(("localhost", client_port))
-	sock.send(f"{command}:{data}".encode())
-	response = sock.recv(1).decode()
-	sock.close()
-	return response
-
-
-def await_command(command: str, data: str, timeout_ms: int) -> bool:
-	end = time.time() + timeout_ms * 1000
-	while time.time() < end:
-		response = send_command(command, data)
-		if response != "N":
-			return True
-		else:
-			time.sleep(1)
-	return False
+	return call(command, data).status
@@ -0,0 +1,49 @@
+"""
+Measurement of the resources of the worker's host, as reported to the controller.
+"""
+
+import os
+import gnosch.api.gnosch_pb2 as protos
+
+_shm_path = "/dev/shm"
+
+
+def _meminfo_mb() -> dict[str, float]:
+	"""Of /proc/meminfo, empty where not available"""
+	try:
+		with open("/proc/meminfo") as meminfo:
+			lines = [line.split() for line in meminfo]
+	except OSError:
+		return {}
+	return {fields[0].rstrip(":"): int(fields[1]) / 1024 for fields in lines if len(fields) >= 2 and fields[1].isdigit()}
+
+
+def cpus() -> int:
+	try:
+		return len(os.sched_getaffinity(0))
+	except AttributeError:
+		return os.cpu_count() or 1
+
+
+def memory_mb() -> float:
+	return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+
+
+def measure() -> protos.WorkerResources:
+	meminfo = _meminfo_mb()
+	total_mb = meminfo.get("MemTotal", memory_mb())
+	resources = protos.WorkerResources(
+		cpus=cpus(), memory_mb=total_mb, available_memory_mb=meminfo.get("MemAvailable", meminfo.get("MemFree", total_mb))
+	)
+	try:
+		resources.cpu_load = os.getloadavg()[0]
+	except OSError:
+		pass
+	try:
+		shm = os.statvfs(_shm_path)
+		resources.shm_mb = shm.f_blocks * shm.f_frsize / (1 << 20)
+		resources.available_shm_mb = shm.f_bavail * shm.f_frsize / (1 << 20)
+	except OSError:
+		# NOTE no tmpfs to tell, eg on macos the shared memory is not a filesystem
+		pass
+	return resources
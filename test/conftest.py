@@ -0,0 +1,56 @@
+from gnosch.worker.datasets import DatasetManager
+from gnosch.worker.jobs import JobManager
+from gnosch.worker.local_comm import LocalServer, send_command
+from gnosch.worker import job_server
+import threading
+from typing import Any, Optional
+import pytest
+
+
+class _Controller:
+	"""Registers datasets once the gate opens"""
+
+	def __init__(self):
+		self.gate = threading.Event()
+		self.gate.set()
+		self.registered: list[tuple[str, str, int]] = []
+		self.job_events: list[tuple[str, Optional[int]]] = []
+		self.beats: list[tuple[list[str], list[tuple[str, int]]]] = []
+
+	def register_dataset(self, dataset_id: str, worker_id: str, size_bytes: int) -> bool:
+		self.registered.append((dataset_id, worker_id, size_bytes))
+		return self.gate.wait(10)
+
+	def heartbeat(
+		self, worker_id: str, resources: Any, running_jobs: list[str], datasets: list[tuple[str, int]], interval_s: float
+	) -> bool:
+		self.beats.append((running_jobs, datasets))
+		return True
+
+	def update_jobs(self, worker_id: str, events: list[tuple[str, Optional[int]]]) -> bool:
+		self.job_events.extend(events)
+		return True
+
+
+@pytest.fixture
+def controller():
+	return _Controller()
+
+
+@pytest.fixture
+def server(controller, request):
+	"""A job server for the test process, reached by send_command. Its datasets budget_mb by the indirect param, if any"""
+	local_server = LocalServer()
+	dataset_manager = DatasetManager(budget_mb=getattr(request, "param", None))
+	job_manager = JobManager(pool_size=1)
+	thread = threading.Thread(target=job_server.start, args=(local_server, dataset_manager, job_manager, controller, 0.05))
+	thread.start()
+	assert send_command("unknown", "") == "E"
+	assert send_command("new", "x") == "W"
+	assert send_command("report_worker_id", "w1") == "Y"
+	yield local_server
+	send_command("quit", "")
+	thread.join()
+	job_manager.quit()
+	dataset_manager.quit()
+	local_server.quit()
@@ -0,0 +1,268 @@
+from gnosch.worker.client_worker import ClientWorker
+from gnosch.worker.api_server import WorkerImpl, add_encoded_dataset_command, encode_block
+from gnosch.worker.job_interface import get_dataset
+from gnosch.worker.local_comm import send_command
+from gnosch.controller.api_server import striped
+from gnosch.client.jobs import job_spec
+from concurrent import futures
+from multiprocessing import shared_memory
+from typing import Any
+import gnosch.api.gnosch_pb2_grpc as services
+import gnosch.api.gnosch_pb2 as protos
+import gnosch.common.compression as compression
+import grpc
+import os
+import time
+import uuid
+import zlib
+import pytest
+
+
+class _Peer(services.GnoschBase):
+	"""Holds a single dataset, serves its range as the worker does"""
+
+	def __init__(self, dataset_id: str, data: bytes):
+		self.dataset_id = dataset_id
+		self.data = data
+		self.served = 0
+		# ends the streams halfway
+		self.truncate = False
+
+	def DatasetCommand(self, request, context):
+		if request.dataset_id != self.dataset_id:
+			yield protos.DatasetCommandResponse(status=protos.DatasetCommandResult.DATASET_NOT_FOUND)
+			return
+		self.served += 1
+		header = protos.DatasetCommandResponse(
+			status=protos.DatasetCommandResult.DATASET_AVAILABLE, size_bytes=len(self.data)
+		).SerializeToString()
+		end = request.offset + request.length if request.length else len(self.data)
+		if self.truncate:
+			end //= 2
+		view = memoryview(self.data)
+		for i in range(request.offset, end, request.block_size_hint):
+			yield encode_block(header, i, view[i : min(i + request.block_size_hint, end)])
+
+
+def _serve(servicer: Any) -> tuple[Any, str]:
+	server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+	services.add_GnoschBaseServicer_to_server(servicer, server)
+	add_encoded_dataset_command(servicer, server)
+	port = server.add_insecure_port("localhost:0")
+	server.start()
+	return server, f"localhost:{port}"
+
+
+def _name() -> str:
+	return f"test-{uuid.uuid4().hex[:8]}"
+
+
+@pytest.fixture
+def peer():
+	data = bytes(range(256)) * 10_000
+	server, url = _serve(_Peer("d1", data))
+	clients = [ClientWorker(url) for _ in range(3)]
+	yield clients[0], data, clients
+	for client in clients:
+		client.quit()
+	server.stop(None)
+
+
+def test_retrieve_into(peer):
+	client, data, _ = peer
+	buffers = []
+
+	def allocate(size: int) -> memoryview:
+		buffers.append(bytearray(size))
+		return memoryview(buffers[-1])
+
+	assert client.retrieve_into("d1", allocate, block_size=100_000) == len(data)
+	assert len(buffers) == 1
+	assert buffers[0] == data
+	assert client.retrieve_into("d2", allocate) is None
+	assert len(buffers) == 1
+
+
+def test_range(peer):
+	client, data, _ = peer
+	request = protos.DatasetCommandRequest(dataset_id="d1", retrieve=True, block_size_hint=1000, offset=1500, length=2600)
+	responses = list(client.client.DatasetCommand(request))
+	assert [response.offset for response in responses] == [1500, 2500, 3500]
+	assert b"".join(response.data for response in responses) == data[1500:4100]
+	assert all(response.size_bytes == len(data) for response in responses)
+
+
+def test_striped(peer):
+	_, data, clients = peer
+	request = protos.DatasetCommandRequest(dataset_id="d1", retrieve=True, block_size_hint=100_000, offset=10)
+	received = bytearray(len(data))
+	offsets = []
+	for response in striped(request, [client.client for client in clients], len(data)):
+		received[response.offset : response.offset + len(response.data)] = response.data
+		offsets.append(response.offset)
+	assert received[10:] == data[10:]
+	assert sorted(offsets) == list(range(10, len(data), 100_000))
+
+
+def test_fetch_dataset(server, controller):
+	name, data = _name(), bytes(range(256)) * 4_000
+	peer = _Peer(name, data)
+	peer_server, url = _serve(peer)
+	worker = WorkerImpl(worker_id="w1")
+	request = protos.FetchDatasetRequest(dataset_id=name, source_url=url, block_size_hint=100_000)
+
+	# the concurrent fetches of a dataset wait for the first one
+	with futures.ThreadPoolExecutor(max_workers=4) as pool:
+		responses = list(pool.map(lambda _: worker.FetchDataset(request, None), range(4)))
+	assert [response.status for response in responses] == [protos.DatasetCommandResult.DATASET_AVAILABLE] * 4
+	assert peer.served == 1
+	assert worker.fetches == {}
+	assert controller.registered == [(name, "w1", len(data))]
+	fetched, close, available = get_dataset(name, 0)
+	assert available and fetched == data
+	close()
+
+	missing = protos.FetchDatasetRequest(dataset_id=_name(), source_url=url)
+	assert worker.FetchDataset(missing, None).status == protos.DatasetCommandResult.DATASET_NOT_FOUND
+
+	# a failed fetch leaves nothing behind, so it can be retried
+	peer.dataset_id, peer.truncate = _name(), True
+	request = protos.FetchDatasetRequest(dataset_id=peer.dataset_id, source_url=url)
+	with pytest.raises(ValueError, match="ended at"):
+		worker.FetchDataset(request, None)
+	assert send_command("ready_ds", peer.dataset_id) == "N"
+	with pytest.raises(FileNotFoundError):
+		shared_memory.SharedMemory(name=peer.dataset_id)
+	peer.truncate = False
+	assert worker.FetchDataset(request, None).status == protos.DatasetCommandResult.DATASET_AVAILABLE
+
+	for client in worker.peers.values():
+		client.quit()
+	peer_server.stop(None)
+
+
+class _EmptyPeer(services.GnoschBase):
+	def DatasetCommand(self, request, context):
+		yield protos.DatasetCommandResponse(status=protos.DatasetCommandResult.DATASET_AVAILABLE, size_bytes=0)
+
+
+def test_fetch_empty(server, controller):
+	peer_server, url = _serve(_EmptyPeer())
+	worker = WorkerImpl(worker_id="w1")
+	name = _name()
+	request = protos.FetchDatasetRequest(dataset_id=name, source_url=url)
+	# rejected explicitly, leaving nothing behind
+	assert worker.FetchDataset(request, None).status == protos.DatasetCommandResult.DATASET_INVALID
+	assert send_command("ready_ds", name) == "N"
+	assert send_command("new", name) == "Y"
+	assert send_command("discard", name) == "Y"
+	assert controller.registered == []
+	for client in worker.peers.values():
+		client.quit()
+	peer_server.stop(None)
+
+
+def test_retrieve_from_worker(server):
+	name, data = _name(), bytes(range(256)) * 1_000
+	shm = shared_memory.SharedMemory(name=name, create=True, size=len(data))
+	shm.buf[:] = data
+	shm.close()
+	assert send_command("new", name) == "Y"
+	assert send_command("ready", name) == "Y"
+	worker_server, url = _serve(WorkerImpl(worker_id="w1"))
+	client = ClientWorker(url)
+	buffers = []
+
+	def allocate(size: int) -> memoryview:
+		buffers.append(bytearray(size))
+		return memoryview(buffers[-1])
+
+	assert client.retrieve_into(name, allocate, block_size=64_000) == len(data)
+	assert buffers == [data]
+	request = protos.DatasetCommandRequest(dataset_id=name, retrieve=True, block_size_hint=1000, offset=500, length=2500)
+	responses = list(client.client.DatasetCommand(request))
+	assert [response.offset for response in responses] == [500, 1500, 2500]
+	assert b"".join(response.data for response in responses) == data[500:3000]
+
+	client.quit()
+	worker_server.stop(None)
+
+
+def test_fast_link_stays_uncompressed(server, monkeypatch):
+	# compressing at 50MB/s to half the size, which pays off only on links slower than the codec
+	def slow_compress(data: Any) -> bytes:
+		time.sleep(len(data) / 50e6)
+		return zlib.compress(data, 1)
+
+	monkeypatch.setattr(compression, "codecs", {"slow": (slow_compress, zlib.decompress)})
+	monkeypatch.setattr(compression, "_compress_mbps", {})
+	name, data = _name(), b"".join(os.urandom(32) + bytes(32) for _ in range(1 << 16))
+	shm = shared_memory.SharedMemory(name=name, create=True, size=len(data))
+	shm.buf[:] = data
+	shm.close()
+	assert send_command("new", name) == "Y"
+	assert send_command("ready", name) == "Y"
+	worker_server, url = _serve(WorkerImpl(worker_id="w1"))
+	client = ClientWorker(url)
+	codecs: list[str] = []
+	retrieve = client.client.DatasetCommand
+
+	def recording(request: Any) -> Any:
+		for response in retrieve(request):
+			codecs.append(response.codec)
+			yield response
+
+	client.client.DatasetCommand = recording
+
+	def allocate(size: int) -> memoryview:
+		return memoryview(bytearray(size))
+
+	# told the link is slow, so compressing, which must not count as the link being slow
+	assert client.retrieve_into(name, allocate, link_mbps=1.0) == len(data)
+	assert set(codecs) == {"slow"}
+	for _ in range(3):
+		codecs.clear()
+		assert client.retrieve_into(name, allocate) == len(data)
+		assert set(codecs) == {""}
+	assert client.measured_mbps is not None and client.measured_mbps > 50
+
+	client.quit()
+	worker_server.stop(None)
+
+
+def test_batches(server):
+	names = [_name(), _name()]
+	for name in names:
+		shm = shared_memory.SharedMemory(name=name, create=True, size=8)
+		shm.close()
+		assert send_command("new", name) == "Y"
+		assert send_command("ready", name) == "Y"
+	worker = WorkerImpl(worker_id="w1")
+	available, dropped, missing = (
+		protos.DatasetCommandResult.DATASET_AVAILABLE,
+		protos.DatasetCommandResult.DATASET_DROPPED,
+		protos.DatasetCommandResult.DATASET_NOT_FOUND,
+	)
+
+	statuses = worker.DatasetBatch(protos.DatasetBatchRequest(dataset_ids=[*names, "missing"]), None).datasets
+	assert [(response.dataset_id, response.status) for response in statuses] == [
+		(names[0], available),
+		(names[1], available),
+		("missing", missing),
+	]
+	drops = worker.DatasetBatch(protos.DatasetBatchRequest(dataset_ids=[names[0], "missing"], drop=True), None).datasets
+	assert [response.status for response in drops] == [dropped, missing]
+	statuses = worker.DatasetBatch(protos.DatasetBatchRequest(dataset_ids=names), None).datasets
+	assert [response.status for response in statuses] == [missing, available]
+	worker.DatasetBatch(protos.DatasetBatchRequest(dataset_ids=names, drop=True), None)
+
+	created = worker.JobCreateBatch(
+		protos.JobCreateBatchRequest(jobs=[protos.JobCreateRequest(spec=job_spec("sys:exit", code)) for code in (0, 3)]), None
+	)
+	assert [job.job_status for job in created.jobs] == [protos.JobStatus.WORKER_ACCEPTED] * 2
+	request = protos.JobStatusBatchRequest(job_ids=[job.job_id for job in created.jobs])
+	deadline = time.monotonic() + 10
+	while protos.JobStatus.WORKER_RUNNING in (statuses := [job.job_status for job in worker.JobStatusBatch(request, None).jobs]):
+		assert time.monotonic() < deadline
+		time.sleep(0.01)
+	assert statuses == [protos.JobStatus.FINISHED, protos.JobStatus.WORKER_ERROR]
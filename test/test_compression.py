@@ -0,0 +1,16 @@
+from gnosch.common import compression
+import os
+
+
+def test_choose():
+	text = b"".join(b"line %d of some log output\n" % i for i in range(10_000))
+	sample = text[: compression.sample_size]
+	# a slow link pays for any compression, a link faster than the codecs for none
+	assert compression.choose(sample, 1.0, compression.codecs) != compression.none
+	assert compression.choose(sample, 1e6, compression.codecs) == compression.none
+	# incompressible data is not worth compressing
+	assert compression.choose(os.urandom(compression.sample_size), 100.0, compression.codecs) == compression.none
+	assert compression.choose(sample, 1.0, []) == compression.none
+
+	for codec in [compression.none, *compression.codecs]:
+		assert compression.decompress(codec, compression.compress(codec, memoryview(text))) == text
@@ -0,0 +1,43 @@
+from gnosch.worker.datasets import DatasetManager, DatasetStatus
+from multiprocessing import shared_memory
+import os
+import time
+import uuid
+
+
+def _upload(dataset_manager: DatasetManager, name: str, fill: int) -> None:
+	shm = shared_memory.SharedMemory(name=name, create=True, size=1 << 20)
+	assert shm.buf is not None
+	shm.buf[:] = bytes([fill]) * (1 << 20)
+	shm.close()
+	assert dataset_manager.new(name)
+	assert dataset_manager.finalize(name)
+
+
+def test_spill(tmp_path):
+	dataset_manager = DatasetManager(budget_mb=2, spill_dir=str(tmp_path))
+	names = [f"test-{uuid.uuid4().hex[:8]}" for _ in range(3)]
+	for i, name in enumerate(names[:2]):
+		_upload(dataset_manager, name, i)
+	time.sleep(0.01)
+	dataset_manager.use(names[0])
+	assert dataset_manager.release(names[0])
+	# the least recently used goes to disk, still counted as held but not against the memory
+	_upload(dataset_manager, names[2], 2)
+	assert dataset_manager.held_mb() == 2
+	assert os.listdir(tmp_path) == [names[1]]
+	assert dataset_manager.status(names[1]) == DatasetStatus.finalized
+	assert sorted(dataset_manager.sizes()) == sorted((name, 1 << 20) for name in names)
+
+	# and gets mapped back once used, in place of the now least recently used
+	dataset_manager.use(names[1])
+	assert dataset_manager.release(names[1]) and not dataset_manager.release(names[1])
+	assert dataset_manager.held_mb() == 2
+	assert os.listdir(tmp_path) == [names[0]]
+	shm = shared_memory.SharedMemory(name=names[1], create=False)
+	assert bytes(shm.buf[:3]) == b"\x01\x01\x01" and shm.size == 1 << 20
+	shm.close()
+
+	for name in names:
+		assert dataset_manager.drop(name)
+	assert (dataset_manager.held_bytes, dataset_manager.datasets, os.listdir(tmp_path)) == (0, {}, [])
@@ -0,0 +1,126 @@
+from gnosch.controller.api_server import ControllerImpl, Worker
+from gnosch.controller.datasets import DatasetManager
+from gnosch.controller.executor import task_graph_of
+import gnosch.api.gnosch_pb2 as protos
+import grpc
+import threading
+import pytest
+
+
+class _Aborted(Exception):
+	pass
+
+
+class _Context:
+	def abort(self, code, details):
+		raise _Aborted(code, details)
+
+
+class _Worker:
+	"""Runs each job on a thread, the job producing the outputs of its task -- and fails those not finding their inputs"""
+
+	def __init__(self, worker_id: str, controller: ControllerImpl, outputs: dict[str, dict[str, int]], failing: set[str]):
+		self.worker_id = worker_id
+		self.controller = controller
+		self.outputs = outputs
+		self.failing = failing
+		self.held: set[str] = set()
+		self.launched: list[str] = []
+		self.lock = threading.Lock()
+
+	def _register(self, dataset_id: str) -> None:
+		status = protos.DatasetCommandResult.DATASET_AVAILABLE
+		self.controller.RegisterDataset(protos.DatasetCommandResponse(status=status, dataset_id=dataset_id, worker_id=self.worker_id), None)
+
+	def _run(self, job_id: str, task_id: str, inputs: list[str]) -> None:
+		with self.lock:
+			ok = task_id not in self.failing and set(inputs) <= self.held
+			if ok:
+				self.held.update(self.outputs[task_id])
+		if ok:
+			for dataset_id in self.outputs[task_id]:
+				self._register(dataset_id)
+		job_status = protos.JobStatus.FINISHED if ok else protos.JobStatus.WORKER_ERROR
+		job = protos.JobResponse(job_id=job_id, job_status=job_status, exit_code=0 if ok else 1)
+		self.controller.UpdateJobs(protos.UpdateJobsRequest(worker_id=self.worker_id, jobs=[job]), None)
+
+	def JobCreate(self, request):
+		job_id = f"{self.worker_id}-{request.definition}"
+		self.launched.append(request.definition)
+		threading.Thread(target=self._run, args=(job_id, request.definition, list(request.inputs))).start()
+		return protos.JobResponse(job_id=job_id, job_status=protos.JobStatus.WORKER_ACCEPTED, worker_id=self.worker_id)
+
+	def FetchDataset(self, request):
+		source = next(worker.client for worker in self.controller.workers.values() if worker.url == request.source_url)
+		if request.dataset_id not in source.held:
+			return protos.DatasetCommandResponse(status=protos.DatasetCommandResult.DATASET_NOT_FOUND)
+		with self.lock:
+			self.held.add(request.dataset_id)
+		self._register(request.dataset_id)
+		return protos.DatasetCommandResponse(status=protos.DatasetCommandResult.DATASET_AVAILABLE)
+
+	def DatasetCommand(self, request):
+		with self.lock:
+			self.held.remove(request.dataset_id)
+		status = protos.DatasetCommandResult.DATASET_DROPPED
+		yield protos.DatasetCommandResponse(status=status, dataset_id=request.dataset_id, worker_id=self.worker_id)
+
+
+def _request() -> protos.SubmitGraphRequest:
+	"""A diamond, whose middle tasks don't fit a single worker at once"""
+	request = protos.SubmitGraphRequest()
+	tasks = {"a": ([], {"x": 10}), "b": (["x"], {"y": 10}), "c": (["x"], {"z": 10}), "d": (["y", "z"], {"out": 1})}
+	for task_id, (inputs, outputs_mb) in tasks.items():
+		task = request.tasks[task_id]
+		task.inputs.extend(inputs)
+		task.outputs_mb.update(outputs_mb)
+		task.memory_mb, task.runtime_est_s, task.definition = 500, 10, task_id
+	return request
+
+
+def _controller(failing: set[str]) -> tuple[ControllerImpl, dict[str, _Worker]]:
+	controller = ControllerImpl(DatasetManager())
+	outputs = {task_id: dict(task.outputs_mb) for task_id, task in _request().tasks.items()}
+	clients = {worker_id: _Worker(worker_id, controller, outputs, failing) for worker_id in ("w1", "w2")}
+	for worker_id, client in clients.items():
+		resources = protos.WorkerResources(cpus=1, memory_mb=1000.0)
+		controller.workers[worker_id] = Worker(url=f"url-{worker_id}", channel=None, client=client, resources=resources)
+	return controller, clients
+
+
+def test_task_graph_of():
+	task_graph, jobs = task_graph_of(_request())
+	assert [output.dataset_id for output in task_graph["d"].outputs] == ["out"]
+	assert [task_input.dataset_id for task_input in task_graph["d"].inputs] == ["y", "z"]
+	assert (task_graph["b"].memory_mb, task_graph["b"].prefered_cpus) == (500, 1)
+	assert (jobs["b"].definition, list(jobs["b"].inputs), jobs["b"].memory_mb) == ("b", ["x"], 500)
+
+
+def test_submit_graph():
+	controller, clients = _controller(failing=set())
+	statuses = list(controller.SubmitGraph(_request(), _Context()))
+	finished = [status.task_id for status in statuses if status.job.job_status == protos.JobStatus.FINISHED]
+	assert sorted(finished) == ["a", "b", "c", "d"]
+	assert finished[0] == "a" and finished[-1] == "d"
+	# the middle ones ran at both, so something got fetched, and all ran with their inputs there
+	assert all(clients[worker_id].launched for worker_id in clients)
+	assert sorted(sum((client.launched for client in clients.values()), [])) == ["a", "b", "c", "d"]
+	# the producers' copies got dropped once fetched, the rest once used, so only the final output stays
+	for dataset_id in ("x", "y", "z", "out"):
+		holders = {worker_id for worker_id, client in clients.items() if dataset_id in client.held}
+		assert set(controller.dataset_manager.holders_of(dataset_id)) == holders
+		assert len(holders) == (1 if dataset_id == "out" else 0)
+	assert (controller.workers["w1"].cpus_used, controller.workers["w2"].cpus_used) == (0, 0)
+	assert controller.job_registry.watchers == {}
+
+
+def test_failed_task():
+	controller, clients = _controller(failing={"b"})
+	statuses = []
+	with pytest.raises(_Aborted) as e:
+		for status in controller.SubmitGraph(_request(), _Context()):
+			statuses.append(status)
+	assert e.value.args[0] == grpc.StatusCode.ABORTED
+	assert "task b failed" in e.value.args[1]
+	assert "d" not in sum((client.launched for client in clients.values()), [])
+	assert statuses[-1].task_id == "b" and statuses[-1].job.job_status == protos.JobStatus.WORKER_ERROR
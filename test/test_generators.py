@@ -0,0 +1,35 @@
+from gnosch.scheduler.api import schedule
+from gnosch.scheduler.generators import chains, fan_in, fork_join, heterogeneous_cluster, homogeneous_cluster, layered, map_reduce
+from gnosch.scheduler.graph import CompiledGraph
+from gnosch.scheduler.simulator import simulate
+import random
+import pytest
+
+
+@pytest.mark.parametrize(
+	"generate",
+	[
+		lambda rng: map_reduce(rng, 8, 4),
+		lambda rng: fork_join(rng, 6, 3),
+		lambda rng: layered(rng, 5, 8),
+		lambda rng: chains(rng, 3, 5),
+		lambda rng: fan_in(rng, 10),
+	],
+)
+def test_shapes(generate):
+	task_graph = generate(random.Random(0))
+	assert task_graph == generate(random.Random(0))
+	graph = CompiledGraph(task_graph)
+	cluster = heterogeneous_cluster(random.Random(0), 6, rack_size=3)
+	plan = schedule(task_graph, cluster)
+	# the makespan is at least the critical path with all tasks at the largest node
+	max_cpus = max(node.cpus for node in cluster.nodes.values())
+	assert simulate(cluster, task_graph, plan) >= max(graph.cpusecs) / max_cpus
+
+
+def test_clusters():
+	homogeneous = homogeneous_cluster(3, mbps=50.0)
+	assert set(homogeneous.comm_mbps.values()) == {50.0}
+	assert len(homogeneous.comm_mbps) == 6
+	racks = heterogeneous_cluster(random.Random(0), 4, rack_size=2)
+	assert racks.comm_mbps[("n0", "n1")] > racks.comm_mbps[("n1", "n2")]
@@ -0,0 +1,58 @@
+from gnosch.scheduler.model import ClusterSpec, NodeSpec, Task, TaskOutput, TaskInput
+from gnosch.scheduler.graph import CompiledGraph
+import pytest
+
+
+def _task(inputs: list[str], outputs: list[tuple[str, int]], runtime_est_s: int) -> Task:
+	return Task(
+		inputs=[TaskInput(dataset_id=dataset_id) for dataset_id in inputs],
+		outputs=[TaskOutput(dataset_id=dataset_id, size_mb=size_mb) for dataset_id, size_mb in outputs],
+		memory_mb=128,
+		prefered_cpus=1,
+		runtime_est_s=runtime_est_s,
+	)
+
+
+def test_diamond():
+	# dag, listed sink first:
+	# t1 --> t2 --> t4
+	#    \-> t3 -/
+	task_graph = {
+		"t4": _task(["d2", "d3", "d2"], [], 1),
+		"t3": _task(["d1"], [("d3", 200)], 5),
+		"t2": _task(["d1"], [("d2", 100)], 2),
+		"t1": _task([], [("d1", 100)], 3),
+	}
+	cluster = ClusterSpec(
+		nodes={"n1": NodeSpec(cpus=1, memory_mb=1024), "n2": NodeSpec(cpus=1, memory_mb=1024)}, comm_mbps={("n1", "n2"): 100.0}
+	)
+
+	graph = CompiledGraph(task_graph)
+
+	t = graph.task_index
+	d = graph.dataset_index
+	assert [graph.task_ids[i] for i in graph.order][0] == "t1"
+	assert [graph.task_ids[i] for i in graph.order][-1] == "t4"
+	assert sorted(graph.dataset_ids[i] for i in graph.inputs(t["t4"])) == ["d2", "d3"]
+	assert sorted(graph.task_ids[i] for i in graph.consumers(d["d1"])) == ["t2", "t3"]
+	assert graph.producer[d["d3"]] == t["t3"]
+	assert graph.depends(t["t4"], t["t3"]) and not graph.depends(t["t4"], t["t1"])
+	# t1 -> t3 -> t4 is the longest path, 9s of runtime
+	assert graph.critical_path_s() == pytest.approx(9.0)
+	assert graph.upward_ranks()[t["t2"]] == pytest.approx(3.0)
+	assert graph.downward_ranks()[t["t4"]] == pytest.approx(8.0)
+	# plus a transfer of d1 and of d3 at 100mb/s
+	assert graph.critical_path_s(cluster) == pytest.approx(9.0 + 1.0 + 2.0)
+
+
+def test_validation():
+	with pytest.raises(ValueError, match="no producer"):
+		CompiledGraph({"t1": _task(["d0"], [], 1)})
+	external = CompiledGraph({"t1": _task(["d0"], [("d1", 1)], 1), "t2": _task(["d1", "d0"], [], 1)}, allow_external=True)
+	assert external.produced == 1
+	assert external.dataset_ids[1:] == ["d0"] and external.producer[1] == -1
+	assert [external.task_ids[i] for i in external.order] == ["t1", "t2"]
+	with pytest.raises(ValueError, match="produced by both"):
+		CompiledGraph({"t1": _task([], [("d1", 1)], 1), "t2": _task([], [("d1", 1)], 1)})
+	with pytest.raises(ValueError, match="cycle"):
+		CompiledGraph({"t1": _task(["d2"], [("d1", 1)], 1), "t2": _task(["d1"], [("d2", 1)], 1)})
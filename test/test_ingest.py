@@ -0,0 +1,99 @@
+from gnosch.client.ingest import ingest
+from gnosch.worker.api_server import WorkerImpl
+from gnosch.worker.job_interface import get_dataset
+from gnosch.worker.local_comm import send_command
+from concurrent import futures
+import gnosch.api.gnosch_pb2_grpc as services
+import gnosch.api.gnosch_pb2 as protos
+import grpc
+import pytest
+import uuid
+
+
+class _Cluster(services.GnoschBase):
+	"""Both the controller and its single worker, which fails the given streams once past 3000 bytes"""
+
+	def __init__(self, failing: set[int]):
+		self.url = ""
+		self.failing = failing
+		self.received = bytearray()
+		self.size = 0
+		self.streams = 0
+
+	def PlaceDataset(self, request, context):
+		return protos.PlaceDatasetResponse(worker_id="w1", url=self.url)
+
+	def IngestDataset(self, request_iterator, context):
+		self.streams += 1
+		for block in request_iterator:
+			if block.HasField("size_bytes"):
+				self.size = block.size_bytes
+			assert block.offset <= len(self.received)
+			self.received[block.offset : block.offset + len(block.data)] = block.data
+			if self.streams in self.failing and len(self.received) >= 3000:
+				context.abort(grpc.StatusCode.UNAVAILABLE, "interrupted")
+		status = (
+			protos.DatasetCommandResult.DATASET_AVAILABLE
+			if len(self.received) == self.size
+			else protos.DatasetCommandResult.DATASET_NOT_READY
+		)
+		return protos.IngestDatasetResponse(status=status, worker_id="w1", received_bytes=len(self.received))
+
+
+@pytest.mark.parametrize("failing,streams", [({1}, 3), ({1, 2}, 4)])
+def test_resumed_ingest(failing, streams):
+	cluster = _Cluster(failing)
+	server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+	services.add_GnoschBaseServicer_to_server(cluster, server)
+	port = server.add_insecure_port("localhost:0")
+	server.start()
+	cluster.url = f"localhost:{port}"
+	data = bytes(range(256)) * 40
+	with grpc.insecure_channel(cluster.url) as channel:
+		assert ingest(services.GnoschBaseStub(channel), "d1", data, block_size=1000) == "w1"
+	server.stop(None)
+	assert cluster.received == data
+	# the interrupted one, the inquiries about the received bytes (failing too with {1, 2}), and the resumed one
+	assert cluster.streams == streams
+
+
+def _blocks(dataset_id: str, data: bytes, offsets: list[int], size: int = 1000) -> list[protos.DatasetBlock]:
+	blocks = [protos.DatasetBlock(offset=offset, data=data[offset : offset + size]) for offset in offsets]
+	blocks[0].dataset_id, blocks[0].size_bytes = dataset_id, len(data)
+	return blocks
+
+
+def test_worker_ingest(server, controller):
+	name, data = f"test-{uuid.uuid4().hex[:8]}", bytes(range(256)) * 20
+	worker = WorkerImpl(worker_id="w1")
+
+	response = worker.IngestDataset(iter(_blocks(name, data, [0, 1000])), None)
+	assert (response.status, response.received_bytes) == (protos.DatasetCommandResult.DATASET_NOT_READY, 2000)
+	assert worker.ingests[name].received == 2000
+	assert send_command("ready_ds", name) == "N"
+
+	# a block past the received bytes ends the stream, leaving the rest for a resume
+	response = worker.IngestDataset(iter(_blocks(name, data, [2000, 4000, 3000])), None)
+	assert (response.status, response.received_bytes) == (protos.DatasetCommandResult.DATASET_NOT_READY, 3000)
+
+	# the inquiry, and the resume overlapping what has been received
+	response = worker.IngestDataset(iter(_blocks(name, data, [0], size=0)), None)
+	assert response.received_bytes == 3000
+	assert controller.registered == []
+	response = worker.IngestDataset(iter(_blocks(name, data, [2500, 3500, 4500])), None)
+	assert (response.status, response.received_bytes) == (protos.DatasetCommandResult.DATASET_AVAILABLE, len(data))
+	assert worker.ingests == {}
+	assert controller.registered == [(name, "w1", len(data))]
+	ingested, close, available = get_dataset(name, 0)
+	assert available and ingested == data
+	close()
+
+	# once available, a repeated ingest is answered without receiving anything
+	response = worker.IngestDataset(iter(_blocks(name, data, [0])), None)
+	assert (response.status, response.received_bytes) == (protos.DatasetCommandResult.DATASET_AVAILABLE, len(data))
+	assert worker.IngestDataset(iter([]), None).status == protos.DatasetCommandResult.UNKNOWN_DATASET_STATUS
+	# the empty ones get rejected, as the shared memory can't be empty
+	empty = f"test-{uuid.uuid4().hex[:8]}"
+	response = worker.IngestDataset(iter([protos.DatasetBlock(dataset_id=empty, size_bytes=0)]), None)
+	assert response.status == protos.DatasetCommandResult.DATASET_INVALID
+	assert (worker.ingests, send_command("ready_ds", empty)) == ({}, "N")
@@ -0,0 +1,58 @@
+from gnosch.controller.jobs import JobRegistry
+from concurrent.futures import ThreadPoolExecutor
+import gnosch.api.gnosch_pb2 as protos
+import threading
+import time
+
+accepted, running = protos.JobStatus.WORKER_ACCEPTED, protos.JobStatus.WORKER_RUNNING
+finished, error = protos.JobStatus.FINISHED, protos.JobStatus.WORKER_ERROR
+
+
+def test_update():
+	registry = JobRegistry()
+	assert registry.update("j1", "w1", running)
+	# a late acceptance doesn't go back
+	assert not registry.update("j1", "w1", accepted)
+	assert registry.update("j1", "w1", error, 3)
+	assert not registry.update("j1", "w1", finished, 0)
+	record = registry.get("j1")
+	assert record is not None and (record.job_status, record.exit_code) == (error, 3)
+	assert registry.get("j2") is None
+
+
+def test_watch():
+	registry = JobRegistry()
+	registry.update("j1", "w1", accepted)
+	registry.update("j2", "w1", finished, 0)
+	with ThreadPoolExecutor(max_workers=1) as pool:
+		watched = pool.submit(lambda: [(r.job_id, r.job_status) for r in registry.watch(["j1", "j2", "j3"])])
+		time.sleep(0.05)
+		# those not watched, or not known when the watch started, don't count
+		registry.update("j3", "w1", finished, 0)
+		registry.update("j4", "w1", finished, 0)
+		assert not watched.done()
+		registry.update("j1", "w1", running)
+		registry.update("j1", "w1", finished, 0)
+		responses = watched.result(timeout=5)
+	unknown = protos.JobStatus.UNKNOWN_JOB_STATUS
+	assert responses == [("j1", accepted), ("j2", finished), ("j3", unknown), ("j1", running), ("j1", finished)]
+	assert registry.watchers == {}
+
+
+def test_watch_all():
+	registry = JobRegistry()
+	active = threading.Event()
+	active.set()
+	registry.update("j1", "w1", accepted)
+	with ThreadPoolExecutor(max_workers=1) as pool:
+		watch = registry.watch([], active.is_set)
+		first = pool.submit(next, watch)
+		while not registry.watchers:
+			time.sleep(0.01)
+		registry.update("j1", "w1", finished, 0)
+		registry.update("j2", "w1", running)
+		responses = [first.result(timeout=5), next(watch)]
+	assert [(r.job_id, r.job_status) for r in responses] == [("j1", finished), ("j2", running)]
+	active.clear()
+	assert list(watch) == []
+	assert registry.watchers == {}
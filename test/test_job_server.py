@@ -0,0 +1,114 @@
+from gnosch.worker.local_comm import LocalClient, send_command
+from gnosch.worker.job_interface import get_dataset
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+import base64
+import pytest
+import pickle
+import time
+import uuid
+
+
+def test_wait_dataset(server):
+	name = f"test-{uuid.uuid4().hex[:8]}"
+	clients = [LocalClient(server.path) for _ in range(4)]
+	with ThreadPoolExecutor(max_workers=len(clients)) as pool:
+		waiting = [pool.submit(client.call, "wait_ds", f"10000:{name}") for client in clients]
+		time.sleep(0.05)
+		assert not any(future.done() for future in waiting)
+		shm = shared_memory.SharedMemory(name=name, create=True, size=8)
+		assert send_command("new", name) == "Y"
+		start = time.monotonic()
+		assert send_command("ready", name) == "Y"
+		assert all(future.result().status == "Y" for future in waiting)
+		assert time.monotonic() - start < 1
+	shm.close()
+	assert send_command("wait_ds", f"0:{name}") == "Y"
+	for client in clients:
+		client.close()
+
+
+def test_wait_timeout(server):
+	start = time.monotonic()
+	assert send_command("wait_ds", "200:missing") == "N"
+	assert 0.2 <= time.monotonic() - start < 0.4
+	assert send_command("wait_ds", "0:missing") == "N"
+
+
+def test_slow_controller(server, controller):
+	controller.gate.clear()
+	name = f"test-{uuid.uuid4().hex[:8]}"
+	shm = shared_memory.SharedMemory(name=name, create=True, size=8)
+	assert send_command("new", name) == "Y"
+	client = LocalClient(server.path)
+	registration = client.submit("ready", name)
+	# the dataset is usable locally while its registration at the controller is pending
+	assert send_command("wait_ds", f"1000:{name}") == "Y"
+	assert send_command("ping", "") == "Y"
+	controller.gate.set()
+	assert client.result(registration).status == "Y"
+	shm.close()
+	client.close()
+
+
+def test_submit_call(server, controller):
+	args = base64.b64encode(pickle.dumps(((3,), {}))).decode()
+	assert send_command("submit_call", f"j1_0_sys:exit {args}") == "Y"
+	assert send_command("submit_call", f"j1_0_sys:exit {args}") == "N"
+	deadline = time.monotonic() + 10
+	while (status := send_command("ready_job", "j1")) == "N":
+		assert time.monotonic() < deadline
+		time.sleep(0.01)
+	assert status == "E"
+	# pushed to the controller
+	deadline = time.monotonic() + 10
+	while ("j1", 3) not in controller.job_events:
+		assert time.monotonic() < deadline
+		time.sleep(0.01)
+	assert controller.job_events.index(("j1", None)) >= 0
+
+
+def test_heartbeat(server, controller):
+	name = f"test-{uuid.uuid4().hex[:8]}"
+	shm = shared_memory.SharedMemory(name=name, create=True, size=8)
+	assert send_command("new", name) == "Y"
+	assert send_command("ready", name) == "Y"
+	deadline = time.monotonic() + 10
+	while not any((name, 8) in datasets for _, datasets in controller.beats):
+		assert time.monotonic() < deadline
+		time.sleep(0.01)
+	shm.close()
+
+
+def _upload(name: str) -> None:
+	shm = shared_memory.SharedMemory(name=name, create=True, size=1 << 20)
+	assert shm.buf is not None
+	shm.buf[:3] = b"abc"
+	shm.close()
+	assert send_command("new", name) == "Y"
+	assert send_command("ready", name) == "Y"
+
+
+@pytest.mark.parametrize("server", [1], indirect=True)
+def test_spill_pinned(server):
+	names = [f"test-{uuid.uuid4().hex[:8]}" for _ in range(3)]
+	_upload(names[0])
+	# the spill of the next one's finalization comes between the wait and the open, and skips the pinned one
+	assert send_command("wait_ds", f"0:{names[0]}") == "Y"
+	_upload(names[1])
+	shm = shared_memory.SharedMemory(name=names[0], create=False)
+	assert bytes(shm.buf[:3]) == b"abc"
+	shm.close()
+	assert send_command("release_ds", names[0]) == "Y"
+	assert send_command("release_ds", names[0]) == "N"
+
+	# once released, it goes, and the reader gets it mapped back
+	_upload(names[2])
+	with pytest.raises(FileNotFoundError):
+		shared_memory.SharedMemory(name=names[0], create=False)
+	data, close, available = get_dataset(names[0], 0)
+	assert available and bytes(data[:3]) == b"abc"
+	del data
+	close()
+	for name in names:
+		assert send_command("drop_ds", name) == "Y"
@@ -0,0 +1,119 @@
+from gnosch.worker.jobs import Call, JobManager, JobStatus, _compile
+from gnosch.client.jobs import job_spec
+from pathlib import Path
+import pickle
+import time
+import pytest
+
+
+def _wait(job_manager: JobManager, name: str) -> int:
+	deadline = time.monotonic() + 10
+	while (code := job_manager.status(name).code) is None:
+		assert time.monotonic() < deadline, f"job {name} did not finish"
+		time.sleep(0.01)
+	return code
+
+
+@pytest.fixture
+def job_manager():
+	job_manager = JobManager(pool_size=1, preload=[], max_jobs_per_runner=2)
+	yield job_manager
+	job_manager.quit()
+
+
+def test_exit_codes(job_manager):
+	jobs = {"ok": "x = 1", "exit": "import sys; sys.exit(5)", "exit_none": "import sys; sys.exit()", "raise": "raise ValueError()"}
+	for name, code in jobs.items():
+		assert job_manager.submit(name, code)
+		assert not job_manager.submit(name, code)
+	assert {name: _wait(job_manager, name) for name in jobs} == {"ok": 0, "exit": 5, "exit_none": 0, "raise": 1}
+	assert not job_manager.status("missing").exists
+
+
+def test_recycling(job_manager, tmp_path):
+	pids = tmp_path / "pids"
+	for i in range(6):
+		assert job_manager.submit(f"j{i}", f"import os; open({str(pids)!r}, 'a').write(f'{{os.getpid()}}\\n')")
+		assert _wait(job_manager, f"j{i}") == 0
+	# at most two jobs per runner -- a job may also land on a runner started for it while the refill is pending
+	counts: dict[str, int] = {}
+	for pid in pids.read_text().split():
+		counts[pid] = counts.get(pid, 0) + 1
+	assert len(counts) >= 3 and max(counts.values()) <= 2
+	with job_manager.lock:
+		assert len(job_manager.idle) + len(job_manager.busy) + job_manager.starting <= 1
+
+
+def test_crashing_runner(job_manager):
+	assert job_manager.submit("crash", "import os; os._exit(3)")
+	assert _wait(job_manager, "crash") == 3
+	assert job_manager.submit("after", "x = 1")
+	assert _wait(job_manager, "after") == 0
+
+
+def test_failed_preload():
+	job_manager = JobManager(pool_size=1, preload=["gnosch.no_such_module", "numpy"])
+	try:
+		assert job_manager.submit("j", "import sys; sys.exit(0 if 'numpy' in sys.modules else 7)")
+		assert _wait(job_manager, "j") == 0
+	finally:
+		job_manager.quit()
+
+
+def test_calls(job_manager, tmp_path):
+	out = tmp_path / "out"
+	spec = job_spec(Path.write_text, out, "written")
+	assert spec.entrypoint == "pathlib:Path.write_text"
+	jobs = {
+		"write": Call(spec.entrypoint, spec.args),
+		"exit": Call("sys:exit", pickle.dumps(((4,), {}))),
+		"no_args": Call("gc:collect"),
+		"bad_args": Call("json:dumps"),
+		"no_function": Call("json"),
+		"no_module": Call("gnosch.no_such_module:f"),
+	}
+	for name, call in jobs.items():
+		assert job_manager.submit(name, call)
+	codes = {name: _wait(job_manager, name) for name in jobs}
+	assert codes == {"write": 0, "exit": 4, "no_args": 0, "bad_args": 1, "no_function": 1, "no_module": 1}
+	assert out.read_text() == "written"
+	assert _compile("x = 1") is _compile("x = 1")
+
+
+def test_admission(tmp_path):
+	gate, started = tmp_path / "gate", tmp_path / "started"
+	held = [0.0]
+	job_manager = JobManager(pool_size=1, preload=[], memory_mb=100, held_mb=lambda: held[0])
+
+	def job(name: str) -> str:
+		return f"import os, time\nopen({str(started)!r}, 'a').write('{name} ')\nwhile not os.path.exists({str(gate)!r}): time.sleep(0.01)"
+
+	def running() -> set[str]:
+		time.sleep(0.3)
+		return set(started.read_text().split()) if started.exists() else set()
+
+	try:
+		with pytest.raises(ValueError, match="more than"):
+			job_manager.submit("huge", "x = 1", memory_mb=101)
+		assert not job_manager.status("huge").exists
+		assert job_manager.submit("a", job("a"), memory_mb=60)
+		assert job_manager.submit("b", job("b"), memory_mb=60)
+		# in order, so the ones not declaring memory wait too
+		assert job_manager.submit("c", job("c"))
+		assert running() == {"a"}
+		assert job_manager.status("b") == job_manager.status("c") == JobStatus(True, None)
+		gate.touch()
+		assert _wait(job_manager, "a") == _wait(job_manager, "b") == _wait(job_manager, "c") == 0
+
+		# the datasets held count against the budget, and the monitor notices them dropped
+		gate.unlink()
+		held[0] = 50.0
+		assert job_manager.submit("d", job("d"), memory_mb=60)
+		assert "d" not in running()
+		held[0] = 0.0
+		assert "d" in running()
+		gate.touch()
+		assert _wait(job_manager, "d") == 0
+		assert job_manager.reserved_mb == {}
+	finally:
+		job_manager.quit()
@@ -0,0 +1,48 @@
+from gnosch.worker.local_comm import LocalServer, LocalClient, send_command
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import pytest
+
+
+@pytest.fixture
+def server():
+	"""Replies to `echo:x` with Y followed by x, and to anything else with E, until `quit`"""
+	local_server = LocalServer()
+
+	def serve():
+		while True:
+			payload, client = local_server.receive()
+			command, data = payload.decode().split(":", 1)
+			if command == "quit":
+				local_server.sendto(b"Y", client)
+				break
+			local_server.sendto(b"Y" + data.encode() if command == "echo" else b"E", client)
+
+	thread = threading.Thread(target=serve)
+	thread.start()
+	yield local_server
+	send_command("quit", "")
+	thread.join()
+	local_server.quit()
+
+
+def test_commands(server):
+	assert send_command("echo", "hello") == "Y"
+	assert send_command("unknown", "") == "E"
+	client = LocalClient(server.path)
+	large = "x" * 5_000_000
+	assert client.call("echo", large).data == large.encode()
+	client.close()
+
+
+def test_pipelining(server):
+	client = LocalClient(server.path)
+	request_ids = [client.submit("echo", str(i)) for i in range(100)]
+	# results claimed in a different order than sent
+	for i, request_id in reversed(list(enumerate(request_ids))):
+		assert client.result(request_id).data == str(i).encode()
+
+	with ThreadPoolExecutor(max_workers=8) as pool:
+		replies = list(pool.map(lambda i: client.call("echo", str(i)).data, range(1000)))
+	assert replies == [str(i).encode() for i in range(1000)]
+	client.close()
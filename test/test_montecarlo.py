@@ -0,0 +1,63 @@
+from gnosch.scheduler.model import ClusterSpec, NodeSpec, Task, TaskOutput, TaskInput
+from gnosch.scheduler.api import schedule
+from gnosch.scheduler.simulator import simulate
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+from gnosch.scheduler.montecarlo import TaskNoise, monte_carlo, simulate_samples  # noqa: E402
+
+
+def _layered(rng: random.Random, layers: int, width: int):
+	task_graph = {}
+	previous: list[str] = []
+	for layer in range(layers):
+		current = []
+		for i in range(width):
+			task_id = f"t{layer}_{i}"
+			inputs = [TaskInput(dataset_id=f"d{p}") for p in rng.sample(previous, min(len(previous), 2))]
+			outputs = [TaskOutput(dataset_id=f"d{task_id}", size_mb=rng.randint(1, 256))]
+			task_graph[task_id] = Task(
+				inputs=inputs,
+				outputs=outputs,
+				memory_mb=rng.randint(128, 1024),
+				prefered_cpus=rng.randint(1, 4),
+				runtime_est_s=rng.randint(1, 30),
+			)
+			current.append(task_id)
+		previous = current
+	return task_graph
+
+
+def test_matches_simulator_without_noise():
+	rng = random.Random(7)
+	nodes = {f"n{i}": NodeSpec(cpus=rng.choice([2, 4]), memory_mb=4096) for i in range(4)}
+	cluster = ClusterSpec(nodes=nodes, comm_mbps={(a, b): 50.0 for a in nodes for b in nodes if a != b})
+	task_graph = _layered(rng, 5, 8)
+	plan = schedule(task_graph, cluster)
+	assert any(command.after_fetches for commands in plan.values() for command in commands)
+	ones = np.ones((3, len(task_graph)))
+
+	result = simulate_samples(cluster, task_graph, plan, ones, ones)
+
+	assert result.makespans == pytest.approx([simulate(cluster, task_graph, plan)] * 3)
+	assert not result.oom.any()
+
+
+def test_noise_spreads_makespan_and_memory():
+	node = NodeSpec(cpus=1, memory_mb=1024)
+	cluster = ClusterSpec(nodes={"n1": node}, comm_mbps={})
+	task_graph = {
+		"t1": Task(inputs=[], outputs=[TaskOutput(dataset_id="d1", size_mb=128)], memory_mb=400, prefered_cpus=1, runtime_est_s=10),
+		"t2": Task(inputs=[], outputs=[], memory_mb=400, prefered_cpus=1, runtime_est_s=10),
+		"t3": Task(inputs=[TaskInput(dataset_id="d1")], outputs=[], memory_mb=400, prefered_cpus=1, runtime_est_s=10),
+	}
+	plan = schedule(task_graph, cluster)
+
+	result = monte_carlo(cluster, task_graph, plan, TaskNoise(runtime_sigma=0.3, memory_sigma=0.3), samples=2000, seed=1)
+
+	percentiles = result.percentiles((10, 50, 90))
+	assert percentiles[10] < 30 < percentiles[90]
+	assert percentiles[50] == pytest.approx(30, rel=0.1)
+	# two tasks of 400mb run concurrently on 1024mb, so a +28% memory overshoot on both is an oom
+	assert 0.05 < result.oom_probability < 0.5
@@ -0,0 +1,184 @@
+from gnosch.controller.placement import WorkerLoad, place
+from gnosch.controller.api_server import ControllerImpl, Worker
+from gnosch.controller.datasets import DatasetManager
+import gnosch.api.gnosch_pb2 as protos
+import pytest
+
+
+def _loads(**cpus_used: int) -> dict[str, WorkerLoad]:
+	return {worker_id: WorkerLoad(cpus=2, cpus_used=used, free_memory_mb=1000.0) for worker_id, used in cpus_used.items()}
+
+
+def test_place():
+	loads = _loads(w1=0, w2=1, w3=0)
+	holders = {"big": ["w2"], "small": ["w3", "w1"], "unknown": ["w1"]}
+	# the most input bytes locally, despite the load
+	assert place(loads, {"big": 100, "small": 10}, holders, 1, 0).worker_id == "w2"
+	# the least loaded of those holding the same, also counting those of unknown size
+	assert place(loads, {"small": 10}, holders, 1, 0).worker_id == "w1"
+	assert place(loads, {"small": 10, "unknown": -1}, holders, 1, 0).worker_id == "w1"
+	assert place(loads, {}, holders, 1, 0).worker_id == "w1"
+
+	# those without the capacity get skipped, the inputs fetched from the least loaded holder
+	placement = place(_loads(w1=0, w2=2, w3=1), {"big": 100, "small": 10}, holders, 1, 0)
+	assert placement.worker_id == "w1"
+	assert placement.fetches == [("big", "w2")]
+	placement = place(loads, {"big": 100, "small": 10, "missing": 5}, holders, 1, 2000)
+	assert placement.worker_id == "w2"
+	assert placement.fetches == [("small", "w1")]
+
+	# queued at the best one when none has the capacity
+	assert place(_loads(w1=2, w2=2), {"big": 100}, holders, 1, 0).worker_id == "w2"
+	with pytest.raises(ValueError, match="no workers"):
+		place({}, {}, holders, 1, 0)
+
+
+class _Worker:
+	"""Accepts the jobs"""
+
+	def __init__(self, worker_id: str):
+		self.worker_id = worker_id
+		self.jobs: list[str] = []
+		self.fetched: list[tuple[str, str]] = []
+		self.batches = 0
+
+	def JobCreate(self, request):
+		self.jobs.append(f"{self.worker_id}-{len(self.jobs)}")
+		return protos.JobResponse(job_id=self.jobs[-1], job_status=protos.JobStatus.WORKER_ACCEPTED, worker_id=self.worker_id)
+
+	def FetchDataset(self, request):
+		self.fetched.append((request.dataset_id, request.source_url))
+		return protos.DatasetCommandResponse(status=protos.DatasetCommandResult.DATASET_AVAILABLE)
+
+	def JobCreateBatch(self, request):
+		self.batches += 1
+		return protos.JobBatchResponse(jobs=[self.JobCreate(job) for job in request.jobs])
+
+	def DatasetBatch(self, request):
+		self.batches += 1
+		status = protos.DatasetCommandResult.DATASET_DROPPED
+		return protos.DatasetBatchResponse(
+			datasets=[
+				protos.DatasetCommandResponse(status=status, dataset_id=dataset_id, worker_id=self.worker_id)
+				for dataset_id in request.dataset_ids
+			]
+		)
+
+
+def _controller() -> tuple[ControllerImpl, dict[str, _Worker]]:
+	controller = ControllerImpl(DatasetManager())
+	clients = {worker_id: _Worker(worker_id) for worker_id in ("w1", "w2")}
+	for worker_id, client in clients.items():
+		resources = protos.WorkerResources(cpus=1, memory_mb=1000.0)
+		controller.workers[worker_id] = Worker(url=f"url-{worker_id}", channel=None, client=client, resources=resources)
+	return controller, clients
+
+
+def test_job_create():
+	controller, clients = _controller()
+	status = protos.DatasetCommandResult.DATASET_AVAILABLE
+	controller.dataset_manager.update(protos.DatasetCommandResponse(status=status, dataset_id="d1", worker_id="w2", size_bytes=10))
+
+	first = controller.JobCreate(protos.JobCreateRequest(definition="", inputs=["d1"]), None)
+	assert first.worker_id == "w2"
+	# w2 is busy now, so the next one goes to w1, fetching the input there
+	second = controller.JobCreate(protos.JobCreateRequest(definition="", inputs=["d1"], memory_mb=100), None)
+	assert second.worker_id == "w1"
+	controller.fetches.shutdown(wait=True)
+	assert clients["w1"].fetched == [("d1", "url-w2")]
+	assert controller.workers["w1"].memory_used_mb == 100
+
+	# the worker pushing the job finished frees the capacity, and the status is known without asking the worker
+	running = protos.JobResponse(job_id=first.job_id, job_status=protos.JobStatus.WORKER_RUNNING)
+	finished = protos.JobResponse(job_id=first.job_id, job_status=protos.JobStatus.FINISHED, exit_code=0)
+	controller.UpdateJobs(protos.UpdateJobsRequest(worker_id="w2", jobs=[running, finished]), None)
+	assert (controller.workers["w2"].cpus_used, controller.workers["w1"].cpus_used) == (0, 1)
+	status = controller.JobStatus(protos.JobStatusRequest(job_id=first.job_id), None)
+	assert (status.job_status, status.worker_id, status.exit_code) == (protos.JobStatus.FINISHED, "w2", 0)
+	assert controller.JobStatus(protos.JobStatusRequest(job_id=second.job_id), None).job_status == protos.JobStatus.WORKER_ACCEPTED
+	missing = controller.JobStatus(protos.JobStatusRequest(job_id="missing"), None)
+	assert missing.job_status == protos.JobStatus.UNKNOWN_JOB_STATUS
+
+
+def test_held_bytes():
+	controller, _ = _controller()
+	available = protos.DatasetCommandResult.DATASET_AVAILABLE
+	# the primary registering again, eg once back from being considered dead, is counted once
+	for dataset_id, worker_id in (("d1", "w1"), ("d1", "w2"), ("d1", "w1")):
+		response = protos.DatasetCommandResponse(status=available, dataset_id=dataset_id, worker_id=worker_id, size_bytes=10)
+		controller.dataset_manager.update(response)
+	assert controller.dataset_manager.held_bytes() == {"w1": 10, "w2": 10}
+
+
+def test_batches():
+	controller, clients = _controller()
+	# each placed seeing the ones before, with a single call per worker
+	request = protos.JobCreateBatchRequest(jobs=[protos.JobCreateRequest(definition="", memory_mb=100) for _ in range(4)])
+	created = controller.JobCreateBatch(request, None).jobs
+	assert [job.worker_id for job in created] == ["w1", "w2", "w1", "w2"]
+	assert [job.job_id for job in created] == ["w1-0", "w2-0", "w1-1", "w2-1"]
+	assert (clients["w1"].batches, clients["w2"].batches) == (1, 1)
+	assert (controller.workers["w1"].cpus_used, controller.workers["w1"].memory_used_mb) == (2, 200)
+	statuses = controller.JobStatusBatch(protos.JobStatusBatchRequest(job_ids=["w1-0", "missing"]), None).jobs
+	assert [job.job_status for job in statuses] == [protos.JobStatus.WORKER_ACCEPTED, protos.JobStatus.UNKNOWN_JOB_STATUS]
+
+	available = protos.DatasetCommandResult.DATASET_AVAILABLE
+	for dataset_id, worker_id in (("d1", "w1"), ("d1", "w2"), ("d2", "w2")):
+		response = protos.DatasetCommandResponse(status=available, dataset_id=dataset_id, worker_id=worker_id, size_bytes=10)
+		controller.dataset_manager.update(response)
+	statuses = controller.DatasetBatch(protos.DatasetBatchRequest(dataset_ids=["d1", "d2", "d3"]), None).datasets
+	assert [(response.dataset_id, response.worker_id, response.status) for response in statuses] == [
+		("d1", "w1", available),
+		("d1", "w2", available),
+		("d2", "w2", available),
+		("d3", "", protos.DatasetCommandResult.DATASET_NOT_FOUND),
+	]
+	dropped = controller.DatasetBatch(protos.DatasetBatchRequest(dataset_ids=["d1", "d2", "d3"], drop=True), None).datasets
+	assert len(dropped) == 4
+	assert (clients["w1"].batches, clients["w2"].batches) == (2, 2)
+	assert controller.dataset_manager.datasets == {}
+	# the single drop goes the same way
+	controller.dataset_manager.update(protos.DatasetCommandResponse(status=available, dataset_id="d4", worker_id="w1"))
+	assert [response.status for response in controller.DatasetCommand(protos.DatasetCommandRequest(dataset_id="d4", drop=True), None)] == [
+		protos.DatasetCommandResult.DATASET_DROPPED
+	]
+	assert controller.dataset_manager.datasets == {}
+
+
+def test_heartbeats():
+	controller, clients = _controller()
+	# busier than placed, by the jobs running there or by what the controller didn't place
+	beat = protos.UpdateWorkerRequest(worker_id="w1", resources=protos.WorkerResources(cpus=1, memory_mb=1000.0), running_jobs=["x"])
+	controller.UpdateWorker(beat, None)
+	assert controller.JobCreate(protos.JobCreateRequest(definition=""), None).worker_id == "w2"
+	assert controller.loads()["w1"].load == 1.0
+	beat.ClearField("running_jobs")
+	beat.resources.cpu_load = 3.0
+	beat.resources.available_memory_mb = 10.0
+	controller.UpdateWorker(beat, None)
+	assert (controller.loads()["w1"].load, controller.loads()["w1"].free_memory_mb) == (3.0, 10.0)
+
+	available = protos.DatasetCommandResult.DATASET_AVAILABLE
+	for dataset_id, worker_id in (("d1", "w1"), ("d1", "w2"), ("d2", "w2")):
+		controller.dataset_manager.update(protos.DatasetCommandResponse(status=available, dataset_id=dataset_id, worker_id=worker_id))
+	beat = protos.UpdateWorkerRequest(worker_id="w1", interval_s=1.0)
+	controller.UpdateWorker(beat, None)
+	now = controller.workers["w1"].last_beat
+	controller.workers["w2"].last_beat = now - 10
+	assert controller.check_heartbeats(now + 2) == ["w2"]
+	# its datasets forgotten, its jobs failed, and nothing placed there anymore
+	assert controller.dataset_manager.holders_of("d1") == ["w1"]
+	assert "d2" not in controller.dataset_manager.datasets
+	assert controller.job_registry.get("w2-0").job_status == protos.JobStatus.WORKER_ERROR
+	assert controller.workers["w2"].cpus_used == 0
+	assert list(controller.loads()) == ["w1"]
+	assert controller.JobCreate(protos.JobCreateRequest(definition=""), None).worker_id == "w1"
+	assert controller.check_heartbeats(now + 3.5) == ["w1"]
+	with pytest.raises(ValueError, match="no workers"):
+		controller.JobCreate(protos.JobCreateRequest(definition=""), None)
+
+	# back with what it still holds
+	held = protos.DatasetCommandResponse(status=available, dataset_id="d2", worker_id="w2")
+	controller.UpdateWorker(protos.UpdateWorkerRequest(worker_id="w2", datasets=[held]), None)
+	assert controller.workers["w2"].alive
+	assert controller.dataset_manager.holders_of("d2") == ["w2"]
@@ -0,0 +1,96 @@
+from gnosch.scheduler.model import ClusterSpec, NodeSpec, Task, TaskOutput, TaskInput, SchedulingCommand, ExecutionState, RunningTask
+from gnosch.scheduler.reschedule import reschedule
+import pytest
+
+
+def _task(inputs: list[str], outputs: list[str]) -> Task:
+	return Task(
+		inputs=[TaskInput(dataset_id=dataset_id) for dataset_id in inputs],
+		outputs=[TaskOutput(dataset_id=dataset_id, size_mb=100) for dataset_id in outputs],
+		memory_mb=256,
+		prefered_cpus=1,
+		runtime_est_s=10,
+	)
+
+
+def test_reschedules_affected_only():
+	nodes = {"n1": NodeSpec(cpus=1, memory_mb=4096), "n2": NodeSpec(cpus=1, memory_mb=4096)}
+	cluster = ClusterSpec(nodes=nodes, comm_mbps={("n1", "n2"): 100.0, ("n2", "n1"): 100.0})
+	# dag:
+	# z --> e
+	# a --> b
+	# c
+	# f
+	task_graph = {
+		"z": _task([], ["dz"]),
+		"e": _task(["dz"], []),
+		"a": _task([], ["da"]),
+		"b": _task(["da"], []),
+		"c": _task([], []),
+		"f": _task([], []),
+	}
+	schedule = {
+		"n1": [
+			SchedulingCommand(launch_task="z"),
+			SchedulingCommand(launch_task="a"),
+			SchedulingCommand(launch_task="b"),
+			SchedulingCommand(drop_dataset="da"),
+			SchedulingCommand(launch_task="c"),
+		],
+		"n2": [
+			SchedulingCommand(fetch_dataset="dz"),
+			SchedulingCommand(launch_task="e"),
+			SchedulingCommand(drop_dataset="dz"),
+			SchedulingCommand(launch_task="f"),
+		],
+	}
+	on_time = ExecutionState(
+		finished={"z": "n1"},
+		running={"a": RunningTask(node="n1", elapsed_s=5, progress=0.5), "e": RunningTask(node="n2", elapsed_s=5, progress=0.5)},
+		datasets={"dz": {"n1", "n2"}},
+	)
+
+	assert reschedule(task_graph, cluster, schedule, on_time) is None
+
+	# a is at half of its work after 20s, so 20s more to go. Then b is best kept next to its input, while c
+	# moves to n2 after f, which stays where it was. dz is no longer needed by anyone
+	late = ExecutionState(
+		finished={"z": "n1"},
+		running={"a": RunningTask(node="n1", elapsed_s=20, progress=0.5), "e": RunningTask(node="n2", elapsed_s=5, progress=0.5)},
+		datasets={"dz": {"n1", "n2"}},
+	)
+
+	remaining = reschedule(task_graph, cluster, schedule, late)
+
+	assert remaining == {
+		"n1": [SchedulingCommand(drop_dataset="dz"), SchedulingCommand(launch_task="b"), SchedulingCommand(drop_dataset="da")],
+		"n2": [SchedulingCommand(drop_dataset="dz"), SchedulingCommand(launch_task="f"), SchedulingCommand(launch_task="c")],
+	}
+
+
+def test_lost_dataset():
+	cluster = ClusterSpec(nodes={"n1": NodeSpec(cpus=1, memory_mb=4096)}, comm_mbps={})
+	task_graph = {"a": _task([], ["da"]), "b": _task(["da"], []), "c": _task([], [])}
+	schedule = {"n1": [SchedulingCommand(launch_task=task_id) for task_id in ["c", "a", "b"]]}
+	state = ExecutionState(finished={"a": "n1"}, running={"c": RunningTask(node="n1", elapsed_s=50, progress=0.1)}, datasets={})
+
+	with pytest.raises(ValueError, match="not present anywhere"):
+		reschedule(task_graph, cluster, schedule, state)
+
+
+def test_departed_node():
+	cluster = ClusterSpec(nodes={"n1": NodeSpec(cpus=1, memory_mb=4096)}, comm_mbps={})
+	task_graph = {"a": _task([], ["da"]), "b": _task(["da"], []), "c": _task([], [])}
+	schedule = {"n1": [SchedulingCommand(launch_task="c")], "n2": [SchedulingCommand(launch_task="a"), SchedulingCommand(launch_task="b")]}
+	# n2 is gone with a running there, which never finishes
+	state = ExecutionState(
+		finished={},
+		running={"c": RunningTask(node="n1", elapsed_s=1, progress=0.1), "a": RunningTask(node="n2", elapsed_s=1, progress=0.1)},
+		datasets={},
+	)
+
+	remaining = reschedule(task_graph, cluster, schedule, state)
+
+	assert remaining == {
+		"n1": [SchedulingCommand(launch_task="a"), SchedulingCommand(launch_task="b"), SchedulingCommand(drop_dataset="da")]
+	}
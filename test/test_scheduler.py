@@ -0,0 +1,181 @@
+from gnosch.scheduler.model import ClusterSpec, NodeSpec, Task, TaskOutput, TaskInput, SchedulingCommand
+from gnosch.scheduler.api import schedule
+from gnosch.scheduler.simulator import simulate
+from gnosch.scheduler.planner import materialize
+from gnosch.scheduler.search import search
+from gnosch.scheduler.generators import homogeneous_cluster, layered
+import random
+import pytest
+
+
+def _launches(commands: list[SchedulingCommand]) -> list[str]:
+	return [command.launch_task for command in commands if command.launch_task]
+
+
+def _assert_valid(task_graph, cluster, plan):
+	"""Every task launched exactly once, with all its inputs present at the node by then"""
+	launched = [task_id for commands in plan.values() for task_id in _launches(commands)]
+	assert sorted(launched) == sorted(task_graph)
+	for commands in plan.values():
+		present: set[str] = set()
+		for command in commands:
+			if command.fetch_dataset:
+				present.add(command.fetch_dataset)
+			elif command.drop_dataset:
+				present.remove(command.drop_dataset)
+			elif command.launch_task:
+				task = task_graph[command.launch_task]
+				assert {inp.dataset_id for inp in task.inputs} <= present
+				present.update(output.dataset_id for output in task.outputs)
+
+
+def test_colocates_chain():
+	nodes = {"n1": NodeSpec(cpus=2, memory_mb=2048), "n2": NodeSpec(cpus=2, memory_mb=2048)}
+	cluster = ClusterSpec(nodes=nodes, comm_mbps={("n1", "n2"): 10.0, ("n2", "n1"): 10.0})
+	# dag:
+	# task1 --> task2 --> task3
+	task_graph = {
+		"t1": Task(inputs=[], outputs=[TaskOutput(dataset_id="d1", size_mb=512)], memory_mb=512, prefered_cpus=2, runtime_est_s=5),
+		"t2": Task(
+			inputs=[TaskInput(dataset_id="d1")],
+			outputs=[TaskOutput(dataset_id="d2", size_mb=512)],
+			memory_mb=512,
+			prefered_cpus=2,
+			runtime_est_s=5,
+		),
+		"t3": Task(inputs=[TaskInput(dataset_id="d2")], outputs=[], memory_mb=512, prefered_cpus=2, runtime_est_s=5),
+	}
+
+	plan = schedule(task_graph, cluster)
+
+	_assert_valid(task_graph, cluster, plan)
+	# everything on a single node, no fetches, intermediate datasets dropped
+	(node_name,) = [name for name, commands in plan.items() if commands]
+	assert _launches(plan[node_name]) == ["t1", "t2", "t3"]
+	assert not [command for command in plan[node_name] if command.fetch_dataset]
+	assert {command.drop_dataset for command in plan[node_name] if command.drop_dataset} == {"d1", "d2"}
+
+
+def test_fetches_when_not_fitting():
+	n1 = NodeSpec(cpus=1, memory_mb=1024)
+	n2 = NodeSpec(cpus=1, memory_mb=1024)
+	cluster = ClusterSpec(nodes={"n1": n1, "n2": n2}, comm_mbps={("n1", "n2"): 100.0, ("n2", "n1"): 100.0})
+	# dag:
+	# task1 -\
+	# task2 ---> task3
+	# and task1, task2 can't run concurrently on a single node
+	task_graph = {
+		"t1": Task(inputs=[], outputs=[TaskOutput(dataset_id="d1", size_mb=128)], memory_mb=700, prefered_cpus=1, runtime_est_s=50),
+		"t2": Task(inputs=[], outputs=[TaskOutput(dataset_id="d2", size_mb=128)], memory_mb=700, prefered_cpus=1, runtime_est_s=50),
+		"t3": Task(
+			inputs=[TaskInput(dataset_id="d1"), TaskInput(dataset_id="d2")], outputs=[], memory_mb=512, prefered_cpus=1, runtime_est_s=5
+		),
+	}
+
+	plan = schedule(task_graph, cluster)
+
+	_assert_valid(task_graph, cluster, plan)
+	assert sorted(len(_launches(commands)) for commands in plan.values()) == [1, 2]
+	assert len([command for commands in plan.values() for command in commands if command.fetch_dataset]) == 1
+	# t1 and t2 in parallel, a copy of 128mb, then t3
+	assert simulate(cluster, task_graph, plan) == pytest.approx(50 + 1.28 + 5)
+
+
+def test_random_layered_dag():
+	rng = random.Random(42)
+	nodes = {f"n{i}": NodeSpec(cpus=rng.choice([2, 4, 8]), memory_mb=rng.choice([4096, 8192])) for i in range(6)}
+	cluster = ClusterSpec(nodes=nodes, comm_mbps={(a, b): 100.0 for a in nodes for b in nodes if a != b})
+	task_graph = {}
+	previous: list[str] = []
+	for layer in range(6):
+		current = []
+		for i in range(10):
+			task_id = f"t{layer}_{i}"
+			inputs = [TaskInput(dataset_id=f"d{p}") for p in rng.sample(previous, min(len(previous), 3))]
+			outputs = [TaskOutput(dataset_id=f"d{task_id}", size_mb=rng.randint(1, 256))]
+			task_graph[task_id] = Task(
+				inputs=inputs,
+				outputs=outputs,
+				memory_mb=rng.randint(128, 2048),
+				prefered_cpus=rng.randint(1, 4),
+				runtime_est_s=rng.randint(1, 30),
+			)
+			current.append(task_id)
+		previous = current
+
+	plan = schedule(task_graph, cluster)
+
+	_assert_valid(task_graph, cluster, plan)
+	assert simulate(cluster, task_graph, plan) > 0
+
+
+def test_drops_fetched_copies_at_producer():
+	# a copy kept at the producer for every dataset fetched elsewhere would exhaust the memory of this cluster
+	task_graph = layered(random.Random(0), 80, 30)
+	cluster = homogeneous_cluster(16)
+
+	plan = schedule(task_graph, cluster)
+
+	_assert_valid(task_graph, cluster, plan)
+	assert any(command.after_fetches for commands in plan.values() for command in commands)
+	assert simulate(cluster, task_graph, plan) > 0
+
+
+def test_invalid_graphs():
+	cluster = ClusterSpec(nodes={"n1": NodeSpec(cpus=1, memory_mb=1024)}, comm_mbps={})
+	missing = {"t1": Task(inputs=[TaskInput(dataset_id="d0")], outputs=[], memory_mb=128, prefered_cpus=1, runtime_est_s=1)}
+	with pytest.raises(ValueError, match="no producer"):
+		schedule(missing, cluster)
+	cyclic = {
+		"t1": Task(
+			inputs=[TaskInput(dataset_id="d2")],
+			outputs=[TaskOutput(dataset_id="d1", size_mb=1)],
+			memory_mb=128,
+			prefered_cpus=1,
+			runtime_est_s=1,
+		),
+		"t2": Task(
+			inputs=[TaskInput(dataset_id="d1")],
+			outputs=[TaskOutput(dataset_id="d2", size_mb=1)],
+			memory_mb=128,
+			prefered_cpus=1,
+			runtime_est_s=1,
+		),
+	}
+	with pytest.raises(ValueError, match="cycle"):
+		schedule(cyclic, cluster)
+	oversized = {"t1": Task(inputs=[], outputs=[], memory_mb=4096, prefered_cpus=1, runtime_est_s=1)}
+	with pytest.raises(ValueError, match="does not fit"):
+		schedule(oversized, cluster)
+
+
+def test_search_improves():
+	nodes = {"n1": NodeSpec(cpus=1, memory_mb=4096), "n2": NodeSpec(cpus=1, memory_mb=4096), "n3": NodeSpec(cpus=1, memory_mb=4096)}
+	cluster = ClusterSpec(nodes=nodes, comm_mbps={(a, b): 50.0 for a in nodes for b in nodes if a != b})
+	task_graph = {
+		f"t{i}": Task(inputs=[], outputs=[TaskOutput(dataset_id=f"d{i}", size_mb=64)], memory_mb=256, prefered_cpus=1, runtime_est_s=5 + i)
+		for i in range(6)
+	}
+	task_graph["sink"] = Task(
+		inputs=[TaskInput(dataset_id=f"d{i}") for i in range(6)], outputs=[], memory_mb=256, prefered_cpus=1, runtime_est_s=1
+	)
+	# a deliberately bad initial schedule -- everything on a single node
+	initial = materialize(task_graph, {"n1": [f"t{i}" for i in range(6)] + ["sink"], "n2": [], "n3": []})
+
+	result = search(task_graph, cluster, budget_s=1.0, initial=initial, max_workers=2, seed=0)
+
+	assert result.initial_makespan == pytest.approx(simulate(cluster, task_graph, initial))
+	assert result.makespan < result.initial_makespan
+	assert result.evaluations > 0
+	_assert_valid(task_graph, cluster, result.schedule)
+	assert simulate(cluster, task_graph, result.schedule) == pytest.approx(result.makespan)
+
+
+def test_search_trivial_graphs():
+	cluster = homogeneous_cluster(2)
+	task_graph = {"t": Task(inputs=[], outputs=[TaskOutput(dataset_id="d", size_mb=1)], memory_mb=256, prefered_cpus=1, runtime_est_s=5)}
+	for seed in range(4):
+		result = search(task_graph, cluster, budget_s=0.2, max_workers=2, seed=seed)
+		assert result.makespan == pytest.approx(result.initial_makespan)
+		_assert_valid(task_graph, cluster, result.schedule)
+	assert search({}, cluster, budget_s=0.1, max_workers=1, seed=0).makespan == 0
@@ -0,0 +1,119 @@
+from gnosch.common.config import ServerConfig, WorkerConfig
+from gnosch.controller.api_server import AsyncControllerImpl, Worker
+from gnosch.controller.datasets import DatasetManager
+from concurrent import futures
+from typing import Any
+import gnosch.api.gnosch_pb2_grpc as services
+import gnosch.api.gnosch_pb2 as protos
+import asyncio
+import grpc
+import threading
+import time
+import pytest
+
+
+def test_config(monkeypatch):
+	monkeypatch.setenv("GNOSCH_WORKER_PORT", "6000")
+	monkeypatch.setenv("GNOSCH_WORKER_MODE", "aio")
+	monkeypatch.setenv("GNOSCH_WORKER_MAX_CONCURRENT_RPCS", "100")
+	monkeypatch.setenv("GNOSCH_CONTROLLER_HOST", "")
+	config = ServerConfig.from_env("worker", 50052)
+	assert (config.url, config.mode, config.max_concurrent_rpcs, config.max_workers) == ("localhost:6000", "aio", 100, 16)
+	assert ("grpc.max_receive_message_length", 64 << 20) in config.options()
+	assert ServerConfig.from_env("controller", 50051).url == "localhost:50051"
+	monkeypatch.setenv("GNOSCH_WORKER_MODE", "processes")
+	with pytest.raises(ValueError, match="unknown server mode"):
+		ServerConfig.from_env("worker", 50052)
+
+
+def test_worker_config(monkeypatch):
+	assert WorkerConfig.from_env().heartbeat_s == 2.0
+	monkeypatch.setenv("GNOSCH_WORKER_HEARTBEAT_S", "0.5")
+	monkeypatch.setenv("GNOSCH_WORKER_DATASETS_BUDGET_MB", "256")
+	config = WorkerConfig.from_env()
+	assert (config.heartbeat_s, config.datasets_budget_mb, config.spill_dir) == (0.5, 256.0, None)
+	assert config.preload is None
+	monkeypatch.setenv("GNOSCH_WORKER_PRELOAD", "numpy,json")
+	monkeypatch.setenv("GNOSCH_WORKER_MAX_JOBS_PER_RUNNER", "10")
+	config = WorkerConfig.from_env()
+	assert (config.preload, config.max_jobs_per_runner, config.runner_pool_size) == (["numpy", "json"], 10, 4)
+	monkeypatch.setenv("GNOSCH_WORKER_PRELOAD", ",")
+	assert WorkerConfig.from_env().preload == []
+
+
+class _Peer(services.GnoschBase):
+	def __init__(self, data: bytes):
+		self.data = data
+
+	def DatasetCommand(self, request, context):
+		end = request.offset + request.length if request.length else len(self.data)
+		for i in range(request.offset, end, request.block_size_hint):
+			data = self.data[i : min(i + request.block_size_hint, end)]
+			yield protos.DatasetCommandResponse(status=protos.DatasetCommandResult.DATASET_AVAILABLE, offset=i, data=data)
+
+
+def _serve_aio(servicer: Any) -> tuple[asyncio.AbstractEventLoop, Any, int]:
+	"""With a single thread for the calls which are not coroutines"""
+	loop = asyncio.new_event_loop()
+	threading.Thread(target=loop.run_forever, daemon=True).start()
+
+	async def start() -> tuple[Any, int]:
+		server = grpc.aio.server(migration_thread_pool=futures.ThreadPoolExecutor(max_workers=1))
+		services.add_GnoschBaseServicer_to_server(servicer, server)
+		services.add_GnoschControllerServicer_to_server(servicer, server)
+		port = server.add_insecure_port("localhost:0")
+		await server.start()
+		return server, port
+
+	server, port = asyncio.run_coroutine_threadsafe(start(), loop).result()
+	return loop, server, port
+
+
+def test_aio_controller():
+	data = bytes(range(256)) * 4_000
+	controller = AsyncControllerImpl(DatasetManager())
+	peers = []
+	for worker_id in ("w1", "w2"):
+		peer = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+		services.add_GnoschBaseServicer_to_server(_Peer(data), peer)
+		url = f"localhost:{peer.add_insecure_port('localhost:0')}"
+		peer.start()
+		peers.append(peer)
+		controller.workers[worker_id] = Worker(url=url, channel=None, client=None)
+		status = protos.DatasetCommandResult.DATASET_AVAILABLE
+		controller.dataset_manager.update(
+			protos.DatasetCommandResponse(status=status, dataset_id="d1", worker_id=worker_id, size_bytes=len(data))
+		)
+	loop, server, port = _serve_aio(controller)
+	channel = grpc.insecure_channel(f"localhost:{port}")
+	client = services.GnoschBaseStub(channel)
+
+	# the streams held open don't take the single thread, so the rest still gets served
+	retrieval = client.DatasetCommand(protos.DatasetCommandRequest(dataset_id="d1", retrieve=True, block_size_hint=10_000))
+	received = bytearray(len(data))
+	first = next(retrieval)
+	watch = client.WatchJobs(protos.WatchJobsRequest())
+	deadline = time.monotonic() + 10
+	while not controller.job_registry.watchers:
+		assert time.monotonic() < deadline
+		time.sleep(0.01)
+	assert client.Ping(protos.PingRequest(), timeout=5).status == protos.ServerStatus.OK
+	running = protos.JobResponse(job_id="j1", job_status=protos.JobStatus.WORKER_RUNNING)
+	services.GnoschControllerStub(channel).UpdateJobs(protos.UpdateJobsRequest(worker_id="w1", jobs=[running]), timeout=5)
+	assert next(watch).job_id == "j1"
+	watch.cancel()
+
+	# striped over both workers
+	for response in [first, *retrieval]:
+		received[response.offset : response.offset + len(response.data)] = response.data
+	assert received == data
+	deadline = time.monotonic() + 10
+	while controller.job_registry.watchers:
+		assert time.monotonic() < deadline
+		time.sleep(0.01)
+
+	channel.close()
+	asyncio.run_coroutine_threadsafe(server.stop(None), loop).result()
+	loop.call_soon_threadsafe(loop.stop)
+	for peer in peers:
+		peer.stop(None)
@@ -17,7 +17,7 @@ def test_basic_simulation():
 	# task3
 	task_graph = {
 		"t1": Task(inputs=[], outputs=[TaskOutput(dataset_id="d1", size_mb=128)], memory_mb=512, prefered_cpus=2, runtime_est_s=5),
-		"t2": Task(inputs=[TaskInput(dataset_id="d2")], outputs=[], memory_mb=512, prefered_cpus=2, runtime_est_s=5),
+		"t2": Task(inputs=[TaskInput(dataset_id="d1")], outputs=[], memory_mb=512, prefered_cpus=2, runtime_est_s=5),
 		"t3": Task(inputs=[], outputs=[], memory_mb=512, prefered_cpus=3, runtime_est_s=5),
 	}
 
@@ -76,3 +76,57 @@ def test_two_nodes():
 	expected_runtime = pytest.approx(10.0)
 
 	assert simulated_runtime == expected_runtime
+
+
+def test_transfers():
+	n1 = NodeSpec(cpus=1, memory_mb=1024)
+	n2 = NodeSpec(cpus=1, memory_mb=1024)
+	cluster = ClusterSpec(nodes={"n1": n1, "n2": n2}, comm_mbps={("n1", "n2"): 64.0, ("n2", "n1"): 64.0})
+	# dag:
+	# task1 -\
+	# task2 ---> task3
+	task_graph = {
+		"t1": Task(inputs=[], outputs=[TaskOutput(dataset_id="d1", size_mb=128)], memory_mb=256, prefered_cpus=1, runtime_est_s=5),
+		"t2": Task(inputs=[], outputs=[TaskOutput(dataset_id="d2", size_mb=128)], memory_mb=256, prefered_cpus=1, runtime_est_s=5),
+		"t3": Task(
+			inputs=[TaskInput(dataset_id="d1"), TaskInput(dataset_id="d2")], outputs=[], memory_mb=256, prefered_cpus=1, runtime_est_s=5
+		),
+	}
+
+	# t1 and t2 on n1, both outputs fetched to n2 over a shared link: 256mb at 64mb/s takes 4s
+	# => 5s of t1, t2 in parallel (10s) + 4s of copying + 5s of t3
+	schedule = {
+		"n1": [
+			SchedulingCommand(launch_task="t1"),
+			SchedulingCommand(launch_task="t2"),
+		],
+		"n2": [
+			SchedulingCommand(fetch_dataset="d1"),
+			SchedulingCommand(fetch_dataset="d2"),
+			SchedulingCommand(launch_task="t3"),
+		],
+	}
+
+	assert simulate(cluster, task_graph, schedule) == pytest.approx(19.0)
+
+	# the drop can happen only once t3 is done with d1
+	schedule["n2"].append(SchedulingCommand(drop_dataset="d1"))
+	assert simulate(cluster, task_graph, schedule) == pytest.approx(19.0)
+
+	# the drops at the source wait for the fetches without holding up the queue, so t4 runs along t1 and t2
+	# => 1s later, rather than after the fetches
+	t4 = Task(inputs=[], outputs=[], memory_mb=256, prefered_cpus=1, runtime_est_s=1)
+	schedule["n1"] += [SchedulingCommand(drop_dataset=d, after_fetches=True) for d in ("d1", "d2")] + [SchedulingCommand(launch_task="t4")]
+	assert simulate(cluster, task_graph | {"t4": t4}, schedule) == pytest.approx(20.0)
+
+
+def test_stuck_schedule():
+	cluster = ClusterSpec(nodes={"n1": NodeSpec(cpus=1, memory_mb=1024)}, comm_mbps={})
+	task_graph = {
+		"t1": Task(inputs=[TaskInput(dataset_id="d1")], outputs=[], memory_mb=256, prefered_cpus=1, runtime_est_s=5),
+		"t2": Task(inputs=[], outputs=[TaskOutput(dataset_id="d1", size_mb=128)], memory_mb=256, prefered_cpus=1, runtime_est_s=5),
+	}
+	schedule = {"n1": [SchedulingCommand(launch_task="t1"), SchedulingCommand(launch_task="t2")]}
+
+	with pytest.raises(ValueError, match="can't progress"):
+		simulate(cluster, task_graph, schedule)